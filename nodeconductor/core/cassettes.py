@@ -0,0 +1,375 @@
+"""
+Recording and replaying of traffic of external API clients.
+
+In record mode every call made through a client, e.g. ``nova.servers.list()``
+or ``api.host.get()``, is captured along with its result or exception and
+its duration into gzipped JSON lines files, one file per service and process.
+
+In replay mode clients are not created at all, calls are answered
+from recorded files instead, optionally pausing for the recorded durations.
+
+Mode is configured with CASSETTES setting, see install guide.
+"""
+from __future__ import unicode_literals
+
+from collections import defaultdict
+import atexit
+import glob
+import gzip
+import importlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.utils import six
+
+from nodeconductor.core.proxies import CallInterceptingProxy, get_resource_path
+
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+_FLUSH_THRESHOLD = 100
+
+# Attributes client exceptions are built from, e.g. novaclient ones take code and message
+_EXCEPTION_ATTRIBUTES = ('code', 'message', 'details', 'http_status', 'status_code', 'request_id')
+
+_recorders = {}
+_cassettes = {}
+_registry_lock = threading.Lock()
+
+
+class CassetteError(Exception):
+    pass
+
+
+def _get_cassettes_settings():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    defaults = {
+        'MODE': None,
+        'PATH': None,
+        'SPEED': 1,
+    }
+    defaults.update(nc_settings.get('CASSETTES', {}))
+    return defaults
+
+
+def use_cassette(service, scope, client_factory):
+    """
+    Return client of the service, recording or replaying its traffic if configured so.
+
+    :param service: name of the service, e.g. 'nova'
+    :param scope: identifies whose view of the service the client has, e.g. a tenant
+    :param client_factory: callable creating the actual client, not called in replay mode
+    """
+    cassettes_settings = _get_cassettes_settings()
+    mode = cassettes_settings['MODE']
+
+    if mode == RECORD:
+        recorder = _get_registered(_recorders, service, lambda: CassetteRecorder(
+            _get_recording_path(cassettes_settings['PATH'], service)))
+        return CallInterceptingProxy(client_factory(), recorder.get_hook(scope))
+
+    if mode == REPLAY:
+        cassette = _get_registered(_cassettes, service, lambda: Cassette.load(
+            _get_replaying_paths(cassettes_settings['PATH'], service)))
+        return ReplayingProxy(cassette, scope, speed=cassettes_settings['SPEED'])
+
+    return client_factory()
+
+
+def reset_cassettes():
+    """
+    Flush pending records and forget loaded cassettes.
+    """
+    with _registry_lock:
+        for recorder in _recorders.values():
+            recorder.flush()
+        _recorders.clear()
+        _cassettes.clear()
+
+
+def _get_registered(registry, service, factory):
+    with _registry_lock:
+        try:
+            return registry[service]
+        except KeyError:
+            obj = registry[service] = factory()
+            return obj
+
+
+def _get_recording_path(directory, service):
+    return os.path.join(directory, '%s.%s.%d.jsonl.gz' % (service, socket.gethostname(), os.getpid()))
+
+
+def _get_replaying_paths(directory, service):
+    return sorted(glob.glob(os.path.join(directory, '%s.*.jsonl.gz' % service)))
+
+
+def _serialize_argument(value):
+    # Resources passed as arguments are identified by their ids
+    if hasattr(value, '_info'):
+        return getattr(value, 'id', None)
+    if isinstance(value, dict):
+        return dict((six.text_type(k), _serialize_argument(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return [_serialize_argument(v) for v in value]
+    if value is None or isinstance(value, (bool, float) + six.string_types + six.integer_types):
+        return value
+    return six.text_type(value)
+
+
+def serialize_result(value):
+    if hasattr(value, '_info'):
+        return {'__resource__': serialize_result(value._info)}
+    if isinstance(value, dict):
+        return dict((six.text_type(k), serialize_result(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return [serialize_result(v) for v in value]
+    if value is None or isinstance(value, (bool, float) + six.string_types + six.integer_types):
+        return value
+    return six.text_type(value)
+
+
+def _serialize_exception(exception):
+    attributes = {}
+    for name in _EXCEPTION_ATTRIBUTES:
+        value = getattr(exception, name, None)
+        if value is not None:
+            attributes[name] = _serialize_argument(value)
+
+    return [
+        '%s.%s' % (exception.__class__.__module__, exception.__class__.__name__),
+        _serialize_argument(exception.args),
+        attributes,
+    ]
+
+
+def _deserialize_result(value, methods=None):
+    """
+    Restore recorded result, resources answer calls of their methods with the methods proxy.
+    """
+    if isinstance(value, dict):
+        if '__resource__' in value:
+            return ReplayedResource(_deserialize_result(value['__resource__']), methods)
+        return dict((k, _deserialize_result(v, methods)) for k, v in value.items())
+    if isinstance(value, list):
+        return [_deserialize_result(v, methods) for v in value]
+    return value
+
+
+def _get_call_key(scope, path, args, kwargs):
+    return json.dumps([scope, path, args, kwargs], sort_keys=True)
+
+
+class ReplayedResource(object):
+    """
+    Resource restored from a cassette, mimics resources returned by API clients.
+
+    Methods of the resource are answered from the cassette if they were recorded.
+    """
+    def __init__(self, info, methods=None):
+        self._info = info
+        self._methods = methods
+        for key, value in info.items():
+            setattr(self, key, value)
+
+    def __getattr__(self, name):
+        methods = self.__dict__.get('_methods')
+        if name.startswith('_') or methods is None or not methods.has_recorded_calls(name):
+            raise AttributeError(name)
+        return getattr(methods, name)
+
+    def to_dict(self):
+        return self._info
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self._info.get('id'))
+
+
+class CassetteRecorder(object):
+    """
+    Append records to a file, gzipping them in batches.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._records = []
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def record(self, scope, path, args, kwargs, duration, result=None, exception=None):
+        record = {
+            's': scope,
+            'p': path,
+            'a': _serialize_argument(args),
+            'k': _serialize_argument(kwargs),
+            'd': round(duration, 6),
+        }
+        if exception is not None:
+            record['e'] = _serialize_exception(exception)
+        else:
+            record['r'] = serialize_result(result)
+
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            self._records.append(line)
+            if len(self._records) >= _FLUSH_THRESHOLD:
+                self._flush()
+
+    def get_hook(self, scope):
+        """
+        Return hook of the client proxy recording calls made by the client of the scope.
+        """
+        def record_call(path, func, args, kwargs):
+            start = time.time()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.record(scope, path, args, kwargs, time.time() - start, exception=e)
+                raise
+            else:
+                self.record(scope, path, args, kwargs, time.time() - start, result=result)
+                return result
+
+        return record_call
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._records:
+            return
+
+        # Every batch is a separate gzip member, gzip readers concatenate them transparently
+        with gzip.open(self.path, 'ab') as cassette_file:
+            cassette_file.write(('\n'.join(self._records) + '\n').encode('utf-8'))
+        self._records = []
+
+
+class Cassette(object):
+    """
+    Recorded calls indexed for replaying.
+
+    Calls are matched by scope, path and arguments; if there is no such call
+    recorded, by scope and path or by path only, so that calls with volatile
+    arguments, such as timestamps, are still answered. Records matching the same
+    call are replayed in the recorded order, the last one is repeated when exhausted.
+    """
+    def __init__(self, records):
+        self._records_by_key = defaultdict(list)
+        self._cursors = defaultdict(int)
+        self._lock = threading.Lock()
+
+        for record in records:
+            for key in self._get_lookup_keys(record['s'], record['p'], record['a'], record['k']):
+                self._records_by_key[key].append(record)
+
+    @classmethod
+    def load(cls, paths):
+        def read_records():
+            for path in paths:
+                with gzip.open(path, 'rb') as cassette_file:
+                    for line in cassette_file:
+                        yield json.loads(line.decode('utf-8'))
+
+        if not paths:
+            logger.warning('No cassettes found, all calls are going to fail')
+
+        return cls(read_records())
+
+    def find(self, scope, path, args, kwargs):
+        args, kwargs = _serialize_argument(args), _serialize_argument(kwargs)
+
+        with self._lock:
+            for key in self._get_lookup_keys(scope, path, args, kwargs):
+                records = self._records_by_key.get(key)
+                if records:
+                    cursor = self._cursors[key]
+                    self._cursors[key] = min(cursor + 1, len(records) - 1)
+                    return records[cursor]
+
+        raise CassetteError('No recorded call of %s matches %s(*%s, **%s)' % (path, scope, args, kwargs))
+
+    def has_calls(self, path):
+        return _get_call_key(None, path, None, None) in self._records_by_key
+
+    def _get_lookup_keys(self, scope, path, args, kwargs):
+        return (
+            _get_call_key(scope, path, args, kwargs),
+            _get_call_key(scope, path, None, None),
+            _get_call_key(None, path, None, None),
+        )
+
+
+class ReplayingProxy(object):
+    """
+    Answer calls made through any chain of attributes from the cassette.
+    """
+    def __init__(self, cassette, scope, speed=1, path=''):
+        self._cassette = cassette
+        self._scope = scope
+        self._speed = speed
+        self._path = path
+        self._children = {}
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        try:
+            return self._children[name]
+        except KeyError:
+            path = '%s.%s' % (self._path, name) if self._path else name
+            child = self._children[name] = ReplayingProxy(self._cassette, self._scope, self._speed, path)
+            return child
+
+    def __call__(self, *args, **kwargs):
+        record = self._cassette.find(self._scope, self._path, args, kwargs)
+
+        if self._speed:
+            time.sleep(record['d'] / self._speed)
+
+        if 'e' in record:
+            raise self._restore_exception(*record['e'])
+
+        methods = ReplayingProxy(self._cassette, self._scope, self._speed, get_resource_path(self._path))
+        return _deserialize_result(record['r'], methods)
+
+    def has_recorded_calls(self, name):
+        path = '%s.%s' % (self._path, name) if self._path else name
+        return self._cassette.has_calls(path)
+
+    def _restore_exception(self, class_path, args, attributes=None):
+        module_name, class_name = class_path.rsplit('.', 1)
+        try:
+            exception_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError):
+            return CassetteError('Recorded call of %s failed with %s%s' % (self._path, class_path, tuple(args)))
+
+        # Client exceptions are mostly built from keyword arguments,
+        # e.g. novaclient ones take code and message, so that their args are empty
+        attributes = attributes or {}
+        constructors = [lambda: exception_class(*args)]
+        if attributes:
+            constructors.insert(0, lambda: exception_class(**attributes))
+
+        for construct in constructors:
+            try:
+                exception = construct()
+                break
+            except TypeError:
+                pass
+        else:
+            exception = exception_class.__new__(exception_class)
+            exception.args = tuple(args)
+
+        for name, value in attributes.items():
+            setattr(exception, name, value)
+
+        return exception
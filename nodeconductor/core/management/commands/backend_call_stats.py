@@ -0,0 +1,77 @@
+from __future__ import unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from nodeconductor.core import tracing
+
+
+class Command(BaseCommand):
+    help = """Print statistics of calls made to OpenStack and Zabbix APIs by all the processes.
+
+Calls are traced only if BACKEND_TRACING is enabled. Methods are sorted by total time spent.
+Calls per run column shows average number of calls made by a single run of each task,
+large numbers usually point to N+1 call patterns. Tenants making the most of calls are listed for every method."""
+
+    option_list = BaseCommand.option_list + (
+        make_option('--limit', type='int', default=20,
+                    help='Number of methods to print.'),
+        make_option('--service', default=None,
+                    help='Print only calls of the given service, e.g. nova.'),
+        make_option('--tenants', type='int', default=3,
+                    help='Number of tenants to print for every method.'),
+        make_option('--reset', action='store_true', default=False,
+                    help='Drop collected statistics.'),
+    )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            tracing.reset_published_stats()
+            self.stdout.write('Statistics have been reset.')
+            return
+
+        stats = tracing.get_published_stats()
+        if options['service']:
+            stats = dict((key, s) for key, s in stats.items() if key[0] == options['service'])
+
+        if not stats:
+            self.stdout.write('No calls have been traced yet.')
+            return
+
+        ordered = sorted(stats.items(), key=lambda item: item[1].total_time, reverse=True)[:options['limit']]
+
+        row_format = '{:<40} {:>8} {:>8} {:>9} {:>8} {:>8} {:>8} {:>8} {:>8} {:>8} {:>10}'
+        self.stdout.write(row_format.format(
+            'Call', 'Count', 'Errors', 'Total, s', 'Avg, ms', 'P50, ms', 'P95, ms', 'P99, ms', 'Max, ms',
+            'Items', 'Bytes'))
+
+        for (service, path, cloud), call_stats in ordered:
+            errors = call_stats.count - call_stats.statuses.get('ok', 0)
+            self.stdout.write(row_format.format(
+                '%s.%s' % (service, path),
+                call_stats.count,
+                errors,
+                '%.1f' % call_stats.total_time,
+                '%.0f' % (1000 * call_stats.total_time / call_stats.count),
+                '%.0f' % (1000 * call_stats.get_percentile(50)),
+                '%.0f' % (1000 * call_stats.get_percentile(95)),
+                '%.0f' % (1000 * call_stats.get_percentile(99)),
+                '%.0f' % (1000 * call_stats.max_time),
+                call_stats.items // call_stats.count,
+                call_stats.size // call_stats.count,
+            ))
+            self.stdout.write('    cloud: %s' % cloud)
+
+            if errors:
+                self.stdout.write('    statuses: %s' % ', '.join(
+                    '%s: %d' % (status, count) for status, count in sorted(call_stats.statuses.items())))
+
+            for task_name, count in sorted(call_stats.tasks.items()):
+                self.stdout.write('    task %s: %d calls, %.1f calls per run' % (
+                    task_name, count, float(count) / call_stats.task_runs[task_name]))
+
+            tenants = sorted(call_stats.tenant_times.items(), key=lambda item: item[1], reverse=True)
+            for tenant, total_time in tenants[:options['tenants']]:
+                self.stdout.write('    tenant %s: %d calls, %.1fs total' % (
+                    tenant, call_stats.tenants[tenant], total_time))
@@ -211,6 +211,23 @@ class SynchronizableMixin(models.Model):
         pass
 
 
+class TaskLease(models.Model):
+    """
+    Exclusive right of a background task to process an entity, see nodeconductor.core.tasks.Lease.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    token = models.CharField(max_length=32)
+    expires_at = models.DateTimeField()
+
+
+class TaskLeaseItem(models.Model):
+    """
+    Item joined to be processed by the holder of a lease, JSON encoded.
+    """
+    key = models.CharField(max_length=255, db_index=True)
+    value = models.TextField()
+
+
 # Signal handlers
 @receiver(signals.post_save, sender=User)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
@@ -0,0 +1,82 @@
+"""
+Interception of calls made through external API clients.
+
+Cassettes and tracing wrap clients into the same proxy
+and differ only in what they do with the intercepted calls.
+"""
+from __future__ import unicode_literals
+
+from django.utils import six
+
+# Methods of resources that do not call the API
+LOCAL_RESOURCE_METHODS = ('to_dict', 'is_loaded', 'set_loaded')
+
+
+def is_resource(value):
+    return isinstance(getattr(value, '_info', None), dict)
+
+
+def get_resource_path(path):
+    """
+    Return path of a resource returned by the call, e.g. servers.get().
+
+    Calls of methods of the resource are made under this path, e.g. servers.get().add_floating_ip
+    """
+    return '%s()' % path
+
+
+class CallInterceptingProxy(object):
+    """
+    Pass attribute accesses and calls through to the wrapped object, intercepting the calls.
+
+    Every call made through any chain of attributes, e.g. ``nova.servers.list()``,
+    is handed over to the hook as ``hook(path, func, args, kwargs)``, where path is
+    the chain of attributes, e.g. 'servers.list', and the hook returns the result of the call.
+
+    Returned resources are wrapped as well, so that calls of their methods are intercepted too.
+    """
+    def __init__(self, obj, hook, path=''):
+        self._obj = obj
+        self._hook = hook
+        self._path = path
+        # Same attribute must return the same proxy, e.g. for managers to be usable as dict keys
+        self._children = {}
+
+    def __getattr__(self, name):
+        try:
+            return self._children[name]
+        except KeyError:
+            pass
+
+        value = getattr(self._obj, name)
+        if value is None or isinstance(value, (bool, float, dict, list, tuple) + six.string_types + six.integer_types):
+            return value
+        if name.startswith('_') or is_resource(self._obj) and name in LOCAL_RESOURCE_METHODS:
+            return value
+
+        path = '%s.%s' % (self._path, name) if self._path else name
+        child = self._children[name] = self.__class__(value, self._hook, path)
+        return child
+
+    def __call__(self, *args, **kwargs):
+        result = self._hook(self._path, self._obj, args, kwargs)
+        return self._wrap_resources(result)
+
+    def __eq__(self, other):
+        return self._obj == getattr(other, '_obj', other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._obj)
+
+    def __repr__(self):
+        return repr(self._obj)
+
+    def _wrap_resources(self, result):
+        if is_resource(result):
+            return self.__class__(result, self._hook, get_resource_path(self._path))
+        if isinstance(result, list):
+            return [self._wrap_resources(r) for r in result]
+        return result
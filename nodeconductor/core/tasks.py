@@ -1,12 +1,18 @@
 from __future__ import unicode_literals
 
+from collections import defaultdict
+from datetime import timedelta
 import functools
+import json
 import logging
+import uuid
 
-from django.db import transaction, DatabaseError
+from django.conf import settings
+from django.db import transaction, DatabaseError, IntegrityError
 from django.utils import six
-from django_fsm import TransitionNotAllowed
+from django.utils import timezone
 
+from nodeconductor.core import models
 from nodeconductor.core.log import EventLoggerAdapter
 
 logger = logging.getLogger(__name__)
@@ -17,11 +23,74 @@ class StateChangeError(RuntimeError):
     pass
 
 
+_id_field_names = {}
+_transitions_updates = {}
+
+
+# noinspection PyProtectedMember
+def _get_id_field_name(model_class):
+    """
+    Return name of the field identifying model_class instances, either uuid or pk.
+    """
+    try:
+        return _id_field_names[model_class]
+    except KeyError:
+        if 'uuid' in model_class._meta.get_all_field_names():
+            id_field_name = 'uuid'
+        else:
+            id_field_name = 'pk'
+
+        _id_field_names[model_class] = id_field_name
+        return id_field_name
+
+
+def _get_transition_updates(model_class, transition):
+    """
+    Derive conditional updates performing the transition from its FSM metadata.
+
+    Transition methods are expected to only change the state, they are not called.
+
+    :returns: name of the state field and (target, sources) pairs,
+              sources are None if the transition is allowed from any state
+    :rtype: tuple
+    """
+    key = (model_class, transition)
+    try:
+        return _transitions_updates[key]
+    except KeyError:
+        pass
+
+    try:
+        fsm_meta = getattr(model_class, transition)._django_fsm
+    except AttributeError:
+        raise TypeError('%s.%s is not a transition' % (model_class.__name__, transition))
+
+    state_field_name = getattr(fsm_meta.field, 'name', fsm_meta.field)
+
+    sources_by_target = defaultdict(list)
+    any_source_targets = set()
+    for source, fsm_transition in fsm_meta.transitions.items():
+        if source == '*':
+            any_source_targets.add(fsm_transition.target)
+        else:
+            sources_by_target[fsm_transition.target].append(source)
+
+    updates = [(target, sources) for target, sources in sources_by_target.items()]
+    # Transitions from explicit sources take precedence over the ones from any state
+    updates.extend((target, None) for target in any_source_targets)
+
+    _transitions_updates[key] = state_field_name, updates
+    return _transitions_updates[key]
+
+
 # noinspection PyProtectedMember
 def set_state(model_class, uuid_or_pk, transition):
     """
     Atomically change state of a model_class instance.
 
+    State is changed with a single conditional update query, compare-and-swap way,
+    allowed source states and target state are derived from the transition metadata.
+
     Handles edge cases:
     * model instance missing in the database
     * concurrent database update of a model instance
@@ -72,39 +141,39 @@ def set_state(model_class, uuid_or_pk, transition):
         logged_operation, entity_name, uuid_or_pk
     )
 
+    kwargs = {_get_id_field_name(model_class): uuid_or_pk}
+    state_field_name, updates = _get_transition_updates(model_class, transition)
+    queryset = model_class._default_manager.filter(**kwargs)
+
     try:
-        with transaction.atomic():
-            if 'uuid' in model_class._meta.get_all_field_names():
-                kwargs = {'uuid': uuid_or_pk}
+        for target, sources in updates:
+            if sources is None:
+                updated_count = queryset.update(**{state_field_name: target})
             else:
-                kwargs = {'pk': uuid_or_pk}
-            entity = model_class._default_manager.get(**kwargs)
-
-            # TODO: Make sure that the transition method actually exists
-            transition = getattr(entity, transition)
-            transition()
-
-            entity.save()
-    except model_class.DoesNotExist:
-        # There's nothing we can do here to save the state of an entity
-        logger.error(
-            'Could not %s %s with id %s. Instance has gone',
-            logged_operation, entity_name, uuid_or_pk)
+                updated_count = queryset.filter(
+                    **{state_field_name + '__in': sources}).update(**{state_field_name: target})
+
+            if updated_count:
+                break
+        else:
+            if queryset.exists():
+                # Leave the entity intact
+                logger.error(
+                    'Could not %s %s with id %s, transition not allowed',
+                    logged_operation, entity_name, uuid_or_pk)
+            else:
+                # There's nothing we can do here to save the state of an entity
+                logger.error(
+                    'Could not %s %s with id %s. Instance has gone',
+                    logged_operation, entity_name, uuid_or_pk)
 
-        six.reraise(StateChangeError, StateChangeError())
+            raise StateChangeError()
     except DatabaseError:
-        # Transaction failed to commit, most likely due to concurrent update
         logger.error(
-            'Could not %s %s with id %s due to concurrent update',
+            'Could not %s %s with id %s due to database error',
             logged_operation, entity_name, uuid_or_pk)
 
         six.reraise(StateChangeError, StateChangeError())
-    except TransitionNotAllowed:
-        # Leave the entity intact
-        logger.error(
-            'Could not %s %s with id %s, transition not allowed',
-            logged_operation, entity_name, uuid_or_pk)
-        six.reraise(StateChangeError, StateChangeError())
 
     logger.info(
         'Managed to %s %s with id %s',
@@ -116,6 +185,71 @@ def set_state(model_class, uuid_or_pk, transition):
     )
 
 
+# noinspection PyProtectedMember
+def set_states(model_class, uuids_or_pks, transition):
+    """
+    Atomically change state of several model_class instances at once.
+
+    Unlike set_state(), instances that have gone or forbid the transition
+    are skipped, the rest are changed within a single transaction
+    with an update query per target state.
+
+    :param model_class: model class of instances to change state
+    :type model_class: django.db.models.Model
+    :param uuids_or_pks: identifiers of the model_class instances
+    :param transition: name of model's method to trigger transition
+    :type transition: str
+    :returns: identifiers of the instances which state has been changed
+    :rtype: list
+    """
+    logged_operation = transition.replace('_', ' ')
+    entity_name = model_class._meta.model_name
+
+    id_field_name = _get_id_field_name(model_class)
+    state_field_name, updates = _get_transition_updates(model_class, transition)
+
+    logger.info(
+        'About to %s %d %s instances',
+        logged_operation, len(uuids_or_pks), entity_name
+    )
+
+    changed_ids = []
+    try:
+        with transaction.atomic():
+            entities = model_class._default_manager.select_for_update().filter(
+                **{id_field_name + '__in': uuids_or_pks})
+
+            # Rows are locked, so states are compared and swapped in Python safely
+            pks_by_target = defaultdict(list)
+            for entity in entities:
+                state = getattr(entity, state_field_name)
+                for target, sources in updates:
+                    if sources is None or state in sources:
+                        pks_by_target[target].append(entity.pk)
+                        changed_ids.append(getattr(entity, id_field_name))
+                        break
+                else:
+                    logger.error(
+                        'Could not %s %s with id %s, transition not allowed',
+                        logged_operation, entity_name, getattr(entity, id_field_name))
+
+            for target, pks in pks_by_target.items():
+                model_class._default_manager.filter(pk__in=pks).update(**{state_field_name: target})
+    except DatabaseError:
+        logger.error(
+            'Could not %s %d %s instances due to database error',
+            logged_operation, len(uuids_or_pks), entity_name)
+
+        six.reraise(StateChangeError, StateChangeError())
+
+    logger.info(
+        'Managed to %s %d of %d %s instances',
+        logged_operation, len(changed_ids), len(uuids_or_pks), entity_name
+    )
+
+    return changed_ids
+
+
 def tracked_processing(model_class, processing_state, desired_state, error_state='set_erred'):
     def decorator(processing_fn):
         @functools.wraps(processing_fn)
@@ -150,3 +284,93 @@ def tracked_processing(model_class, processing_state, desired_state, error_state
 
         return wrapped
     return decorator
+
+
+def _get_lease_timeout():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    return nc_settings.get('TASK_LEASE_TIMEOUT', 10 * 60)
+
+
+class Lease(object):
+    """
+    Exclusive right to process an entity, shared by all the processes through the database.
+
+    Lease expires after timeout seconds unless extended, so that the entity
+    is not locked forever in case its holder dies. Processes that failed
+    to acquire the lease may join items to be processed by its holder.
+    """
+    key_prefix = 'nodeconductor:core:lease:'
+
+    def __init__(self, key, timeout=None):
+        self.key = self.key_prefix + key
+        self.timeout = timeout or _get_lease_timeout()
+        self.token = None
+
+    def acquire(self):
+        now = timezone.now()
+        token = uuid.uuid4().hex
+
+        # Lease of a dead holder is taken over once it has expired
+        models.TaskLease.objects.filter(key=self.key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                models.TaskLease.objects.create(
+                    key=self.key, token=token, expires_at=now + timedelta(seconds=self.timeout))
+        except IntegrityError:
+            return False
+
+        self.token = token
+        return True
+
+    def extend(self):
+        # Expired lease might have been acquired by another process meanwhile
+        if self.token is not None:
+            models.TaskLease.objects.filter(key=self.key, token=self.token).update(
+                expires_at=timezone.now() + timedelta(seconds=self.timeout))
+
+    def release(self):
+        if self.token is not None:
+            models.TaskLease.objects.filter(key=self.key, token=self.token).delete()
+        self.token = None
+
+    def join(self, items):
+        # Joined items outlive the lease so that they are picked up by the next holder if this one dies
+        models.TaskLeaseItem.objects.bulk_create(
+            [models.TaskLeaseItem(key=self.key, value=json.dumps(item)) for item in items])
+
+    def pop_joined(self):
+        with transaction.atomic():
+            joined = list(models.TaskLeaseItem.objects.select_for_update().filter(key=self.key).order_by('pk'))
+            models.TaskLeaseItem.objects.filter(pk__in=[item.pk for item in joined]).delete()
+        return [json.loads(item.value) for item in joined]
+
+    def has_joined(self):
+        return models.TaskLeaseItem.objects.filter(key=self.key).exists()
+
+
+def singleflight(key_format, timeout=None):
+    """
+    Skip runs of the decorated function overlapping with an in-flight run for the same entity.
+
+    Intended for pulls: the in-flight run brings the entity up to date anyway,
+    so the skipped one just joins it instead of duplicating backend calls.
+
+    :param key_format: identifies the entity, formatted with function arguments, e.g. 'cloud:{0}'
+    :param timeout: number of seconds after which the lease of a dead run expires
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapped(*args, **kwargs):
+            lease = Lease(key_format.format(*args, **kwargs), timeout)
+
+            if not lease.acquire():
+                logger.info('Skipping %s of %s, it is already in progress', fn.__name__, lease.key)
+                return
+
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                lease.release()
+
+        return wrapped
+    return decorator
@@ -0,0 +1,138 @@
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+import mock
+
+from nodeconductor.core import cassettes
+
+
+class FakeResource(object):
+    def __init__(self, info):
+        self._info = info
+        for key, value in info.items():
+            setattr(self, key, value)
+
+
+class FakeServer(FakeResource):
+    def get_console_output(self, length=None):
+        return 'console'
+
+
+class FakeError(Exception):
+    pass
+
+
+class FakeClientError(Exception):
+    # Client exceptions are built from keyword arguments, like novaclient ones
+    def __init__(self, code, message=None):
+        super(FakeClientError, self).__init__()
+        self.code = code
+        self.message = message
+
+
+class CassettesTest(SimpleTestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        cassettes.reset_cassettes()
+
+        self.client = mock.Mock()
+        self.client.servers.list.return_value = [FakeResource({'id': '1', 'status': 'ACTIVE'})]
+        self.client.servers.get.side_effect = FakeError('Not found')
+        self.client.servers.find.return_value = FakeServer({'id': '1', 'status': 'ACTIVE'})
+        self.client.servers.delete.side_effect = FakeClientError(409, message='Conflict')
+        self.client.list_networks.return_value = {'networks': [{'id': 'net'}]}
+
+    def tearDown(self):
+        cassettes.reset_cassettes()
+        shutil.rmtree(self.path)
+
+    def use_cassette(self, mode, scope='tenant', speed=0):
+        with override_settings(NODECONDUCTOR={'CASSETTES': {'MODE': mode, 'PATH': self.path, 'SPEED': speed}}):
+            return cassettes.use_cassette('nova', scope, lambda: self.client)
+
+    def record(self):
+        client = self.use_cassette(cassettes.RECORD)
+        client.servers.list(search_opts={'all_tenants': 1})
+        client.list_networks(name='net')
+        with self.assertRaises(FakeError):
+            client.servers.get('2')
+        with self.assertRaises(FakeClientError):
+            client.servers.delete('1')
+        client.servers.find(name='vm').get_console_output(length=10)
+        cassettes.reset_cassettes()
+
+    def test_client_is_not_wrapped_if_cassettes_are_disabled(self):
+        self.assertIs(self.use_cassette(None), self.client)
+
+    def test_recorded_calls_are_passed_through(self):
+        client = self.use_cassette(cassettes.RECORD)
+
+        servers = client.servers.list()
+
+        self.assertEqual(servers, self.client.servers.list.return_value)
+
+    def test_recorded_results_are_replayed(self):
+        self.record()
+
+        client = self.use_cassette(cassettes.REPLAY)
+        servers = client.servers.list(search_opts={'all_tenants': 1})
+        networks = client.list_networks(name='net')
+
+        self.assertEqual([(s.id, s.status) for s in servers], [('1', 'ACTIVE')])
+        self.assertEqual(networks, {'networks': [{'id': 'net'}]})
+
+    def test_recorded_exceptions_are_replayed(self):
+        self.record()
+
+        client = self.use_cassette(cassettes.REPLAY)
+
+        with self.assertRaises(FakeError):
+            client.servers.get('2')
+
+    def test_recorded_exceptions_built_from_keyword_arguments_are_replayed(self):
+        self.record()
+
+        client = self.use_cassette(cassettes.REPLAY)
+
+        with self.assertRaises(FakeClientError) as context:
+            client.servers.delete('1')
+        self.assertEqual((context.exception.code, context.exception.message), (409, 'Conflict'))
+
+    def test_recorded_calls_of_resource_methods_are_replayed(self):
+        self.record()
+
+        client = self.use_cassette(cassettes.REPLAY)
+        server = client.servers.find(name='vm')
+
+        self.assertEqual(server.get_console_output(length=10), 'console')
+        with self.assertRaises(AttributeError):
+            server.add_floating_ip('1.2.3.4')
+
+    def test_calls_with_different_arguments_fall_back_to_recorded_path(self):
+        self.record()
+
+        client = self.use_cassette(cassettes.REPLAY, scope='other')
+        servers = client.servers.list(search_opts={'changes-since': '2015-01-01T00:00:00'})
+
+        self.assertEqual(len(servers), 1)
+
+    def test_unknown_calls_fail(self):
+        self.record()
+
+        client = self.use_cassette(cassettes.REPLAY)
+
+        with self.assertRaises(cassettes.CassetteError):
+            client.flavors.list()
+
+    def test_replay_pauses_for_recorded_duration(self):
+        self.record()
+
+        client = self.use_cassette(cassettes.REPLAY, speed=10)
+        with mock.patch('nodeconductor.core.cassettes.time.sleep') as sleep:
+            client.list_networks(name='net')
+
+        self.assertTrue(sleep.called)
@@ -0,0 +1,70 @@
+from __future__ import unicode_literals
+
+from celery.signals import celeryd_init
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from nodeconductor.server.celery import app, get_worker_prefetch_multiplier
+
+
+class TaskRoutingTest(SimpleTestCase):
+    def get_queue(self, task_name):
+        return app.amqp.router.route({}, task_name)['queue'].name
+
+    def test_instance_lifecycle_tasks_are_routed_to_interactive_queue(self):
+        self.assertEqual(self.get_queue('nodeconductor.iaas.tasks.schedule_starting'), 'interactive')
+        self.assertEqual(self.get_queue('nodeconductor.iaas.tasks.poll_provisioning'), 'interactive')
+
+    def test_periodic_pulls_are_routed_to_sync_queue(self):
+        self.assertEqual(self.get_queue('nodeconductor.iaas.tasks.pull_cloud_memberships'), 'sync')
+
+    def test_unknown_tasks_are_routed_to_default_queue(self):
+        self.assertEqual(self.get_queue('nodeconductor.unknown.tasks.task'), 'celery')
+
+    def test_all_routed_tasks_are_registered(self):
+        app.loader.import_default_modules()
+
+        for task_name in settings.CELERY_ROUTES:
+            self.assertIn(task_name, app.tasks)
+
+
+class WorkerPrefetchMultiplierTest(SimpleTestCase):
+    def test_worker_consuming_several_queues_gets_smallest_multiplier(self):
+        self.assertEqual(get_worker_prefetch_multiplier(['interactive', 'monitoring']), 1)
+
+    def test_worker_consuming_only_background_queue_gets_its_multiplier(self):
+        self.assertEqual(get_worker_prefetch_multiplier(['monitoring']), 4)
+
+    @override_settings(NODECONDUCTOR={'WORKER_PREFETCH_MULTIPLIERS': {'monitoring': 8}})
+    def test_multipliers_are_configurable(self):
+        self.assertEqual(get_worker_prefetch_multiplier(['monitoring']), 8)
+
+    def test_worker_consuming_unknown_queue_keeps_default_multiplier(self):
+        self.assertIsNone(get_worker_prefetch_multiplier(['celery']))
+
+
+class WorkerConfigurationTest(SimpleTestCase):
+    def setUp(self):
+        self.conf = app.conf
+        self.original_multiplier = self.conf.CELERYD_PREFETCH_MULTIPLIER
+
+    def tearDown(self):
+        self.conf.CELERYD_PREFETCH_MULTIPLIER = self.original_multiplier
+
+    def start_worker(self, **options):
+        celeryd_init.send(sender='worker.example.com', instance=None, conf=self.conf, options=options)
+        # Worker reads the multiplier from conf unless it has been passed explicitly
+        return self.conf.find_value_for_key('prefetch_multiplier', namespace='celeryd')
+
+    def test_worker_gets_multiplier_of_queues_it_consumes(self):
+        self.assertEqual(self.start_worker(queues='backup,monitoring'), 1)
+        self.assertEqual(self.start_worker(queues=['monitoring']), 4)
+
+    def test_worker_consuming_unknown_queue_keeps_configured_multiplier(self):
+        self.conf.CELERYD_PREFETCH_MULTIPLIER = 2
+        self.assertEqual(self.start_worker(queues='celery'), 2)
+
+    def test_explicit_multiplier_is_not_overridden(self):
+        self.start_worker(queues='monitoring', prefetch_multiplier=8)
+        self.assertEqual(self.conf.CELERYD_PREFETCH_MULTIPLIER, self.original_multiplier)
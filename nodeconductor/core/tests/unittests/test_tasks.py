@@ -0,0 +1,117 @@
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from nodeconductor.core.models import TaskLease
+from nodeconductor.core.tasks import set_state, set_states, singleflight, Lease, StateChangeError
+from nodeconductor.iaas.models import Instance
+from nodeconductor.iaas.tests import factories
+
+
+class SetStateTest(TransactionTestCase):
+    def setUp(self):
+        self.instance = factories.InstanceFactory(state=Instance.States.ONLINE)
+
+    def get_state(self, instance):
+        return Instance.objects.get(pk=instance.pk).state
+
+    def test_state_is_changed_with_single_query(self):
+        # Populate cached transition metadata
+        set_state(Instance, factories.InstanceFactory(state=Instance.States.ONLINE).uuid, 'schedule_stopping')
+
+        with self.assertNumQueries(1):
+            set_state(Instance, self.instance.uuid, 'schedule_stopping')
+
+        self.assertEqual(self.get_state(self.instance), Instance.States.STOPPING_SCHEDULED)
+
+    def test_transition_from_any_state_is_performed(self):
+        set_state(Instance, self.instance.uuid, 'set_erred')
+
+        self.assertEqual(self.get_state(self.instance), Instance.States.ERRED)
+
+    def test_transition_from_other_state_is_not_allowed(self):
+        with self.assertRaises(StateChangeError):
+            set_state(Instance, self.instance.uuid, 'begin_stopping')
+
+        self.assertEqual(self.get_state(self.instance), Instance.States.ONLINE)
+
+    def test_missing_instance_cannot_change_state(self):
+        uuid = self.instance.uuid
+        self.instance.delete()
+
+        with self.assertRaises(StateChangeError):
+            set_state(Instance, uuid, 'schedule_stopping')
+
+    def test_many_instances_are_changed_skipping_the_ones_not_allowed(self):
+        offline_instance = factories.InstanceFactory(state=Instance.States.OFFLINE)
+
+        changed_uuids = set_states(Instance, [self.instance.uuid, offline_instance.uuid], 'schedule_stopping')
+
+        self.assertEqual(changed_uuids, [self.instance.uuid])
+        self.assertEqual(self.get_state(self.instance), Instance.States.STOPPING_SCHEDULED)
+        self.assertEqual(self.get_state(offline_instance), Instance.States.OFFLINE)
+
+
+class LeaseTest(TestCase):
+    def test_lease_is_exclusive_until_released(self):
+        lease = Lease('entity:1')
+        other_lease = Lease('entity:1')
+
+        self.assertTrue(lease.acquire())
+        self.assertFalse(other_lease.acquire())
+
+        lease.release()
+        self.assertTrue(other_lease.acquire())
+
+    def test_expired_lease_is_not_released_by_its_former_holder(self):
+        lease = Lease('entity:1')
+        lease.acquire()
+        # Simulate expiration of the lease
+        TaskLease.objects.filter(key=lease.key).update(expires_at=timezone.now())
+
+        other_lease = Lease('entity:1')
+        other_lease.acquire()
+        lease.release()
+
+        self.assertFalse(Lease('entity:1').acquire())
+
+    def test_lease_is_exclusive_until_it_expires(self):
+        lease = Lease('entity:1', timeout=60)
+        lease.acquire()
+        other_lease = Lease('entity:1')
+
+        self.assertFalse(other_lease.acquire())
+
+        TaskLease.objects.filter(key=lease.key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(other_lease.acquire())
+
+    def test_joined_items_are_popped_once(self):
+        Lease('entity:1').join([1, 2])
+        Lease('entity:1').join([3])
+
+        lease = Lease('entity:1')
+        self.assertTrue(lease.has_joined())
+        self.assertEqual(lease.pop_joined(), [1, 2, 3])
+        self.assertFalse(lease.has_joined())
+        self.assertEqual(lease.pop_joined(), [])
+
+    def test_overlapping_run_of_the_same_entity_is_skipped(self):
+        calls = []
+
+        @singleflight('entity:{0}')
+        def pull(entity_id, nested=False):
+            calls.append(entity_id)
+            if nested:
+                pull(entity_id)
+                pull(entity_id + 1)
+
+        pull(1, nested=True)
+
+        self.assertEqual(calls, [1, 2])
+
+        # Lease is released once the run is over
+        pull(1)
+        self.assertEqual(calls, [1, 2, 1])
@@ -0,0 +1,152 @@
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+import mock
+
+from nodeconductor.core import tracing
+
+
+class FakeServer(object):
+    def __init__(self, info):
+        self._info = info
+
+    def reboot(self):
+        return None
+
+
+class FailedCall(Exception):
+    def __init__(self, code):
+        super(FailedCall, self).__init__(code)
+        self.code = code
+
+
+@override_settings(NODECONDUCTOR={'BACKEND_TRACING': {'ENABLED': True, 'PUBLISH_INTERVAL': 0}})
+class TracingTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        tracing.registry = tracing.CallStatsRegistry()
+
+        self.client = mock.Mock()
+        self.client.servers.list.return_value = [{'id': '1'}, {'id': '2'}]
+        self.client.servers.get.side_effect = FailedCall(404)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_stats(self, path):
+        return tracing.get_published_stats()[('nova', path, 'http://example.com')]
+
+    def trace_client(self):
+        return tracing.trace_client('nova', self.client, cloud='http://example.com', tenant='tenant')
+
+    def test_client_is_not_wrapped_if_tracing_is_disabled(self):
+        with override_settings(NODECONDUCTOR={}):
+            self.assertIs(tracing.trace_client('nova', self.client), self.client)
+
+    def test_calls_are_aggregated_per_method(self):
+        client = self.trace_client()
+
+        client.servers.list()
+        client.servers.list()
+
+        stats = self.get_stats('servers.list')
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(sum(stats.buckets), 2)
+        self.assertEqual(stats.items, 4)
+        self.assertEqual(dict(stats.statuses), {'ok': 2})
+
+    def test_failed_calls_are_traced_by_status(self):
+        client = self.trace_client()
+
+        with self.assertRaises(FailedCall):
+            client.servers.get('1')
+
+        self.assertEqual(dict(self.get_stats('servers.get').statuses), {'404': 1})
+
+    def test_calls_are_counted_per_task_run(self):
+        client = self.trace_client()
+
+        for task_id in ('run1', 'run2'):
+            with mock.patch('nodeconductor.core.tracing._get_current_task', return_value=('pull', task_id)):
+                for _ in range(3):
+                    client.servers.list()
+
+        stats = self.get_stats('servers.list')
+        self.assertEqual(stats.tasks['pull'], 6)
+        self.assertEqual(stats.task_runs['pull'], 2)
+
+    def test_calls_are_broken_down_per_tenant(self):
+        self.trace_client().servers.list()
+        tracing.trace_client('nova', self.client, cloud='http://example.com', tenant='other').servers.list()
+        self.trace_client().servers.list()
+
+        stats = self.get_stats('servers.list')
+        self.assertEqual(dict(stats.tenants), {'tenant': 2, 'other': 1})
+        self.assertEqual(sorted(stats.tenant_times), ['other', 'tenant'])
+
+    def test_payload_size_is_not_measured_by_default(self):
+        with mock.patch('nodeconductor.core.tracing._get_payload_size') as mocked_get_payload_size:
+            self.trace_client().servers.list()
+
+        self.assertFalse(mocked_get_payload_size.called)
+        self.assertEqual(self.get_stats('servers.list').items, 2)
+
+    def test_calls_made_without_client_are_traced(self):
+        token = tracing.trace_call('keystone', 'get_token', lambda: 'token', cloud='http://example.com')
+
+        self.assertEqual(token, 'token')
+        self.assertEqual(tracing.get_published_stats()[('keystone', 'get_token', 'http://example.com')].count, 1)
+
+    def test_calls_of_returned_resource_methods_are_traced(self):
+        self.client.servers.find.return_value = FakeServer({'id': '1'})
+        client = self.trace_client()
+
+        client.servers.find(name='vm').reboot()
+
+        self.assertEqual(self.get_stats('servers.find().reboot').count, 1)
+
+    def test_stats_are_published_outside_of_lock(self):
+        client = self.trace_client()
+
+        def check_lock_is_released(*args, **kwargs):
+            self.assertFalse(tracing.registry._lock.locked())
+
+        with mock.patch('nodeconductor.core.tracing.cache.set', side_effect=check_lock_is_released) as cache_set:
+            client.servers.list()
+
+        self.assertTrue(cache_set.called)
+
+    def test_stats_published_by_processes_are_merged(self):
+        client = self.trace_client()
+        client.servers.list()
+
+        # Another process publishes under its own slot
+        tracing.registry = tracing.CallStatsRegistry()
+        client.servers.list()
+
+        self.assertEqual(self.get_stats('servers.list').count, 2)
+
+    def test_reset_drops_published_stats(self):
+        client = self.trace_client()
+        client.servers.list()
+
+        tracing.reset_published_stats()
+
+        self.assertEqual(tracing.get_published_stats(), {})
+
+        # Collected statistics are dropped by the process on next publication
+        client.servers.list()
+        client.servers.list()
+        self.assertEqual(self.get_stats('servers.list').count, 1)
+
+    def test_management_command_prints_stats(self):
+        self.trace_client().servers.list()
+
+        output = StringIO()
+        call_command('backend_call_stats', stdout=output)
+
+        self.assertIn('nova.servers.list', output.getvalue())
@@ -0,0 +1,334 @@
+"""
+Tracing of calls made through external API clients.
+
+Every call made through a traced client, e.g. ``nova.servers.list()``,
+is timed and aggregated into in-process latency histograms per service and method,
+along with its outcome, payload size, the tenant and the Celery task it was made from.
+
+Processes periodically publish their statistics into Django cache,
+use ``backend_call_stats`` management command to inspect them.
+
+Tracing is configured with BACKEND_TRACING setting, see install guide.
+"""
+from __future__ import unicode_literals
+
+from collections import defaultdict
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+from celery import current_task
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import six
+
+from nodeconductor.core.cassettes import serialize_result
+from nodeconductor.core.proxies import CallInterceptingProxy
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+_CACHE_KEY_PREFIX = 'nodeconductor:core:tracing'
+_SLOTS_CACHE_KEY = _CACHE_KEY_PREFIX + ':slots'
+_GENERATION_CACHE_KEY = _CACHE_KEY_PREFIX + ':generation'
+_SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+
+def _get_tracing_settings():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    defaults = {
+        'ENABLED': False,
+        'PAYLOAD_SIZE': False,
+        'PUBLISH_INTERVAL': 10,
+        'SLOW_CALL_THRESHOLD': 5,
+    }
+    defaults.update(nc_settings.get('BACKEND_TRACING', {}))
+    return defaults
+
+
+def trace_client(service, client, **tags):
+    """
+    Return client of the service tracing its calls if tracing is enabled.
+
+    :param tags: describe the calls made through the client, e.g. cloud and tenant
+    """
+    tracing_settings = _get_tracing_settings()
+    if not tracing_settings['ENABLED']:
+        return client
+    return CallInterceptingProxy(client, CallTracer(service, tags, tracing_settings))
+
+
+def trace_call(service, path, func, **tags):
+    """
+    Call func tracing it as a call of the service if tracing is enabled,
+    e.g. signing in that is not made through a client.
+    """
+    tracing_settings = _get_tracing_settings()
+    if not tracing_settings['ENABLED']:
+        return func()
+    return CallTracer(service, tags, tracing_settings)(path, func, (), {})
+
+
+def _get_current_task():
+    if not current_task or current_task.request.id is None:
+        return None, None
+    return current_task.name, current_task.request.id
+
+
+def _get_item_count(result):
+    if isinstance(result, dict) and len(result) == 1:
+        # Neutron wraps listings, e.g. {'networks': [...]}
+        result = next(iter(result.values()))
+    return len(result) if isinstance(result, (list, tuple)) else 1
+
+
+def _get_payload_size(result):
+    """
+    Return approximate size of the payload in bytes, it takes serializing the whole payload.
+    """
+    try:
+        return len(json.dumps(serialize_result(result), separators=(',', ':')))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _get_status(exception):
+    if exception is None:
+        return 'ok'
+
+    for attr in ('code', 'http_status', 'status_code'):
+        code = getattr(exception, attr, None)
+        if isinstance(code, six.integer_types):
+            return six.text_type(code)
+
+    return exception.__class__.__name__
+
+
+class CallStats(object):
+    """
+    Latency histogram and totals of calls of a single method.
+    """
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.statuses = defaultdict(int)
+        self.items = 0
+        self.size = 0
+        self.tasks = defaultdict(int)
+        self.task_runs = defaultdict(int)
+        self.tenants = defaultdict(int)
+        self.tenant_times = defaultdict(float)
+        self._last_task_ids = {}
+
+    def add(self, duration, status, items, size, task_name, task_id, tenant):
+        self.buckets[bisect.bisect_left(BUCKETS, duration)] += 1
+        self.count += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.statuses[status] += 1
+        self.items += items
+        self.size += size
+
+        if task_name is not None:
+            # Calls per task run reveal N+1 patterns
+            self.tasks[task_name] += 1
+            if self._last_task_ids.get(task_name) != task_id:
+                self._last_task_ids[task_name] = task_id
+                self.task_runs[task_name] += 1
+
+        if tenant is not None:
+            # Busiest and slowest tenants stand out of the totals
+            self.tenants[tenant] += 1
+            self.tenant_times[tenant] += duration
+
+    def merge(self, data):
+        self.buckets = [a + b for a, b in zip(self.buckets, data['buckets'])]
+        self.count += data['count']
+        self.total_time += data['total_time']
+        self.max_time = max(self.max_time, data['max_time'])
+        self.items += data['items']
+        self.size += data['size']
+        for status, count in data['statuses'].items():
+            self.statuses[status] += count
+        for task_name, count in data['tasks'].items():
+            self.tasks[task_name] += count
+        for task_name, count in data['task_runs'].items():
+            self.task_runs[task_name] += count
+        for tenant, count in data['tenants'].items():
+            self.tenants[tenant] += count
+        for tenant, total_time in data['tenant_times'].items():
+            self.tenant_times[tenant] += total_time
+
+    def to_dict(self):
+        return {
+            'buckets': self.buckets,
+            'count': self.count,
+            'total_time': self.total_time,
+            'max_time': self.max_time,
+            'statuses': dict(self.statuses),
+            'items': self.items,
+            'size': self.size,
+            'tasks': dict(self.tasks),
+            'task_runs': dict(self.task_runs),
+            'tenants': dict(self.tenants),
+            'tenant_times': dict(self.tenant_times),
+        }
+
+    def get_percentile(self, percentile):
+        """
+        Return upper bound of the bucket the percentile of durations falls into.
+        """
+        threshold = self.count * percentile / 100.0
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= threshold:
+                return min(bound, self.max_time)
+        return self.max_time
+
+
+class CallStatsRegistry(object):
+    """
+    Statistics of calls made by the current process.
+
+    Every process publishes its statistics under its own slot, slots are numbered
+    by an atomic cache counter, so that processes never update the same cache key.
+    Cache is not accessed while the lock is held, traced calls do not wait for publication.
+    """
+    def __init__(self):
+        self.stats = defaultdict(CallStats)
+        self.generation = None
+        self._lock = threading.Lock()
+        self._published_at = 0
+        self._slot = None
+        self._slot_pid = None
+        self._slot_lock = threading.Lock()
+
+    def add(self, key, duration, status, items, size, task_name, task_id, tenant, publish_interval):
+        with self._lock:
+            self.stats[key].add(duration, status, items, size, task_name, task_id, tenant)
+
+            is_due = time.time() - self._published_at >= publish_interval
+            if is_due:
+                # Claim the publication, so that concurrent calls do not publish too
+                self._published_at = time.time()
+
+        if is_due:
+            self.publish()
+
+    def publish(self):
+        generation = cache.get(_GENERATION_CACHE_KEY, 0)
+
+        with self._lock:
+            self._published_at = time.time()
+
+            if self.generation is None:
+                self.generation = generation
+            elif generation != self.generation:
+                # Statistics have been reset since the last publication
+                self.generation = generation
+                self.stats.clear()
+                return
+
+            snapshot = {
+                'generation': generation,
+                'stats': [(list(key), stats.to_dict()) for key, stats in self.stats.items()],
+            }
+
+        cache.set(self._get_snapshot_cache_key(), snapshot, _SNAPSHOT_TIMEOUT)
+
+    def _get_snapshot_cache_key(self):
+        with self._slot_lock:
+            # Forked worker processes inherit the slot of their parent
+            if self._slot_pid != os.getpid():
+                cache.add(_SLOTS_CACHE_KEY, 0, None)
+                self._slot = cache.incr(_SLOTS_CACHE_KEY)
+                self._slot_pid = os.getpid()
+            return _get_snapshot_cache_key(self._slot)
+
+
+def _get_snapshot_cache_key(slot):
+    return '%s:snapshot:%d' % (_CACHE_KEY_PREFIX, slot)
+
+
+registry = CallStatsRegistry()
+
+
+def _get_published_snapshot_cache_keys():
+    slots = cache.get(_SLOTS_CACHE_KEY, 0)
+    return [_get_snapshot_cache_key(slot) for slot in range(1, slots + 1)]
+
+
+def get_published_stats():
+    """
+    Merge statistics published by all the processes.
+
+    :returns: map of (service, method, cloud) tuples to CallStats
+    """
+    generation = cache.get(_GENERATION_CACHE_KEY, 0)
+
+    merged = defaultdict(CallStats)
+    for snapshot in cache.get_many(_get_published_snapshot_cache_keys()).values():
+        if snapshot['generation'] != generation:
+            continue
+        for key, data in snapshot['stats']:
+            merged[tuple(key)].merge(data)
+
+    return merged
+
+
+def reset_published_stats():
+    """
+    Drop published statistics and make every process start collecting from scratch.
+    """
+    cache.add(_GENERATION_CACHE_KEY, 0, None)
+    cache.incr(_GENERATION_CACHE_KEY)
+    # Slots are kept, running processes keep publishing under theirs
+    cache.delete_many(_get_published_snapshot_cache_keys())
+
+
+class CallTracer(object):
+    """
+    Trace calls made through a client of the service, it is the hook of the client proxy.
+    """
+    def __init__(self, service, tags, tracing_settings):
+        self._service = service
+        self._tags = tags
+        self._settings = tracing_settings
+
+    def __call__(self, path, func, args, kwargs):
+        start = time.time()
+        exception = None
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            exception = e
+            raise
+        finally:
+            self._trace(path, time.time() - start, result, exception)
+
+    def _trace(self, path, duration, result, exception):
+        status = _get_status(exception)
+        items = _get_item_count(result)
+        size = _get_payload_size(result) if self._settings['PAYLOAD_SIZE'] else 0
+        task_name, task_id = _get_current_task()
+
+        if duration >= self._settings['SLOW_CALL_THRESHOLD']:
+            logger.warning('Slow call %s.%s of %s took %.2fs within task %s (%s)',
+                           self._service, path, self._tags, duration, task_name, task_id)
+        else:
+            logger.debug('Call %s.%s of %s took %.3fs within task %s (%s)',
+                         self._service, path, self._tags, duration, task_name, task_id)
+
+        key = (self._service, path, self._tags.get('cloud'))
+        registry.add(key, duration, status, items, size, task_name, task_id, self._tags.get('tenant'),
+                     self._settings['PUBLISH_INTERVAL'])
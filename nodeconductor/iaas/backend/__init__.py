@@ -6,6 +6,15 @@ class CloudBackendError(Exception):
     pass
 
 
+class CloudUnavailableError(CloudBackendError):
+    """
+    Exception raised instead of calling a cloud that is busy or keeps failing.
+
+    Nothing has been requested from the cloud, the call can be retried later.
+    """
+    pass
+
+
 class CloudBackendInternalError(Exception):
     """
     Exception for errors in helpers.
@@ -31,5 +40,8 @@ class AbstractCloudBackend(object):
     def push_ssh_public_key(self, membership, public_key):
         raise NotImplementedError()
 
+    def push_ssh_public_keys(self, membership, public_keys, prune=False):
+        raise NotImplementedError()
+
     def pull_flavors(self, membership):
         raise NotImplementedError()
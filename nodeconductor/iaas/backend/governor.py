@@ -0,0 +1,214 @@
+from __future__ import unicode_literals
+
+from contextlib import contextmanager
+import hashlib
+import logging
+import random
+import socket
+import time
+
+from cinderclient import exceptions as cinder_exceptions
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import six
+from glanceclient import exc as glance_exceptions
+from keystoneclient import exceptions as keystone_exceptions
+from neutronclient.client import exceptions as neutron_exceptions
+from novaclient import exceptions as nova_exceptions
+import requests
+
+from nodeconductor.core.proxies import CallInterceptingProxy
+from nodeconductor.iaas.backend import CloudUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Errors of reaching the cloud as opposed to errors of the request itself
+TRANSPORT_ERRORS = (
+    socket.error,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    cinder_exceptions.ConnectionError,
+    glance_exceptions.CommunicationError,
+    keystone_exceptions.ConnectionRefused,
+    neutron_exceptions.ConnectionFailed,
+    nova_exceptions.ConnectionRefused,
+)
+
+
+def _get_governor_settings():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    defaults = {
+        'CONCURRENCY': 10,
+        'WAIT_TIMEOUT': 30,
+        'LEASE_TIMEOUT': 5 * 60,
+        'FAILURE_THRESHOLD': 5,
+        'RECOVERY_TIMEOUT': 60,
+    }
+    defaults.update(nc_settings.get('CLOUD_GOVERNOR', {}))
+    return defaults
+
+
+def _get_http_status(exception):
+    # Clients keep status under different names, e.g. novaclient under code, keystoneclient under http_status
+    for attr in ('code', 'http_status', 'status_code'):
+        status = getattr(exception, attr, None)
+        if isinstance(status, six.integer_types) and status > 0:
+            return status
+    return None
+
+
+def is_cloud_failure(exception):
+    """
+    Return True if the exception means that the cloud itself is failing,
+    i.e. it is a transport error, a timeout or a server error.
+
+    Client errors, such as failed authentication of a tenant, are not failures of the cloud.
+    """
+    if isinstance(exception, TRANSPORT_ERRORS):
+        return True
+
+    status = _get_http_status(exception)
+    return status is not None and (status >= 500 or status == 408)
+
+
+def govern_client(client, auth_url):
+    """
+    Return client making every call through the governor of the cloud.
+    """
+    governor = CloudGovernor(auth_url)
+    return CallInterceptingProxy(client, lambda path, func, args, kwargs: governor.call(func, *args, **kwargs))
+
+
+class CloudGovernor(object):
+    """
+    Limit concurrent calls to a cloud and stop calling it while it keeps failing.
+
+    At most CONCURRENCY calls to a cloud, identified by its auth_url, can be made
+    at the same time by all the processes sharing Django cache. A call waits
+    at most WAIT_TIMEOUT seconds for a free slot, tasks are expected to retry later
+    if it does not get one.
+
+    The circuit breaker opens once FAILURE_THRESHOLD consecutive calls fail
+    because of the cloud itself, see is_cloud_failure(). Calls fail fast while
+    the circuit is open. After RECOVERY_TIMEOUT seconds a single probe call is let through:
+    the circuit closes if the cloud responds and opens again otherwise.
+    """
+    def __init__(self, auth_url):
+        self.auth_url = auth_url
+        self.settings = _get_governor_settings()
+        self._cache_key_prefix = 'nodeconductor:iaas:cloud_governor:%s' % (
+            hashlib.sha1(auth_url.encode('utf-8')).hexdigest())
+
+    def is_open(self):
+        """
+        Return True if the circuit is open, i.e. the cloud should not be accessed for now.
+        """
+        return cache.get(self._get_cache_key('open')) is not None
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call the cloud holding a slot of it.
+
+        :raises CloudUnavailableError: if the circuit is open or no slot became free in time
+        """
+        with self.access():
+            return func(*args, **kwargs)
+
+    @contextmanager
+    def access(self):
+        """
+        Hold a slot of the cloud and track the outcome of the call made within the context.
+
+        :raises CloudUnavailableError: if the circuit is open or no slot became free in time
+        """
+        is_probe = self._check_circuit()
+        try:
+            slot_key = self._acquire_slot()
+        except CloudUnavailableError:
+            if is_probe:
+                cache.delete(self._get_cache_key('probe'))
+            raise
+
+        try:
+            yield
+        except Exception as e:
+            if is_cloud_failure(e):
+                self._record_failure(is_probe)
+            elif _get_http_status(e) is not None:
+                # Cloud has responded, it is the request that has failed
+                self._record_success(is_probe)
+            elif is_probe:
+                # Call has failed before reaching the cloud, let another one probe it
+                cache.delete(self._get_cache_key('probe'))
+            raise
+        else:
+            self._record_success(is_probe)
+        finally:
+            cache.delete(slot_key)
+
+    def _get_cache_key(self, name):
+        return '%s:%s' % (self._cache_key_prefix, name)
+
+    def _check_circuit(self):
+        """
+        Fail fast unless the circuit is closed or this call is the probe of the half-open circuit.
+
+        :returns: True if this call is the probe
+        """
+        if self.is_open():
+            raise CloudUnavailableError('Cloud %s is unavailable, access is suspended' % self.auth_url)
+
+        if cache.get(self._get_cache_key('tripped')) is None:
+            return False
+
+        # Circuit is half-open, let a single probe through
+        if not cache.add(self._get_cache_key('probe'), True, self.settings['LEASE_TIMEOUT']):
+            raise CloudUnavailableError('Cloud %s is unavailable, recovery is being probed' % self.auth_url)
+
+        logger.info('Probing recovery of cloud %s', self.auth_url)
+        return True
+
+    def _acquire_slot(self):
+        concurrency = self.settings['CONCURRENCY']
+        # Start from a random slot, so that concurrent callers do not contend for the first ones
+        offset = random.randrange(concurrency)
+        slot_keys = [self._get_cache_key('slot:%d' % ((offset + i) % concurrency)) for i in range(concurrency)]
+        deadline = time.time() + self.settings['WAIT_TIMEOUT']
+
+        # Slots are leased in case their holders die
+        while True:
+            for slot_key in slot_keys:
+                if cache.add(slot_key, True, self.settings['LEASE_TIMEOUT']):
+                    return slot_key
+
+            # Slots are held for a single call, waiting is bounded and short
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise CloudUnavailableError('Timed out waiting for a free slot of cloud %s' % self.auth_url)
+
+            time.sleep(min(random.uniform(0.05, 0.2), remaining))
+
+    def _record_failure(self, is_probe):
+        failures_key = self._get_cache_key('failures')
+
+        cache.add(failures_key, 0, None)
+        try:
+            failures = cache.incr(failures_key)
+        except ValueError:
+            # Counter has been reset concurrently
+            failures = 1
+
+        if is_probe or failures >= self.settings['FAILURE_THRESHOLD']:
+            logger.warning('Suspending access to cloud %s after %d consecutive failures', self.auth_url, failures)
+            cache.set(self._get_cache_key('open'), True, self.settings['RECOVERY_TIMEOUT'])
+            cache.set(self._get_cache_key('tripped'), True, None)
+
+        if is_probe:
+            cache.delete(self._get_cache_key('probe'))
+
+    def _record_success(self, is_probe):
+        cache.delete(self._get_cache_key('failures'))
+
+        if is_probe:
+            logger.info('Resuming access to recovered cloud %s', self.auth_url)
+            cache.delete_many([self._get_cache_key('tripped'), self._get_cache_key('probe')])
@@ -1,17 +1,24 @@
 from __future__ import unicode_literals
 
-from collections import OrderedDict
-from itertools import groupby
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+import datetime
+import hashlib
 import logging
+from multiprocessing.pool import ThreadPool
 from operator import itemgetter
 import pkg_resources
+import random
 import re
+import sys
 import time
+import uuid
 
 from cinderclient import exceptions as cinder_exceptions
 from cinderclient.v1 import client as cinder_client
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import transaction, DatabaseError
 from django.db.models import ProtectedError
 from django.utils import dateparse
@@ -20,6 +27,7 @@ from django.utils import timezone
 from django.utils.lru_cache import lru_cache
 from glanceclient import exc as glance_exceptions
 from glanceclient.v1 import client as glance_client
+from keystoneclient import access
 from keystoneclient import exceptions as keystone_exceptions
 from keystoneclient import session as keystone_session
 from keystoneclient.auth.identity import v2
@@ -30,8 +38,10 @@ from neutronclient.v2_0 import client as neutron_client
 from novaclient import exceptions as nova_exceptions
 from novaclient.v1_1 import client as nova_client
 
+from nodeconductor.core import cassettes, tracing
 from nodeconductor.iaas import models
 from nodeconductor.iaas.backend import CloudBackendError, CloudBackendInternalError
+from nodeconductor.iaas.backend.governor import CloudGovernor, govern_client
 
 logger = logging.getLogger(__name__)
 
@@ -60,8 +70,353 @@ def _get_nova_version():
         return '00000002', '00000017', '00000000', '*final'
 
 
+def _get_token_refresh_margin():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    # Cached tokens are refreshed this many seconds before they expire
+    return nc_settings.get('OPENSTACK_TOKEN_REFRESH_MARGIN', 300)
+
+
+def _get_instance_sync_overlap():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    # Incremental syncs look back this many seconds before the high-water mark
+    return nc_settings.get('OPENSTACK_INSTANCE_SYNC_OVERLAP', 60)
+
+
+def _get_resolution_cache_timeout():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    # Provisioning resources resolved by name or fingerprint are reused this many seconds
+    return nc_settings.get('OPENSTACK_RESOLUTION_CACHE_TIMEOUT', 60)
+
+
+def _get_cloud_sweep_max_age():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    # Listings of a cloud sweep are refreshed once they are older than this many seconds
+    return nc_settings.get('OPENSTACK_CLOUD_SWEEP_MAX_AGE', 60)
+
+
+def _get_resolution_scope_cache_key(kind, scope):
+    return 'nodeconductor.iaas.openstack.resolution:%s:%s' % (
+        kind, hashlib.md5(scope.encode('utf-8')).hexdigest())
+
+
+def _get_resolution_cache_key(kind, scope, name):
+    scope_key = _get_resolution_scope_cache_key(kind, scope)
+    # Bumping the generation invalidates all the resolutions within the scope
+    generation = cache.get(scope_key + ':generation', '')
+    return '%s:%s:%s' % (scope_key, generation, hashlib.md5(name.encode('utf-8')).hexdigest())
+
+
+def _invalidate_resolutions(kind, scope):
+    cache.set(_get_resolution_scope_cache_key(kind, scope) + ':generation', uuid.uuid4().hex, None)
+
+
+def _get_token_cache_key(auth_url, username, tenant):
+    raw_key = '{0}|{1}|{2}'.format(auth_url, username, tenant or '')
+    # Keep the key short and safe for memcached-like backends
+    return 'nodeconductor.iaas.openstack.token:%s' % hashlib.md5(raw_key.encode('utf-8')).hexdigest()
+
+
+class OpenStackClients(object):
+    """
+    OpenStack API clients sharing a single keystone session.
+
+    Both session and clients are created lazily on first access
+    and are reused afterwards.
+
+    Traffic of the clients is recorded or replayed if cassettes are enabled,
+    scope identifies the cloud and the tenant the clients operate on.
+
+    Every call of the clients, as well as signing in, is made through
+    the governor of the cloud, see CloudGovernor.
+    """
+    def __init__(self, backend, session_factory, scope):
+        self.backend = backend
+        self.session_factory = session_factory
+        self.scope = scope
+        self.governor = CloudGovernor(scope[0])
+        self._session = None
+        self._clients = {}
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = self.governor.call(self.session_factory)
+        return self._session
+
+    @property
+    def cinder(self):
+        return self._get_client('cinder')
+
+    @property
+    def glance(self):
+        return self._get_client('glance')
+
+    @property
+    def keystone(self):
+        return self._get_client('keystone')
+
+    @property
+    def neutron(self):
+        return self._get_client('neutron')
+
+    @property
+    def nova(self):
+        return self._get_client('nova')
+
+    def _get_client(self, name):
+        try:
+            return self._clients[name]
+        except KeyError:
+            create_client = getattr(self.backend, 'create_%s_client' % name)
+            client = cassettes.use_cassette(name, self.scope, lambda: self._create_client(create_client))
+            auth_url, tenant_id = self.scope
+            client = tracing.trace_client(name, client, cloud=auth_url, tenant=tenant_id)
+            # Calls waiting for a slot of the cloud are neither traced nor recorded
+            client = self._clients[name] = govern_client(client, auth_url)
+            return client
+
+    def _create_client(self, create_client):
+        # Session is created first, it takes a slot of its own
+        session = self.session
+        return self.governor.call(create_client, session)
+
+
+def _group_volumes_by_instance(volumes):
+    volumes_by_instance = defaultdict(list)
+    for volume in volumes:
+        for attachment in getattr(volume, 'attachments', None) or []:
+            volumes_by_instance[attachment['server_id']].append(volume)
+    return volumes_by_instance
+
+
+# Number of resources requested per page, nova caps it by osapi_max_limit which is 1000 by default
+LISTING_PAGE_SIZE = 1000
+
+
+def _list_all_pages(list_page):
+    """
+    Return resources of all the pages of a paginated listing.
+
+    list_page is called with the resources listed so far and returns the next page.
+    Listing stops on a page that has no resources that were not listed yet,
+    so it neither depends on the page size enforced by the server nor loops
+    if the server ignores the pagination parameters.
+    """
+    resources = []
+    listed_ids = set()
+    while True:
+        page = [r for r in list_page(resources) if r.id not in listed_ids]
+        if not page:
+            return resources
+        resources.extend(page)
+        listed_ids.update(r.id for r in page)
+
+
+class OpenStackCloudSweep(object):
+    """
+    Resources of all the tenants of a cloud listed at once using admin clients.
+
+    Every kind of resources is listed lazily on first access and is reused afterwards,
+    until the listing gets older than OPENSTACK_CLOUD_SWEEP_MAX_AGE seconds.
+    Listings are exhaustive, paginated ones are listed page by page.
+    """
+    PAGE_SIZE = LISTING_PAGE_SIZE
+
+    def __init__(self, clients):
+        self.clients = clients
+        self.max_age = _get_cloud_sweep_max_age()
+        self._listings = {}
+
+    @property
+    def flavors(self):
+        return self._get_listing('flavors')
+
+    @property
+    def volumes_by_instance(self):
+        return self._get_listing('volumes_by_instance')
+
+    def get_floating_ips(self, tenant_id):
+        return self._get_listing('floating_ips').get(tenant_id, [])
+
+    def get_security_groups(self, tenant_id):
+        return self._get_listing('security_groups').get(tenant_id, [])
+
+    def get_servers(self, tenant_id):
+        return self._get_listing('servers').get(tenant_id, [])
+
+    def get_volumes(self, tenant_id):
+        return self._get_listing('volumes').get(tenant_id, [])
+
+    @property
+    def servers_listed_at(self):
+        """
+        Moment the servers got listed at, the listing is up to max_age seconds old.
+        """
+        listed_at, _ = self._listings['servers']
+        return timezone.now() - datetime.timedelta(seconds=time.time() - listed_at)
+
+    def _get_listing(self, name):
+        try:
+            listed_at, listing = self._listings[name]
+        except KeyError:
+            pass
+        else:
+            if time.time() - listed_at < self.max_age:
+                return listing
+
+        list_resources = getattr(self, '_list_%s' % name)
+        listed_at = time.time()
+        listing = list_resources()
+        self._listings[name] = listed_at, listing
+        return listing
+
+    def _group_by_tenant(self, resources, get_tenant_id):
+        resources_by_tenant = defaultdict(list)
+        for resource in resources:
+            resources_by_tenant[get_tenant_id(resource)].append(resource)
+        return resources_by_tenant
+
+    def _list_flavors(self):
+        # Private flavors of all the tenants are listed as well
+        return dict((f.id, f) for f in self.clients.nova.flavors.list(is_public=None))
+
+    def _list_floating_ips(self):
+        # Neutron client follows pagination links itself
+        floating_ips = self.clients.neutron.list_floatingips()['floatingips']
+        return self._group_by_tenant(floating_ips, itemgetter('tenant_id'))
+
+    def _list_security_groups(self):
+        security_groups = self.clients.nova.security_groups.list(search_opts={'all_tenants': 1})
+        return self._group_by_tenant(security_groups, lambda g: g.tenant_id)
+
+    def _list_servers(self):
+        servers = _list_all_pages(lambda listed: self.clients.nova.servers.list(
+            search_opts={'all_tenants': 1},
+            marker=listed[-1].id if listed else None,
+            limit=self.PAGE_SIZE,
+        ))
+        return self._group_by_tenant(servers, lambda s: s.tenant_id)
+
+    def _list_volumes(self):
+        # Volumes API v1 pages by offset rather than by marker
+        volumes = _list_all_pages(lambda listed: self.clients.cinder.volumes.list(
+            detailed=True,
+            search_opts={'all_tenants': 1, 'limit': self.PAGE_SIZE, 'offset': len(listed)},
+        ))
+        return self._group_by_tenant(volumes, lambda v: getattr(v, 'os-vol-tenant-attr:tenant_id', None))
+
+    def _list_volumes_by_instance(self):
+        volumes = [v for tenant_volumes in self._get_listing('volumes').values() for v in tenant_volumes]
+        return _group_volumes_by_instance(volumes)
+
+
 # noinspection PyMethodMayBeStatic
 class OpenStackBackend(object):
+    # Server status instance operations complete with, deleted servers have none
+    INSTANCE_OPERATION_STATUSES = {
+        'start': 'ACTIVE',
+        'stop': 'SHUTOFF',
+        'delete': None,
+    }
+
+    def __init__(self):
+        # Clients and sweeps of currently open contexts, see tenant_clients(), admin_clients() and cloud_sweep()
+        self._active_clients = {}
+
+    # Client context methods
+    @contextmanager
+    def tenant_clients(self, membership):
+        """
+        Reuse the same tenant session and clients for all calls made within the context.
+
+        Example:
+
+        .. code-block:: python
+
+            backend = membership.cloud.get_backend()
+            with backend.tenant_clients(membership):
+                backend.pull_security_groups(membership)
+                backend.pull_instances(membership)
+        """
+        clients = self._build_tenant_clients(membership)
+        with self._clients_context(('tenant', membership.pk), clients) as clients:
+            yield clients
+
+    @contextmanager
+    def admin_clients(self, auth_url):
+        """
+        Reuse the same admin session and clients for all calls made within the context.
+        """
+        with self._clients_context(('admin', auth_url), self._build_admin_clients(auth_url)) as clients:
+            yield clients
+
+    @contextmanager
+    def cloud_sweep(self, cloud):
+        """
+        List resources of all the tenants of the cloud at once using admin clients
+        and pull memberships of the cloud from these listings within the context.
+
+        Example:
+
+        .. code-block:: python
+
+            backend = cloud.get_backend()
+            with backend.cloud_sweep(cloud):
+                for membership in cloud.cloudprojectmembership_set.all():
+                    backend.pull_instances(membership)
+                    backend.pull_floating_ips(membership)
+        """
+        sweep = OpenStackCloudSweep(self.get_admin_clients(cloud.auth_url))
+        with self._clients_context(('sweep', cloud.pk), sweep) as sweep:
+            yield sweep
+
+    def get_tenant_clients(self, membership):
+        try:
+            return self._active_clients[('tenant', membership.pk)]
+        except KeyError:
+            return self._build_tenant_clients(membership)
+
+    def get_cloud_sweep(self, membership):
+        return self._active_clients.get(('sweep', membership.cloud_id))
+
+    def get_pull_clients(self, membership):
+        """
+        Return clients for pulling membership's resources.
+
+        Admin clients of the cloud sweep are used within cloud_sweep() context,
+        tenant clients otherwise.
+        """
+        sweep = self.get_cloud_sweep(membership)
+        if sweep is not None:
+            return sweep.clients
+        return self.get_tenant_clients(membership)
+
+    def get_admin_clients(self, auth_url):
+        try:
+            return self._active_clients[('admin', auth_url)]
+        except KeyError:
+            return self._build_admin_clients(auth_url)
+
+    def _build_tenant_clients(self, membership):
+        return OpenStackClients(
+            self, lambda: self.create_tenant_session(membership), (membership.cloud.auth_url, membership.tenant_id))
+
+    def _build_admin_clients(self, auth_url):
+        return OpenStackClients(self, lambda: self.create_admin_session(auth_url), (auth_url, None))
+
+    @contextmanager
+    def _clients_context(self, key, clients):
+        if key in self._active_clients:
+            # Nested context, keep using the outer one
+            yield self._active_clients[key]
+            return
+
+        self._active_clients[key] = clients
+        try:
+            yield clients
+        finally:
+            del self._active_clients[key]
+
     # CloudAccount related methods
     def push_cloud_account(self, cloud_account):
         # There's nothing to push for OpenStack
@@ -72,60 +427,86 @@ class OpenStackBackend(object):
         self.pull_images(cloud_account)
 
     def pull_flavors(self, cloud_account):
-        session = self.create_admin_session(cloud_account.auth_url)
-        nova = self.create_nova_client(session)
+        clients = self.get_admin_clients(cloud_account.auth_url)
+        nova = clients.nova
 
         backend_flavors = nova.flavors.findall(is_public=True)
         backend_flavors = dict(((f.id, f) for f in backend_flavors))
 
-        with transaction.atomic():
-            nc_flavors = cloud_account.flavors.all()
-            nc_flavors = dict(((f.backend_id, f) for f in nc_flavors))
+        nc_flavors = cloud_account.flavors.all()
+        nc_flavors = dict(((f.backend_id, f) for f in nc_flavors))
+
+        backend_ids = set(backend_flavors.keys())
+        nc_ids = set(nc_flavors.keys())
 
-            backend_ids = set(backend_flavors.keys())
-            nc_ids = set(nc_flavors.keys())
+        # Compute changes before touching the database to keep the transaction short
+        stale_flavors = [nc_flavors[flavor_id] for flavor_id in nc_ids - backend_ids]
+
+        new_flavors = [
+            models.Flavor(
+                cloud=cloud_account, backend_id=flavor_id, **self._get_flavor_fields(backend_flavors[flavor_id]))
+            for flavor_id in backend_ids - nc_ids
+        ]
 
+        changed_flavors = []
+        for flavor_id in nc_ids & backend_ids:
+            nc_flavor = nc_flavors[flavor_id]
+            fields = self._get_flavor_fields(backend_flavors[flavor_id])
+            changed_fields = dict(
+                (name, value) for name, value in fields.items() if getattr(nc_flavor, name) != value)
+            if changed_fields:
+                changed_flavors.append((nc_flavor, changed_fields))
+
+        with transaction.atomic():
             # Remove stale flavors, the ones that are not on backend anymore
-            for flavor_id in nc_ids - backend_ids:
-                nc_flavor = nc_flavors[flavor_id]
+            if stale_flavors:
+                self._delete_stale_flavors(stale_flavors)
+
+            # Add new flavors, the ones that are not yet in the database
+            if new_flavors:
+                models.Flavor.objects.bulk_create(new_flavors)
+                for nc_flavor in new_flavors:
+                    logger.info('Created new flavor %s in database', nc_flavor.uuid)
+
+            # Update matching flavors which differ from the ones on backend
+            for nc_flavor, changed_fields in changed_flavors:
+                models.Flavor.objects.filter(pk=nc_flavor.pk).update(**changed_fields)
+                logger.info('Updated existing flavor %s in database', nc_flavor.uuid)
+
+        _invalidate_resolutions('flavors', cloud_account.auth_url)
+
+    def _get_flavor_fields(self, backend_flavor):
+        return {
+            'name': backend_flavor.name,
+            'cores': backend_flavor.vcpus,
+            'ram': self.get_core_ram_size(backend_flavor.ram),
+            'disk': self.get_core_disk_size(backend_flavor.disk),
+        }
+
+    def _delete_stale_flavors(self, stale_flavors):
+        try:
+            with transaction.atomic():
+                models.Flavor.objects.filter(pk__in=[f.pk for f in stale_flavors]).delete()
+        except ProtectedError:
+            # Some of the flavors are in use, delete the others one by one
+            for nc_flavor in stale_flavors:
                 # Delete the flavor that has instances after NC-178 gets implemented.
                 logger.debug('About to delete flavor %s in database', nc_flavor.uuid)
                 try:
-                    nc_flavor.delete()
+                    with transaction.atomic():
+                        nc_flavor.delete()
                 except ProtectedError:
                     logger.info('Skipped deletion of stale flavor %s due to linked instances',
                                 nc_flavor.uuid)
                 else:
                     logger.info('Deleted stale flavor %s in database', nc_flavor.uuid)
-
-            # Add new flavors, the ones that are not yet in the database
-            for flavor_id in backend_ids - nc_ids:
-                backend_flavor = backend_flavors[flavor_id]
-
-                nc_flavor = cloud_account.flavors.create(
-                    name=backend_flavor.name,
-                    cores=backend_flavor.vcpus,
-                    ram=self.get_core_ram_size(backend_flavor.ram),
-                    disk=self.get_core_disk_size(backend_flavor.disk),
-                    backend_id=backend_flavor.id,
-                )
-                logger.info('Created new flavor %s in database', nc_flavor.uuid)
-
-            # Update matching flavors, the ones that exist in both places
-            for flavor_id in nc_ids & backend_ids:
-                nc_flavor = nc_flavors[flavor_id]
-                backend_flavor = backend_flavors[flavor_id]
-
-                nc_flavor.name = backend_flavor.name
-                nc_flavor.cores = backend_flavor.vcpus
-                nc_flavor.ram = self.get_core_ram_size(backend_flavor.ram)
-                nc_flavor.disk = self.get_core_disk_size(backend_flavor.disk)
-                nc_flavor.save()
-                logger.info('Updated existing flavor %s in database', nc_flavor.uuid)
+        else:
+            for nc_flavor in stale_flavors:
+                logger.info('Deleted stale flavor %s in database', nc_flavor.uuid)
 
     def pull_images(self, cloud_account):
-        session = self.create_admin_session(cloud_account.auth_url)
-        glance = self.create_glance_client(session)
+        clients = self.get_admin_clients(cloud_account.auth_url)
+        glance = clients.glance
 
         backend_images = dict(
             (image.id, image)
@@ -136,78 +517,91 @@ class OpenStackBackend(object):
 
         from nodeconductor.iaas.models import TemplateMapping
 
-        with transaction.atomic():
-            # Add missing images
-            current_image_ids = set()
+        mappings = (
+            TemplateMapping.objects
+            .filter(backend_image_id__in=backend_images.keys())
+            .values_list('template_id', 'backend_image_id')
+        )
 
-            # itertools.groupby requires the iterable to be sorted by key
-            mapping_queryset = (
-                TemplateMapping.objects
-                .filter(backend_image_id__in=backend_images.keys())
-                .order_by('template__pk')
-            )
+        backend_image_ids_by_template = defaultdict(list)
+        for template_id, backend_image_id in mappings:
+            backend_image_ids_by_template[template_id].append(backend_image_id)
 
-            mappings_grouped = groupby(mapping_queryset.iterator(), lambda m: m.template.pk)
+        # Map templates to backend images they are going to be pointing to
+        current_image_ids = {}
+        for template_id, backend_image_ids in backend_image_ids_by_template.items():
+            if len(backend_image_ids) > 1:
+                logger.error(
+                    'Failed to update images for template %s, '
+                    'multiple backend images matched: %s',
+                    template_id, ', '.join(backend_image_ids),
+                )
+            else:
+                current_image_ids[template_id] = backend_image_ids[0]
 
-            for _, mapping_iterator in mappings_grouped:
-                # itertools.groupby shares the iterable,
-                # store mappings in own list
-                mappings = list(mapping_iterator)
-                # At least one mapping is guaranteed to be present
-                mapping = mappings[0]
+        nc_images = dict((image.template_id, image) for image in cloud_account.images.all())
 
-                if len(mappings) > 1:
-                    logger.error(
-                        'Failed to update images for template %s, '
-                        'multiple backend images matched: %s',
-                        mapping.template, ', '.join(m.backend_image_id for m in mappings),
-                    )
-                else:
-                    # XXX: This might fail in READ REPEATED isolation level,
-                    # which is default on MySQL
-                    # see https://docs.djangoproject.com/en/1.6/ref/models/querysets/#django.db.models.query.QuerySet.get_or_create
-                    image, created = cloud_account.images.get_or_create(
-                        template=mapping.template,
-                        defaults={'backend_id': mapping.backend_image_id},
-                    )
+        # Compute changes before touching the database to keep the transaction short
+        stale_images = [image for template_id, image in nc_images.items() if template_id not in current_image_ids]
 
-                    if created:
-                        logger.info('Created image %s pointing to %s in database', image, image.backend_id)
-                    elif image.backend_id != mapping.backend_image_id:
-                        image.backend_id = mapping.backend_image_id
-                        image.save()
-                        logger.info('Updated existing image %s to point to %s in database', image, image.backend_id)
-                    else:
-                        logger.info('Image %s pointing to %s is already up to date', image, image.backend_id)
+        new_images = [
+            models.Image(cloud=cloud_account, template_id=template_id, backend_id=backend_image_id)
+            for template_id, backend_image_id in current_image_ids.items()
+            if template_id not in nc_images
+        ]
 
-                    current_image_ids.add(image.backend_id)
+        changed_images = [
+            (nc_images[template_id], backend_image_id)
+            for template_id, backend_image_id in current_image_ids.items()
+            if template_id in nc_images and nc_images[template_id].backend_id != backend_image_id
+        ]
 
+        with transaction.atomic():
             # Remove stale images,
             # the ones that don't have any template mappings defined for them
+            if stale_images:
+                models.Image.objects.filter(pk__in=[image.pk for image in stale_images]).delete()
+                for image in stale_images:
+                    logger.info('Removed stale image of template %s, was pointing to %s in database',
+                                image.template_id, image.backend_id)
+
+            # Add missing images
+            if new_images:
+                models.Image.objects.bulk_create(new_images)
+                for image in new_images:
+                    logger.info('Created image of template %s pointing to %s in database',
+                                image.template_id, image.backend_id)
+
+            for image, backend_image_id in changed_images:
+                models.Image.objects.filter(pk=image.pk).update(backend_id=backend_image_id)
+                logger.info('Updated existing image of template %s to point to %s in database',
+                            image.template_id, backend_image_id)
 
-            for image in cloud_account.images.exclude(backend_id__in=current_image_ids):
-                image.delete()
-                logger.info('Removed stale image %s, was pointing to %s in database', image, image.backend_id)
+        _invalidate_resolutions('images', cloud_account.auth_url)
 
     # CloudProjectMembership related methods
     def push_membership(self, membership):
         try:
-            session = self.create_admin_session(membership.cloud.auth_url)
+            clients = self.get_admin_clients(membership.cloud.auth_url)
 
-            keystone = self.create_keystone_client(session)
-            neutron = self.create_neutron_client(session)
+            keystone = clients.keystone
+            neutron = clients.neutron
 
             tenant = self.get_or_create_tenant(membership, keystone)
 
             username, password = self.get_or_create_user(membership, keystone)
 
+            if password != membership.password:
+                # Token issued for stale credentials must not be reused
+                self.invalidate_session_token(membership.cloud.auth_url, username, tenant.id)
+
             membership.username = username
             membership.password = password
             membership.tenant_id = tenant.id
 
             self.ensure_user_is_tenant_admin(username, tenant, keystone)
 
-            self.get_or_create_network(membership, neutron)
+            membership.network_id = self.get_or_create_network(membership, neutron)
 
             membership.save()
 
@@ -217,41 +611,71 @@ class OpenStackBackend(object):
             six.reraise(CloudBackendError, e)
 
     def push_ssh_public_key(self, membership, public_key):
-        key_name = self.get_key_name(public_key)
+        self.push_ssh_public_keys(membership, [public_key])
+
+    def push_ssh_public_keys(self, membership, public_keys, prune=False):
+        """
+        Make keypairs of the membership's tenant match the given ssh public keys.
+
+        Keypairs are listed once, only missing keypairs and keypairs with
+        a stale fingerprint are (re)created. If prune is set, keypairs of
+        nodeconductor keys, that are not given, are deleted.
+        """
+        public_keys = dict((self.get_key_name(public_key), public_key) for public_key in public_keys)
 
         try:
-            session = self.create_tenant_session(membership)
-            nova = self.create_nova_client(session)
+            clients = self.get_tenant_clients(membership)
+            nova = clients.nova
 
+            backend_keypairs = dict((keypair.name, keypair) for keypair in nova.keypairs.list())
+        except (nova_exceptions.ClientException, keystone_exceptions.ClientException) as e:
+            logger.exception('Failed to list ssh public keys of CloudProjectMembership with id %s', membership.id)
+            six.reraise(CloudBackendError, e)
+
+        stale_key_names, missing_key_names = self._diff_keypairs(backend_keypairs, public_keys, prune)
+
+        failed_key_names = []
+
+        for key_name in stale_key_names:
             try:
-                # There's no way to edit existing key inplace,
-                # so try to delete existing key with the same name first.
                 nova.keypairs.delete(key_name)
-                logger.info('Deleted stale ssh public key %s from backend', key_name)
             except nova_exceptions.NotFound:
-                # There was no stale key, it's ok
+                # Key has been deleted concurrently, it's ok
                 pass
+            except nova_exceptions.ClientException:
+                logger.exception('Failed to delete stale ssh public key %s from backend', key_name)
+                failed_key_names.append(key_name)
+                # Key can't be recreated with the same name
+                missing_key_names.discard(key_name)
+            else:
+                logger.info('Deleted stale ssh public key %s from backend', key_name)
 
+        for key_name in missing_key_names:
             logger.info('Propagating ssh public key %s to backend', key_name)
-            nova.keypairs.create(name=key_name, public_key=public_key.public_key)
-            logger.info('Successfully propagated ssh public key %s to backend', key_name)
-        except (nova_exceptions.ClientException, keystone_exceptions.ClientException) as e:
-            logger.exception('Failed to propagate ssh public key %s to backend', key_name)
-            six.reraise(CloudBackendError, e)
+            try:
+                nova.keypairs.create(name=key_name, public_key=public_keys[key_name].public_key)
+            except nova_exceptions.ClientException:
+                logger.exception('Failed to propagate ssh public key %s to backend', key_name)
+                failed_key_names.append(key_name)
+            else:
+                logger.info('Successfully propagated ssh public key %s to backend', key_name)
+
+        if stale_key_names or missing_key_names:
+            _invalidate_resolutions('keypairs', self._get_tenant_scope(membership))
+
+        if failed_key_names:
+            raise CloudBackendError('Failed to propagate ssh public keys %s to backend' %
+                                    ', '.join(sorted(failed_key_names)))
 
     def push_security_groups(self, membership):
         try:
-            session = self.create_tenant_session(membership)
-            nova = self.create_nova_client(session)
+            clients = self.get_tenant_clients(membership)
+            nova = clients.nova
         except keystone_exceptions.ClientException as e:
             logger.exception('Failed to create nova client')
             six.reraise(CloudBackendError, e)
 
-        from nodeconductor.iaas.models import SecurityGroup
-
-        nc_security_groups = SecurityGroup.objects.filter(
-            cloud_project_membership=membership,
-        )
+        nc_security_groups, nc_rules_by_group = self._get_membership_security_groups(membership)
 
         try:
             backend_security_groups = dict((str(g.id), g) for g in nova.security_groups.list())
@@ -259,21 +683,8 @@ class OpenStackBackend(object):
             logger.exception('Failed to get openstack security groups for membership %s', membership.id)
             six.reraise(CloudBackendError, e)
 
-        # list of nc security groups, that do not exist in openstack
-        nonexistent_groups = []
-        # list of nc security groups, that have wrong parameters in in openstack
-        unsynchronized_groups = []
         # list of os security groups ids, that exist in openstack and do not exist in nc
-        extra_group_ids = backend_security_groups.keys()
-
-        for nc_group in nc_security_groups:
-            if nc_group.backend_id not in backend_security_groups:
-                nonexistent_groups.append(nc_group)
-            else:
-                backend_group = backend_security_groups[nc_group.backend_id]
-                if not self._are_security_groups_equal(backend_group, nc_group):
-                    unsynchronized_groups.append(nc_group)
-                extra_group_ids.remove(nc_group.backend_id)
+        extra_group_ids = set(backend_security_groups) - set(g.backend_id for g in nc_security_groups)
 
         # deleting extra security groups
         for backend_group_id in extra_group_ids:
@@ -285,99 +696,165 @@ class OpenStackBackend(object):
             else:
                 logger.info('Security group with id %s successfully deleted in backend', backend_group_id)
 
-        # updating unsynchronized security groups
-        for nc_group in unsynchronized_groups:
+        for nc_group in nc_security_groups:
+            nc_rules = nc_rules_by_group[nc_group.pk]
+
+            # creating nonexistent security groups
+            if nc_group.backend_id not in backend_security_groups:
+                logger.debug('About to create security group %s in backend', nc_group.uuid)
+                try:
+                    self.create_security_group(nc_group, nova)
+                    self.push_security_group_rules(nc_group, nova, backend_rules=[], nc_rules=nc_rules)
+                except nova_exceptions.ClientException:
+                    logger.exception('Failed to create openstack security group with for %s in backend', nc_group.uuid)
+                else:
+                    logger.info('Security group %s successfully created in backend', nc_group.uuid)
+                continue
+
+            # updating unsynchronized security groups
+            backend_group = backend_security_groups[nc_group.backend_id]
+
+            is_renamed = backend_group.name != nc_group.name
+            _, missing_in_nc, missing_in_backend = self._diff_security_group_rules(backend_group.rules, nc_rules)
+
+            if not (is_renamed or missing_in_nc or missing_in_backend):
+                continue
+
             logger.debug('About to update security group %s in backend', nc_group.uuid)
             try:
-                self.update_security_group(nc_group, nova)
-                self.push_security_group_rules(nc_group, nova)
+                if is_renamed:
+                    self.update_security_group(nc_group, nova)
+                if missing_in_nc or missing_in_backend:
+                    self.push_security_group_rules(
+                        nc_group, nova, backend_rules=backend_group.rules, nc_rules=nc_rules)
             except nova_exceptions.ClientException:
                 logger.exception('Failed to update security group %s in backend', nc_group.uuid)
             else:
                 logger.info('Security group %s successfully updated in backend', nc_group.uuid)
 
-        # creating nonexistent and unsynchronized security groups
-        for nc_group in nonexistent_groups:
-            logger.debug('About to create security group %s in backend', nc_group.uuid)
-            try:
-                self.create_security_group(nc_group, nova)
-                self.push_security_group_rules(nc_group, nova)
-            except nova_exceptions.ClientException:
-                logger.exception('Failed to create openstack security group with for %s in backend', nc_group.uuid)
-            else:
-                logger.info('Security group %s successfully created in backend', nc_group.uuid)
-
     def pull_security_groups(self, membership):
+        """
+        Synchronize security groups of the membership's tenant and their rules with the database.
+
+        :returns: number of security groups and rules changed in the database
+        """
+        sweep = self.get_cloud_sweep(membership)
         try:
-            session = self.create_tenant_session(membership)
-            nova = self.create_nova_client(session)
+            clients = self.get_pull_clients(membership)
+            nova = clients.nova
         except keystone_exceptions.ClientException as e:
             logger.exception('Failed to create nova client')
             six.reraise(CloudBackendError, e)
 
         try:
-            backend_security_groups = nova.security_groups.list()
+            if sweep is not None:
+                backend_security_groups = sweep.get_security_groups(membership.tenant_id)
+            else:
+                backend_security_groups = nova.security_groups.list()
         except nova_exceptions.ClientException as e:
             logger.exception('Failed to get openstack security groups for membership %s', membership.id)
             six.reraise(CloudBackendError, e)
 
-        # list of openstack security groups, that do not exist in nc
-        nonexistent_groups = []
-        # list of openstack security groups, that have wrong parameters in in nc
-        unsynchronized_groups = []
-        # list of nc security groups, that have do not exist in openstack
+        nc_security_groups, nc_rules_by_group = self._get_membership_security_groups(membership)
+        nc_security_groups = dict((g.backend_id, g) for g in nc_security_groups)
 
-        from nodeconductor.iaas.models import SecurityGroup
+        backend_security_groups = dict((str(g.id), g) for g in backend_security_groups)
 
-        extra_groups = SecurityGroup.objects.filter(
-            cloud_project_membership=membership,
-        ).exclude(
-            backend_id__in=[g.id for g in backend_security_groups],
-        )
+        # nc rules, that do not exist in openstack
+        extra_rule_ids = []
+        # openstack rules, that do not exist in nc
+        nonexistent_rules = []
+        changes = 0
 
         with transaction.atomic():
-            for backend_group in backend_security_groups:
+            # deleting extra security groups
+            extra_group_ids = set(nc_security_groups) - set(backend_security_groups)
+            if extra_group_ids:
+                models.SecurityGroup.objects.filter(
+                    pk__in=[nc_security_groups[backend_id].pk for backend_id in extra_group_ids],
+                ).delete()
+                changes += len(extra_group_ids)
+                logger.info('Deleted stale security groups in database')
+
+            nonexistent_groups = []
+            for backend_id, backend_group in backend_security_groups.items():
                 try:
-                    nc_group = SecurityGroup.objects.get(
-                        backend_id=backend_group.id,
+                    nc_group = nc_security_groups[backend_id]
+                except KeyError:
+                    nonexistent_groups.append(models.SecurityGroup(
+                        backend_id=backend_id,
+                        name=backend_group.name,
                         cloud_project_membership=membership,
+                    ))
+                else:
+                    # synchronizing unsynchronized security groups
+                    if backend_group.name != nc_group.name:
+                        models.SecurityGroup.objects.filter(pk=nc_group.pk).update(name=backend_group.name)
+                        changes += 1
+                        logger.info('Updated name of security group %s in database', nc_group.uuid)
+
+            # creating non-existed security groups
+            if nonexistent_groups:
+                models.SecurityGroup.objects.bulk_create(nonexistent_groups)
+                changes += len(nonexistent_groups)
+                logger.info('Created %d new security groups in database', len(nonexistent_groups))
+
+                # Primary keys are not populated by bulk_create, uuids are
+                nc_security_groups.update((g.backend_id, g) for g in models.SecurityGroup.objects.filter(
+                    uuid__in=[g.uuid for g in nonexistent_groups]))
+
+            for backend_id, backend_group in backend_security_groups.items():
+                nc_group = nc_security_groups[backend_id]
+
+                matching, missing_in_nc, missing_in_backend = self._diff_security_group_rules(
+                    backend_group.rules, nc_rules_by_group[nc_group.pk])
+
+                for backend_rule, nc_rule in matching:
+                    if nc_rule.backend_id != str(backend_rule['id']):
+                        models.SecurityGroupRule.objects.filter(pk=nc_rule.pk).update(
+                            backend_id=backend_rule['id'])
+
+                extra_rule_ids.extend(nc_rule.pk for nc_rule in missing_in_backend)
+                nonexistent_rules.extend(
+                    models.SecurityGroupRule(
+                        group=nc_group,
+                        from_port=backend_rule['from_port'],
+                        to_port=backend_rule['to_port'],
+                        protocol=backend_rule['ip_protocol'],
+                        cidr=backend_rule['ip_range']['cidr'],
+                        backend_id=backend_rule['id'],
                     )
-                    if not self._are_security_groups_equal(backend_group, nc_group):
-                        unsynchronized_groups.append(backend_group)
-                except SecurityGroup.DoesNotExist:
-                    nonexistent_groups.append(backend_group)
+                    for backend_rule in missing_in_nc
+                )
 
-            # deleting extra security groups
-            extra_groups.delete()
-            logger.info('Deleted stale security groups in database')
+            # deleting extra rules
+            if extra_rule_ids:
+                models.SecurityGroupRule.objects.filter(pk__in=extra_rule_ids).delete()
+                logger.info('Deleted %d stale security group rules in database', len(extra_rule_ids))
 
-            # synchronizing unsynchronized security groups
-            for backend_group in unsynchronized_groups:
-                nc_security_group = SecurityGroup.objects.get(
-                    backend_id=backend_group.id,
-                    cloud_project_membership=membership,
-                )
-                if backend_group.name != nc_security_group.name:
-                    nc_security_group.name = backend_group.name
-                    nc_security_group.save()
-                self.pull_security_group_rules(nc_security_group, nova)
-            logger.info('Updated existing security groups in database')
+            # creating non-existed rules
+            if nonexistent_rules:
+                models.SecurityGroupRule.objects.bulk_create(nonexistent_rules)
+                logger.info('Created %d new security group rules in database', len(nonexistent_rules))
 
-            # creating non-existed security groups
-            for backend_group in nonexistent_groups:
-                nc_security_group = SecurityGroup.objects.create(
-                    backend_id=backend_group.id,
-                    name=backend_group.name,
-                    cloud_project_membership=membership,
-                )
-                self.pull_security_group_rules(nc_security_group, nova)
-                logger.info('Created new security group %s in database', nc_security_group.uuid)
+        return changes + len(extra_rule_ids) + len(nonexistent_rules)
 
-    def pull_instances(self, membership):
+    def pull_instances(self, membership, incremental=False):
+        """
+        Synchronize instances of the membership's tenant with the database.
+
+        Full synchronization fetches all the servers of the tenant.
+        Incremental synchronization fetches only the servers that were changed
+        or deleted since the previous synchronization of the membership;
+        it falls back to the full one if the membership was never synchronized.
+
+        :returns: number of instances changed in the database
+        """
+        sweep = self.get_cloud_sweep(membership)
         try:
-            session = self.create_tenant_session(membership)
-            nova = self.create_nova_client(session)
-            cinder = self.create_cinder_client(session)
+            clients = self.get_pull_clients(membership)
+            nova = clients.nova
+            cinder = clients.cinder
         except keystone_exceptions.ClientException as e:
             logger.exception('Failed to create nova client')
             six.reraise(CloudBackendError, e)
@@ -385,22 +862,92 @@ class OpenStackBackend(object):
             logger.exception('Failed to create cinder client')
             six.reraise(CloudBackendError, e)
 
-        # Exclude instances that are booted from images
-        backend_instances = nova.servers.findall(image='')
+        sync_started_at = timezone.now()
+        # Cloud sweep lists all the servers anyway
+        changes_since = membership.instances_synced_at if incremental and sweep is None else None
+
+        try:
+            if sweep is not None:
+                # Exclude instances that are booted from images
+                backend_instances = [s for s in sweep.get_servers(membership.tenant_id) if s.image == '']
+                deleted_ids = None
+                # Listing may be older than the pull, servers changed since are left to the next pull
+                sync_started_at = sweep.servers_listed_at
+            elif changes_since is None:
+                # Exclude instances that are booted from images
+                backend_instances = nova.servers.findall(image='')
+                deleted_ids = None
+            else:
+                changes_since -= datetime.timedelta(seconds=_get_instance_sync_overlap())
+                backend_instances, deleted_ids = self._get_changed_instances(nova, changes_since)
+        except nova_exceptions.ClientException as e:
+            logger.exception('Failed to get instances for tenant %s', membership.tenant_id)
+            six.reraise(CloudBackendError, e)
+
         backend_instances = dict(((f.id, f) for f in backend_instances))
 
+        # Fetch volumes, flavors and templates of the whole tenant at once
+        # rather than querying them separately for every instance
+        if backend_instances:
+            try:
+                if sweep is not None:
+                    volumes_by_instance = sweep.volumes_by_instance
+                    flavors = sweep.flavors
+                else:
+                    volumes_by_instance = self._get_volumes_by_instance(cinder)
+                    flavors = dict((f.id, f) for f in nova.flavors.list())
+            except (nova_exceptions.ClientException, cinder_exceptions.ClientException) as e:
+                logger.exception('Failed to get volumes or flavors for tenant %s', membership.tenant_id)
+                six.reraise(CloudBackendError, e)
+
+            templates_by_image = self._get_templates_by_image(membership)
+
+        membership_instances = models.Instance.objects.filter(
+            cloud_project_membership=membership,
+        )
+        backend_ids = set(backend_instances.keys())
+
+        if deleted_ids is not None:
+            # Only the changed instances are of interest
+            membership_instances = membership_instances.filter(
+                backend_id__in=backend_ids | deleted_ids)
+
+        # Instances that are being processed must be neither touched nor re-imported
+        known_ids = set(membership_instances.values_list('backend_id', flat=True))
+
+        nc_instances = membership_instances.filter(
+            state__in=models.Instance.States.STABLE_STATES,
+        )
+        nc_instances = dict(((i.backend_id, i) for i in nc_instances))
+        nc_ids = set(nc_instances.keys())
+
+        if deleted_ids is None:
+            stale_ids = nc_ids - backend_ids
+        else:
+            stale_ids = nc_ids & deleted_ids
+
+        if sweep is not None and stale_ids:
+            # Instances may have got their servers after the sweep listed them,
+            # servers are looked up before any rows get locked
+            try:
+                stale_ids = self._get_deleted_server_ids(nova, stale_ids)
+            except nova_exceptions.ClientException as e:
+                logger.exception('Failed to look up servers of stale instances of tenant %s',
+                                 membership.tenant_id)
+                six.reraise(CloudBackendError, e)
+
         with transaction.atomic():
-            nc_instances = models.Instance.objects.filter(
-                state__in=models.Instance.States.STABLE_STATES,
-                cloud_project_membership=membership,
-            )
-            nc_instances = dict(((i.backend_id, i) for i in nc_instances))
+            if stale_ids:
+                # Instances that got a task scheduled meanwhile must not be deleted
+                stale_ids &= set(membership_instances.filter(
+                    backend_id__in=stale_ids,
+                    state__in=models.Instance.States.STABLE_STATES,
+                ).values_list('backend_id', flat=True))
 
-            backend_ids = set(backend_instances.keys())
-            nc_ids = set(nc_instances.keys())
+            changes = 0
 
             # Remove stale instances, the ones that are not on backend anymore
-            for instance_id in nc_ids - backend_ids:
+            for instance_id in stale_ids:
                 nc_instance = nc_instances[instance_id]
                 logger.debug('About to delete instance %s in database',
                              nc_instance.uuid)
@@ -411,17 +958,18 @@ class OpenStackBackend(object):
                     logger.exception('Failed to delete instance %s in database',
                                      nc_instance.uuid)
                 else:
+                    changes += 1
                     logger.info('Deleted stale instance %s in database',
                                 nc_instance.uuid)
 
             # Add new instances, the ones that are not yet in the database
-            for instance_id in backend_ids - nc_ids:
+            for instance_id in backend_ids - known_ids:
                 backend_instance = backend_instances[instance_id]
 
                 try:
-                    system_volume, data_volume = self._get_instance_volumes(nova, cinder, instance_id)
-                    template = self._get_instance_template(system_volume, membership, instance_id)
-                    cores, ram = self._get_flavor_info(nova, backend_instance)
+                    system_volume, data_volume = self._get_instance_volumes(volumes_by_instance, instance_id)
+                    template = self._get_instance_template(system_volume, templates_by_image, instance_id)
+                    cores, ram = self._get_flavor_info(nova, flavors, backend_instance)
                     state = self._get_instance_state(backend_instance)
                 except LookupError:
                     continue
@@ -446,16 +994,48 @@ class OpenStackBackend(object):
 
                     cloud_project_membership=membership,
                     backend_id=backend_instance.id,
+                    **self._get_instance_ips(backend_instance)
                 )
 
+                changes += 1
                 logger.info('Created new instance %s in database', nc_instance.uuid)
-            # TODO: Sync matching
+
+            # Update matching instances, the ones that exist in both places
+            for instance_id in nc_ids & backend_ids:
+                nc_instance = nc_instances[instance_id]
+                backend_instance = backend_instances[instance_id]
+
+                changed_fields = self._get_instance_changes(
+                    nc_instance, backend_instance, volumes_by_instance, flavors, nova)
+
+                if not changed_fields:
+                    continue
+
+                # Do not overwrite instances that got a task scheduled meanwhile
+                updated = models.Instance.objects.filter(
+                    pk=nc_instance.pk,
+                    state=nc_instance.state,
+                ).update(**changed_fields)
+
+                if updated:
+                    changes += 1
+                    logger.info('Updated existing instance %s in database, changed fields: %s',
+                                nc_instance.uuid, ', '.join(sorted(changed_fields)))
+                else:
+                    logger.info('Skipped update of instance %s in database, its state has changed',
+                                nc_instance.uuid)
+
+            models.CloudProjectMembership.objects.filter(
+                pk=membership.pk).update(instances_synced_at=sync_started_at)
+            membership.instances_synced_at = sync_started_at
+
+        return changes
 
     def pull_resource_quota(self, membership):
         try:
-            session = self.create_tenant_session(membership)
-            nova = self.create_nova_client(session)
-            cinder = self.create_cinder_client(session)
+            clients = self.get_pull_clients(membership)
+            nova = clients.nova
+            cinder = clients.cinder
         except keystone_exceptions.ClientException as e:
             logger.exception('Failed to create nova client or cinder client')
             six.reraise(CloudBackendError, e)
@@ -482,19 +1062,25 @@ class OpenStackBackend(object):
         resource_quota.save()
 
     def pull_resource_quota_usage(self, membership):
+        sweep = self.get_cloud_sweep(membership)
         try:
-            session = self.create_tenant_session(membership)
-            nova = self.create_nova_client(session)
-            cinder = self.create_cinder_client(session)
+            clients = self.get_pull_clients(membership)
+            nova = clients.nova
+            cinder = clients.cinder
         except keystone_exceptions.ClientException as e:
             logger.exception('Failed to create nova client or cinder client')
             six.reraise(CloudBackendError, e)
 
         logger.debug('About to get volumes, flavors and instances for tenant %s', membership.tenant_id)
         try:
-            volumes = cinder.volumes.list()
-            flavors = dict((flavor.id, flavor) for flavor in nova.flavors.list())
-            instances = nova.servers.list()
+            if sweep is not None:
+                volumes = sweep.get_volumes(membership.tenant_id)
+                flavors = sweep.flavors
+                instances = sweep.get_servers(membership.tenant_id)
+            else:
+                volumes = cinder.volumes.list()
+                flavors = dict((flavor.id, flavor) for flavor in nova.flavors.list())
+                instances = nova.servers.list()
         except (nova_exceptions.ClientException, cinder_exceptions.ClientException) as e:
             logger.exception('Failed to get volumes, flavors or instances for tenant %s', membership.tenant_id)
             six.reraise(CloudBackendError, e)
@@ -530,16 +1116,26 @@ class OpenStackBackend(object):
         resource_quota_usage.save()
 
     def pull_floating_ips(self, membership):
+        """
+        Synchronize floating IPs of the membership's tenant with the database.
+
+        :returns: number of floating IPs changed in the database
+        """
         logger.debug('Pulling floating ips for membership %s', membership.id)
+        sweep = self.get_cloud_sweep(membership)
         try:
-            session = self.create_tenant_session(membership)
-            neutron = self.create_neutron_client(session)
+            clients = self.get_pull_clients(membership)
+            neutron = clients.neutron
         except keystone_exceptions.ClientException as e:
             logger.exception('Failed to create neutron client')
             six.reraise(CloudBackendError, e)
 
         try:
-            backend_floating_ips = dict((ip['id'], ip) for ip in self.get_floating_ips(membership.tenant_id, neutron))
+            if sweep is not None:
+                backend_floating_ips = sweep.get_floating_ips(membership.tenant_id)
+            else:
+                backend_floating_ips = self.get_floating_ips(membership.tenant_id, neutron)
+            backend_floating_ips = dict((ip['id'], ip) for ip in backend_floating_ips)
         except neutron_exceptions.ClientException as e:
             logger.exception('Failed to get a list of floating IPs')
             six.reraise(CloudBackendError, e)
@@ -550,38 +1146,63 @@ class OpenStackBackend(object):
         backend_ids = set(backend_floating_ips.keys())
         nc_ids = set(nc_floating_ips.keys())
 
+        stale_ids = nc_ids - backend_ids
+
+        if sweep is not None and stale_ids:
+            # Floating IPs may have been allocated after the sweep listed them
+            try:
+                stale_ids -= set(ip['id'] for ip in self.get_floating_ips(membership.tenant_id, neutron))
+            except neutron_exceptions.ClientException as e:
+                logger.exception('Failed to get a list of floating IPs')
+                six.reraise(CloudBackendError, e)
+
+        # Compute changes before touching the database to keep the transaction short
+        stale_ips = [nc_floating_ips[ip_id] for ip_id in stale_ids]
+
+        new_ips = [
+            models.FloatingIP(
+                cloud_project_membership=membership,
+                status=backend_floating_ips[ip_id]['status'],
+                backend_id=ip_id,
+                address=backend_floating_ips[ip_id]['floating_ip_address'],
+            )
+            for ip_id in backend_ids - nc_ids
+        ]
+
+        changed_ips = []
+        for ip_id in nc_ids & backend_ids:
+            nc_ip = nc_floating_ips[ip_id]
+            backend_ip = backend_floating_ips[ip_id]
+            if nc_ip.status != backend_ip['status'] or nc_ip.address != backend_ip['floating_ip_address']:
+                changed_ips.append((nc_ip, backend_ip))
+
         with transaction.atomic():
 
-            for ip_id in nc_ids - backend_ids:
-                ip = nc_floating_ips[ip_id]
-                ip.delete()
-                logger.info('Deleted stale floating IP port %s in database', ip.uuid)
+            if stale_ips:
+                models.FloatingIP.objects.filter(pk__in=[ip.pk for ip in stale_ips]).delete()
+                for ip in stale_ips:
+                    logger.info('Deleted stale floating IP port %s in database', ip.uuid)
 
-            for ip_id in backend_ids - nc_ids:
-                ip = backend_floating_ips[ip_id]
-                created_ip = models.FloatingIP.objects.create(
-                    cloud_project_membership=membership,
-                    status=ip['status'],
-                    backend_id=ip['id'],
-                    address=ip['floating_ip_address'],
+            if new_ips:
+                models.FloatingIP.objects.bulk_create(new_ips)
+                for ip in new_ips:
+                    logger.info('Created new floating IP port %s in database', ip.uuid)
+
+            for nc_ip, backend_ip in changed_ips:
+                models.FloatingIP.objects.filter(pk=nc_ip.pk).update(
+                    status=backend_ip['status'],
+                    address=backend_ip['floating_ip_address'],
                 )
-                logger.info('Created new floating IP port %s in database', created_ip.uuid)
+                logger.info('Updated existing floating IP port %s in database', nc_ip.uuid)
 
-            for ip_id in nc_ids & backend_ids:
-                nc_ip = nc_floating_ips[ip_id]
-                backend_ip = backend_floating_ips[ip_id]
-                if nc_ip.status != backend_ip['status'] or nc_ip.address != backend_ip['floating_ip_address']:
-                    nc_ip.status = backend_ip['status']
-                    nc_ip.address = backend_ip['floating_ip_address']
-                    nc_ip.save()
-                    logger.info('Updated existing floating IP port %s in database', nc_ip.uuid)
+        return len(stale_ips) + len(new_ips) + len(changed_ips)
 
     # Statistics methods
     def get_resource_stats(self, auth_url):
         logger.debug('About to get statistics from for auth_url: %s', auth_url)
         try:
-            session = self.create_admin_session(auth_url)
-            nova = self.create_nova_client(session)
+            clients = self.get_admin_clients(auth_url)
+            nova = clients.nova
             stats = self.get_hypervisors_statistics(nova)
         except (nova_exceptions.ClientException, keystone_exceptions.ClientException) as e:
             logger.exception('Failed to get statistics for auth_url: %s', auth_url)
@@ -592,58 +1213,47 @@ class OpenStackBackend(object):
 
     # Instance related methods
     def provision_instance(self, instance, backend_flavor_id):
-        logger.info('About to boot instance %s', instance.uuid)
-        try:
-            membership = instance.cloud_project_membership
-
-            image = membership.cloud.images.get(
-                template=instance.template,
-            )
+        self.request_instance_provisioning(instance, backend_flavor_id)
 
-            session = self.create_tenant_session(membership)
+        # Volumes and the server itself are waited for in turn
+        if not self._wait_for_completion(
+                lambda: self.check_instance_provisioning(instance, backend_flavor_id), retries=40):
+            logger.error('Failed to boot instance %s: timed out waiting for instance to become online',
+                         instance.uuid)
+            raise CloudBackendError('Timed out waiting for instance %s to boot' % instance.uuid)
 
-            nova = self.create_nova_client(session)
-            cinder = self.create_cinder_client(session)
-            glance = self.create_glance_client(session)
-            neutron = self.create_neutron_client(session)
-
-            network_name = self.get_tenant_name(membership)
-
-            matching_networks = neutron.list_networks(name=network_name)['networks']
-            matching_networks_count = len(matching_networks)
+    def prepare_instance_provisioning(self, instance, backend_flavor_id):
+        """
+        Look up backend resources the instance is going to be provisioned with.
 
-            if matching_networks_count > 1:
-                logger.error('Found %d networks named "%s", expected exactly one',
-                             matching_networks_count, network_name)
-                raise CloudBackendError('Unable to find network to attach instance to')
-            elif matching_networks_count == 0:
-                logger.error('Found no networks named "%s", expected exactly one',
-                             network_name)
-                raise CloudBackendError('Unable to find network to attach instance to')
+        Lookups are cached, instances of the same membership provisioned right after
+        with the same flavor, template and key do not repeat them.
+        """
+        try:
+            clients = self.get_tenant_clients(instance.cloud_project_membership)
+            self._get_provisioning_resources(instance, backend_flavor_id, clients)
+        except (glance_exceptions.ClientException,
+                nova_exceptions.ClientException,
+                neutron_exceptions.NeutronClientException) as e:
+            logger.exception('Failed to look up resources to provision instance %s with', instance.uuid)
+            six.reraise(CloudBackendError, e)
 
-            network = matching_networks[0]
+    def request_instance_provisioning(self, instance, backend_flavor_id):
+        """
+        Validate provisioning parameters and request creation of instance's volumes.
 
-            safe_key_name = self.sanitize_key_name(instance.key_name)
+        Volume ids are stored on the instance, use check_instance_provisioning()
+        to follow the progress.
+        """
+        logger.info('About to boot instance %s', instance.uuid)
+        try:
+            membership = instance.cloud_project_membership
 
-            matching_keys = [
-                key
-                for key in nova.keypairs.findall(fingerprint=instance.key_fingerprint)
-                if key.name.endswith(safe_key_name)
-            ]
-            matching_keys_count = len(matching_keys)
+            clients = self.get_tenant_clients(membership)
 
-            if matching_keys_count > 1:
-                logger.error('Found %d public keys with fingerprint "%s", expected exactly one',
-                             matching_keys_count, instance.key_fingerprint)
-                raise CloudBackendError('Unable to find public key to provision instance with')
-            elif matching_keys_count == 0:
-                logger.error('Found no public keys with fingerprint "%s", expected exactly one',
-                             instance.key_fingerprint)
-                raise CloudBackendError('Unable to find public key to provision instance with')
+            cinder = clients.cinder
 
-            backend_public_key = matching_keys[0]
-            backend_flavor = nova.flavors.get(backend_flavor_id)
-            backend_image = glance.images.get(image.backend_id)
+            backend_image_id = self._get_provisioning_resources(instance, backend_flavor_id, clients)[3]
 
             system_volume_name = '{0}-system'.format(instance.hostname)
             logger.info('Creating volume %s for instance %s', system_volume_name, instance.uuid)
@@ -652,7 +1262,7 @@ class OpenStackBackend(object):
                 size=self.get_backend_disk_size(instance.system_volume_size),
                 display_name=system_volume_name,
                 display_description='',
-                imageRef=backend_image.id,
+                imageRef=backend_image_id,
             )
 
             data_volume_name = '{0}-data'.format(instance.hostname)
@@ -663,82 +1273,67 @@ class OpenStackBackend(object):
                 display_description='',
             )
 
-            if not self._wait_for_volume_status(system_volume.id, cinder, 'available', 'error'):
-                logger.error(
-                    'Failed to boot instance %s: timed out waiting for system volume to become available',
-                    instance.uuid, system_volume.id,
-                )
-                raise CloudBackendError('Timed out waiting for instance %s to boot' % instance.uuid)
-
-            if not self._wait_for_volume_status(data_volume.id, cinder, 'available', 'error'):
-                logger.error(
-                    'Failed to boot instance %s: timed out waiting for data volume to become available',
-                    instance.uuid, data_volume.id,
-                )
-                raise CloudBackendError('Timed out waiting for instance %s to boot' % instance.uuid)
-
-            security_group_ids = instance.security_groups.values_list('security_group__backend_id', flat=True)
-
-            server = nova.servers.create(
-                name=instance.hostname,
-                image=None,  # Boot from volume, see boot_index below
-                flavor=backend_flavor,
-                block_device_mapping_v2=[
-                    {
-                        'boot_index': 0,
-                        'destination_type': 'volume',
-                        'device_type': 'disk',
-                        'source_type': 'volume',
-                        'uuid': system_volume.id,
-                        'delete_on_termination': True,
-                    },
-                    {
-                        'destination_type': 'volume',
-                        'device_type': 'disk',
-                        'source_type': 'volume',
-                        'uuid': data_volume.id,
-                        'delete_on_termination': True,
-                    },
-                    # This should have worked by creating an empty volume.
-                    # But, as always, OpenStack doesn't work as advertised:
-                    # see https://bugs.launchpad.net/nova/+bug/1347499
-                    # equivalent nova boot options would be
-                    # --block-device source=blank,dest=volume,size=10,type=disk
-                    # {
-                    # 'destination_type': 'blank',
-                    #     'device_type': 'disk',
-                    #     'source_type': 'image',
-                    #     'uuid': backend_image.id,
-                    #     'volume_size': 10,
-                    #     'shutdown': 'remove',
-                    # },
-                ],
-                nics=[
-                    {'net-id': network['id']}
-                ],
-                key_name=backend_public_key.name,
-                security_groups=security_group_ids,
-            )
-
-            instance.backend_id = server.id
             instance.system_volume_id = system_volume.id
             instance.data_volume_id = data_volume.id
             instance.save()
+        except (glance_exceptions.ClientException,
+                cinder_exceptions.ClientException,
+                nova_exceptions.ClientException,
+                neutron_exceptions.NeutronClientException) as e:
+            logger.exception('Failed to boot instance %s', instance.uuid)
+            six.reraise(CloudBackendError, e)
+
+    def check_instance_provisioning(self, instance, backend_flavor_id):
+        """
+        Advance provisioning of the instance as far as the backend allows without waiting.
+
+        Boots the instance once its volumes are available and finishes its
+        initialization once it is online.
+
+        :returns: True if the instance is provisioned, False otherwise
+        :rtype: bool
+        """
+        try:
+            membership = instance.cloud_project_membership
+
+            clients = self.get_tenant_clients(membership)
+
+            nova = clients.nova
+            cinder = clients.cinder
+
+            if not instance.backend_id:
+                statuses = self._get_objects_statuses([
+                    (cinder.volumes, instance.system_volume_id, 'available', 'error'),
+                    (cinder.volumes, instance.data_volume_id, 'available', 'error'),
+                ])
+
+                if 'error' in statuses.values():
+                    logger.error('Failed to boot instance %s: failed to create volumes %s and %s',
+                                 instance.uuid, instance.system_volume_id, instance.data_volume_id)
+                    raise CloudBackendError('Failed to create volumes of instance %s' % instance.uuid)
+
+                if any(status != 'available' for status in statuses.values()):
+                    return False
+
+                self._create_instance_server(instance, backend_flavor_id, clients)
+                return False
+
+            server = nova.servers.get(instance.backend_id)
+
+            if server.status == 'ERROR':
+                logger.error('Failed to boot instance %s: instance is erred in backend', instance.uuid)
+                raise CloudBackendError('Failed to boot instance %s' % instance.uuid)
+
+            if server.status != 'ACTIVE':
+                return False
 
-            if not self._wait_for_instance_status(server.id, nova, 'ACTIVE'):
-                logger.error(
-                    'Failed to boot instance %s: timed out waiting for instance to become online',
-                    instance.uuid,
-                )
-                raise CloudBackendError('Timed out waiting for instance %s to boot' % instance.uuid)
             instance.start_time = timezone.now()
             instance.save()
 
             logger.debug('About to infer internal ip addresses of instance %s', instance.uuid)
             try:
-                server = nova.servers.get(server.id)
-                fixed_address = server.addresses.values()[0][0]['addr']
-            except (nova_exceptions.ClientException, KeyError, IndexError):
+                fixed_address = list(server.addresses.values())[0][0]['addr']
+            except (KeyError, IndexError):
                 logger.exception('Failed to infer internal ip addresses of instance %s',
                                  instance.uuid)
             else:
@@ -758,15 +1353,156 @@ class OpenStackBackend(object):
             six.reraise(CloudBackendError, e)
         else:
             logger.info('Successfully booted instance %s', instance.uuid)
+            return True
+
+    def _get_provisioning_resources(self, instance, backend_flavor_id, clients):
+        """
+        Look up backend resources the instance is going to be provisioned with.
+
+        Network id is stored on the membership, other resources are resolved
+        once in a while and cached until they are pushed or pulled again.
+
+        :returns: ids of network and flavor, name of public key and id of image
+        :rtype: tuple
+        """
+        membership = instance.cloud_project_membership
+
+        image = membership.cloud.images.get(
+            template=instance.template,
+        )
+
+        network_id = membership.network_id or self._resolve_network_id(membership, clients.neutron)
+
+        backend_public_key_name = self._resolve(
+            'keypairs', self._get_tenant_scope(membership),
+            '%s|%s' % (instance.key_fingerprint, instance.key_name),
+            lambda: self._resolve_public_key_name(instance, clients.nova))
+
+        backend_flavor_id = self._resolve(
+            'flavors', membership.cloud.auth_url, backend_flavor_id,
+            lambda: clients.nova.flavors.get(backend_flavor_id).id)
+
+        backend_image_id = self._resolve(
+            'images', membership.cloud.auth_url, image.backend_id,
+            lambda: clients.glance.images.get(image.backend_id).id)
+
+        return network_id, backend_public_key_name, backend_flavor_id, backend_image_id
+
+    def _resolve(self, kind, scope, name, resolve):
+        cache_key = _get_resolution_cache_key(kind, scope, name)
+
+        resolved = cache.get(cache_key)
+        if resolved is None:
+            resolved = resolve()
+            cache.set(cache_key, resolved, _get_resolution_cache_timeout())
+
+        return resolved
+
+    def _get_tenant_scope(self, membership):
+        return '%s|%s' % (membership.cloud.auth_url, membership.tenant_id)
+
+    def _resolve_network_id(self, membership, neutron):
+        network_name = self.get_tenant_name(membership)
+
+        matching_networks = neutron.list_networks(name=network_name)['networks']
+        matching_networks_count = len(matching_networks)
+
+        if matching_networks_count > 1:
+            logger.error('Found %d networks named "%s", expected exactly one',
+                         matching_networks_count, network_name)
+            raise CloudBackendError('Unable to find network to attach instance to')
+        elif matching_networks_count == 0:
+            logger.error('Found no networks named "%s", expected exactly one',
+                         network_name)
+            raise CloudBackendError('Unable to find network to attach instance to')
+
+        network_id = matching_networks[0]['id']
+
+        # Memberships pushed before network ids were stored are filled in lazily
+        models.CloudProjectMembership.objects.filter(pk=membership.pk).update(network_id=network_id)
+        membership.network_id = network_id
+
+        return network_id
+
+    def _resolve_public_key_name(self, instance, nova):
+        safe_key_name = self.sanitize_key_name(instance.key_name)
+
+        matching_keys = [
+            key
+            for key in nova.keypairs.findall(fingerprint=instance.key_fingerprint)
+            if key.name.endswith(safe_key_name)
+        ]
+        matching_keys_count = len(matching_keys)
+
+        if matching_keys_count > 1:
+            logger.error('Found %d public keys with fingerprint "%s", expected exactly one',
+                         matching_keys_count, instance.key_fingerprint)
+            raise CloudBackendError('Unable to find public key to provision instance with')
+        elif matching_keys_count == 0:
+            logger.error('Found no public keys with fingerprint "%s", expected exactly one',
+                         instance.key_fingerprint)
+            raise CloudBackendError('Unable to find public key to provision instance with')
+
+        return matching_keys[0].name
+
+    def _create_instance_server(self, instance, backend_flavor_id, clients):
+        network_id, backend_public_key_name, backend_flavor_id, _ = self._get_provisioning_resources(
+            instance, backend_flavor_id, clients)
+
+        security_group_ids = instance.security_groups.values_list('security_group__backend_id', flat=True)
+
+        server = clients.nova.servers.create(
+            name=instance.hostname,
+            image=None,  # Boot from volume, see boot_index below
+            flavor=backend_flavor_id,
+            block_device_mapping_v2=[
+                {
+                    'boot_index': 0,
+                    'destination_type': 'volume',
+                    'device_type': 'disk',
+                    'source_type': 'volume',
+                    'uuid': instance.system_volume_id,
+                    'delete_on_termination': True,
+                },
+                {
+                    'destination_type': 'volume',
+                    'device_type': 'disk',
+                    'source_type': 'volume',
+                    'uuid': instance.data_volume_id,
+                    'delete_on_termination': True,
+                },
+                # This should have worked by creating an empty volume.
+                # But, as always, OpenStack doesn't work as advertised:
+                # see https://bugs.launchpad.net/nova/+bug/1347499
+                # equivalent nova boot options would be
+                # --block-device source=blank,dest=volume,size=10,type=disk
+                # {
+                # 'destination_type': 'blank',
+                #     'device_type': 'disk',
+                #     'source_type': 'image',
+                #     'uuid': backend_image.id,
+                #     'volume_size': 10,
+                #     'shutdown': 'remove',
+                # },
+            ],
+            nics=[
+                {'net-id': network_id}
+            ],
+            key_name=backend_public_key_name,
+            security_groups=security_group_ids,
+        )
+
+        instance.backend_id = server.id
+        instance.save()
 
     def start_instance(self, instance):
         logger.debug('About to start instance %s', instance.uuid)
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
+            clients = self.get_tenant_clients(membership)
 
-            nova = self.create_nova_client(session)
+            nova = clients.nova
             nova.servers.start(instance.backend_id)
 
             if not self._wait_for_instance_status(instance.backend_id, nova, 'ACTIVE'):
@@ -785,9 +1521,9 @@ class OpenStackBackend(object):
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
+            clients = self.get_tenant_clients(membership)
 
-            nova = self.create_nova_client(session)
+            nova = clients.nova
             nova.servers.stop(instance.backend_id)
 
             if not self._wait_for_instance_status(instance.backend_id, nova, 'SHUTOFF'):
@@ -801,57 +1537,146 @@ class OpenStackBackend(object):
             instance.save()
             logger.info('Successfully stopped instance %s', instance.uuid)
 
+    def request_instances_operation(self, membership, instances, operation):
+        """
+        Request start, stop or delete operation on several instances of the membership at once.
+
+        Operations are not waited for, use check_instances_operation() to follow their progress.
+
+        :returns: instances the operation has been requested for
+        :rtype: list
+        """
+        try:
+            nova = self.get_tenant_clients(membership).nova
+            return self._request_instances_operation(nova, instances, operation)
+        except nova_exceptions.ClientException as e:
+            logger.exception('Failed to %s instances of cloud membership %s', operation, membership.pk)
+            six.reraise(CloudBackendError, e)
+
+    def check_instances_operation(self, membership, instances, operation):
+        """
+        Check progress of the operation on several instances of the membership without waiting.
+
+        All the instances are checked with a single server listing.
+
+        :returns: instances the operation is completed for and instances it has failed for
+        :rtype: tuple
+        """
+        try:
+            nova = self.get_tenant_clients(membership).nova
+            servers = _list_all_pages(lambda listed: nova.servers.list(
+                marker=listed[-1].id if listed else None,
+                limit=LISTING_PAGE_SIZE,
+            ))
+        except nova_exceptions.ClientException as e:
+            logger.exception('Failed to check instances of cloud membership %s', membership.pk)
+            six.reraise(CloudBackendError, e)
+
+        statuses = dict((server.id, server.status) for server in servers)
+        complete_status = self.INSTANCE_OPERATION_STATUSES[operation]
+
+        completed = []
+        failed = []
+        for instance in instances:
+            status = statuses.get(instance.backend_id)
+            if status == complete_status:
+                completed.append(instance)
+            elif status is None or status == 'ERROR':
+                logger.error('Failed to %s instance %s, its server is in status %s',
+                             operation, instance.uuid, status or 'DELETED')
+                failed.append(instance)
+
+        if operation == 'start':
+            models.Instance.objects.filter(pk__in=[i.pk for i in completed]).update(start_time=timezone.now())
+        elif operation == 'stop':
+            models.Instance.objects.filter(pk__in=[i.pk for i in completed]).update(start_time=None)
+
+        logger.info('Managed to %s %d of %d instances of cloud membership %s, %d have failed',
+                    operation, len(completed), len(instances), membership.pk, len(failed))
+        return completed, failed
+
+    def _request_instances_operation(self, nova, instances, operation):
+        """
+        Request the operation on every instance skipping the ones it has failed for.
+
+        :returns: instances the operation has been requested for
+        :rtype: list
+        """
+        requested = []
+        for instance in instances:
+            logger.debug('About to %s instance %s', operation, instance.uuid)
+            try:
+                getattr(nova.servers, operation)(instance.backend_id)
+            except nova_exceptions.ClientException:
+                logger.exception('Failed to %s instance %s', operation, instance.uuid)
+            else:
+                requested.append(instance)
+
+        return requested
+
     def delete_instance(self, instance):
+        self.request_instance_deletion(instance)
+
+        if not self._wait_for_completion(lambda: self.check_instance_deletion(instance)):
+            logger.info('Failed to delete instance %s', instance.uuid)
+            raise CloudBackendError('Timed out waiting for instance %s to get deleted' % instance.uuid)
+
+    def request_instance_deletion(self, instance):
         logger.info('About to delete instance %s', instance.uuid)
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
+            clients = self.get_tenant_clients(membership)
 
-            nova = self.create_nova_client(session)
+            nova = clients.nova
             nova.servers.delete(instance.backend_id)
+        except nova_exceptions.ClientException as e:
+            logger.info('Failed to delete instance %s', instance.uuid)
+            six.reraise(CloudBackendError, e)
 
-            retries = 20
-            poll_interval = 3
-
-            for _ in range(retries):
-                try:
-                    nova.servers.get(instance.backend_id)
-                except nova_exceptions.NotFound:
-                    break
+    def check_instance_deletion(self, instance):
+        """
+        :returns: True if the instance is gone from the backend, False otherwise
+        :rtype: bool
+        """
+        try:
+            membership = instance.cloud_project_membership
 
-                time.sleep(poll_interval)
-            else:
-                logger.info('Failed to delete instance %s', instance.uuid)
-                raise CloudBackendError('Timed out waiting for instance %s to get deleted' % instance.uuid)
+            clients = self.get_tenant_clients(membership)
 
+            nova = clients.nova
+            nova.servers.get(instance.backend_id)
+        except nova_exceptions.NotFound:
+            logger.info('Successfully deleted instance %s', instance.uuid)
+            return True
         except nova_exceptions.ClientException as e:
             logger.info('Failed to delete instance %s', instance.uuid)
             six.reraise(CloudBackendError, e)
-        else:
-            logger.info('Successfully deleted instance %s', instance.uuid)
+
+        return False
 
     def backup_instance(self, instance):
         logger.debug('About to create instance %s backup', instance.uuid)
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
+            clients = self.get_tenant_clients(membership)
 
-            nova = self.create_nova_client(session)
-            cinder = self.create_cinder_client(session)
+            nova = clients.nova
+            cinder = clients.cinder
 
-            backups = []
             attached_volumes = self.get_attached_volumes(instance.backend_id, nova)
 
-            for volume in attached_volumes:
-                # TODO: Consider using context managers to avoid having resource remnants
-                snapshot = self.create_snapshot(volume.id, cinder)
-                temporary_volume = self.create_temporary_volume(snapshot, cinder)
-                backup = self.create_volume_backup(temporary_volume, volume.device, cinder)
-                backups.append(backup)
-                self.delete_temporary_volume(temporary_volume, cinder)
-                self.delete_temporary_snapshot(snapshot, cinder)
+            # Volumes are backed up independently, so their chains of waits can overlap
+            backups, exc_info = self._map_concurrently(
+                lambda volume: self._backup_volume(volume, cinder), attached_volumes)
+
+            if exc_info is not None:
+                # Partial backup is of no use, delete backups of the other volumes
+                for backup_id in backups:
+                    if backup_id is not None:
+                        self._delete_quietly(cinder.backups, backup_id)
+                six.reraise(*exc_info)
         except (nova_exceptions.ClientException, cinder_exceptions.ClientException,
                 keystone_exceptions.ClientException, CloudBackendInternalError) as e:
             logger.exception('Failed to create backup for instance %s', instance.uuid)
@@ -865,17 +1690,19 @@ class OpenStackBackend(object):
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
+            clients = self.get_tenant_clients(membership)
 
-            nova = self.create_nova_client(session)
-            cinder = self.create_cinder_client(session)
+            nova = clients.nova
+            cinder = clients.cinder
 
-            restored_volumes = []
+            restored_volumes, exc_info = self._map_concurrently(
+                lambda backup_id: self._restore_volume(backup_id, cinder), instance_backup_ids)
 
-            for backup_id in instance_backup_ids:
-                restored_volume = self.restore_volume_backup(backup_id, cinder)
-                backup = cinder.backups.get(backup_id)
-                restored_volumes.append((str(backup.description), str(restored_volume)))
+            if exc_info is not None:
+                for restored_volume in restored_volumes:
+                    if restored_volume is not None:
+                        self._delete_quietly(cinder.volumes, restored_volume[1])
+                six.reraise(*exc_info)
 
             restored_volumes = OrderedDict(sorted(restored_volumes, key=itemgetter(0)))
 
@@ -888,14 +1715,48 @@ class OpenStackBackend(object):
             logger.info('Successfully restored backup for instance %s', instance.uuid)
         return new_vm
 
+    def _backup_volume(self, volume, cinder):
+        """
+        Back up the volume through a temporary snapshot and a temporary volume.
+
+        Temporary objects are deleted even if the backup fails.
+
+        :returns: backup id
+        :rtype: str
+        """
+        snapshot = self.create_snapshot(volume.id, cinder)
+        try:
+            temporary_volume = self.create_temporary_volume(snapshot, cinder)
+            try:
+                backup = self.create_volume_backup(temporary_volume, volume.device, cinder)
+            except Exception:
+                self._cleanup_quietly(self.delete_temporary_volume, temporary_volume, cinder)
+                raise
+            self.delete_temporary_volume(temporary_volume, cinder)
+        except Exception:
+            self._cleanup_quietly(self.delete_temporary_snapshot, snapshot, cinder)
+            raise
+        self.delete_temporary_snapshot(snapshot, cinder)
+
+        return backup
+
+    def _restore_volume(self, backup_id, cinder):
+        """
+        :returns: description of the backup and id of the restored volume
+        :rtype: tuple
+        """
+        restored_volume = self.restore_volume_backup(backup_id, cinder)
+        backup = cinder.backups.get(backup_id)
+        return str(backup.description), str(restored_volume)
+
     def delete_instance_backup(self, instance, instance_backup_ids):
         logger.debug('About to delete instance %s backup', instance.uuid)
 
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
-            cinder = self.create_cinder_client(session)
+            clients = self.get_tenant_clients(membership)
+            cinder = clients.cinder
 
             for backup_id in instance_backup_ids:
                 self.delete_backup(backup_id, cinder)
@@ -911,8 +1772,8 @@ class OpenStackBackend(object):
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
-            nova = self.create_nova_client(session)
+            clients = self.get_tenant_clients(membership)
+            nova = clients.nova
 
             server_id = instance.backend_id
 
@@ -953,15 +1814,30 @@ class OpenStackBackend(object):
             six.reraise(CloudBackendError, e)
 
     def extend_disk(self, instance):
+        if not self.request_disk_extension(instance):
+            return
+
+        if not self._wait_for_completion(lambda: self.check_disk_extension(instance)):
+            logger.error('Failed to extend volume: timed out waiting volume %s of instance %s to extend',
+                         instance.data_volume_id, instance.uuid)
+            raise CloudBackendError('Timed out waiting volume %s to extend' % instance.data_volume_id)
+
+    def request_disk_extension(self, instance):
+        """
+        Detach data volume of the instance in order to extend it.
+
+        Use check_disk_extension() to follow the progress.
+
+        :returns: False if the volume is already of desired size, True otherwise
+        :rtype: bool
+        """
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
-
-            nova = self.create_nova_client(session)
-            cinder = self.create_cinder_client(session)
+            clients = self.get_tenant_clients(membership)
 
-            server_id = instance.backend_id
+            nova = clients.nova
+            cinder = clients.cinder
 
             volume = cinder.volumes.get(instance.data_volume_id)
 
@@ -969,89 +1845,128 @@ class OpenStackBackend(object):
             if volume.size == new_size:
                 logger.info('Not extending volume %s: it is already of size %d',
                             volume.id, new_size)
-                return
+                return False
             elif volume.size > new_size:
                 logger.warn('Not extending volume %s: desired size %d is less then current size %d',
                             volume.id, new_size, volume.size)
-                return
+                return False
 
-            nova.volumes.delete_server_volume(server_id, volume.id)
+            nova.volumes.delete_server_volume(instance.backend_id, volume.id)
+        except (nova_exceptions.ClientException, cinder_exceptions.ClientException) as e:
+            logger.exception('Failed to extend disk of an instance %s', instance.uuid)
+            six.reraise(CloudBackendError, e)
 
-            if not self._wait_for_volume_status(volume.id, cinder, 'available', 'error'):
-                logger.error(
-                    'Failed to extend volume: timed out waiting volume %s to detach from instance %s',
-                    volume.id, instance.uuid,
-                )
-                raise CloudBackendError(
-                    'Timed out waiting volume %s to detach from instance %s'
-                    % volume.id, instance.uuid,
-                )
+        return True
 
-            cinder.volumes.extend(volume, new_size)
+    def check_disk_extension(self, instance):
+        """
+        Advance extension of data volume of the instance as far as the backend allows without waiting.
 
-            if not self._wait_for_volume_status(volume.id, cinder, 'available', 'error'):
-                logger.error(
-                    'Failed to extend volume: timed out waiting volume %s to extend',
-                    volume.id,
-                )
-                raise CloudBackendError(
-                    'Timed out waiting volume %s to extend'
-                    % volume.id,
-                )
+        Extends the volume once it is detached and attaches it back once it is extended.
+
+        :returns: True if the volume is extended and attached back, False otherwise
+        :rtype: bool
+        """
+        try:
+            membership = instance.cloud_project_membership
 
-            nova.volumes.create_server_volume(server_id, volume.id, None)
+            clients = self.get_tenant_clients(membership)
 
-            if not self._wait_for_volume_status(volume.id, cinder, 'in-use', 'error'):
-                logger.error(
-                    'Failed to extend volume: timed out waiting volume %s to attach to instance %s',
-                    volume.id, instance.uuid,
-                )
-                raise CloudBackendError(
-                    'Timed out waiting volume %s to attach to instance %s'
-                    % volume.id, instance.uuid,
-                )
+            nova = clients.nova
+            cinder = clients.cinder
+
+            volume = cinder.volumes.get(instance.data_volume_id)
+            new_size = self.get_backend_disk_size(instance.data_volume_size)
+
+            if volume.status.startswith('error'):
+                logger.error('Failed to extend volume %s of instance %s: volume is in %s status',
+                             volume.id, instance.uuid, volume.status)
+                raise CloudBackendError('Failed to extend volume %s' % volume.id)
+
+            if volume.status == 'available':
+                if volume.size < new_size:
+                    cinder.volumes.extend(volume, new_size)
+                else:
+                    nova.volumes.create_server_volume(instance.backend_id, volume.id, None)
+                return False
+
+            if volume.status == 'in-use' and volume.size >= new_size:
+                logger.info('Successfully extended disk of an instance %s', instance.uuid)
+                return True
+
+            # Volume is being detached, extended or attached
+            return False
         except (nova_exceptions.ClientException, cinder_exceptions.ClientException) as e:
             logger.exception('Failed to extend disk of an instance %s', instance.uuid)
             six.reraise(CloudBackendError, e)
-        else:
-            logger.info('Successfully extended disk of an instance %s', instance.uuid)
 
     def update_flavor(self, instance, flavor):
+        self.request_flavor_update(instance, flavor)
+
+        if not self._wait_for_completion(lambda: self.check_flavor_update(instance, flavor)):
+            logger.error('Failed to change flavor: timed out waiting instance %s to resize', instance.uuid)
+            raise CloudBackendError('Timed out waiting instance %s to resize' % instance.uuid)
+
+    def request_flavor_update(self, instance, flavor):
+        """
+        Request resizing of the instance to the flavor.
+
+        Use check_flavor_update() to follow the progress.
+        """
         try:
             membership = instance.cloud_project_membership
 
-            session = self.create_tenant_session(membership)
+            clients = self.get_tenant_clients(membership)
 
-            nova = self.create_nova_client(session)
-            server_id = instance.backend_id
-            flavor_id = flavor.backend_id
+            nova = clients.nova
+            nova.servers.resize(instance.backend_id, flavor.backend_id, 'MANUAL')
+        except nova_exceptions.ClientException as e:
+            logger.exception('Failed to change flavor of an instance %s', instance.uuid)
+            six.reraise(CloudBackendError, e)
 
-            nova.servers.resize(server_id, flavor_id, 'MANUAL')
+    def check_flavor_update(self, instance, flavor):
+        """
+        Advance resizing of the instance as far as the backend allows without waiting.
 
-            if not self._wait_for_instance_status(server_id, nova, 'VERIFY_RESIZE'):
-                logger.error(
-                    'Failed to change flavor: timed out waiting instance %s to begin resizing',
-                    instance.uuid,
-                )
-                raise CloudBackendError(
-                    'Timed out waiting instance %s to begin resizing' % instance.uuid,
-                )
+        Confirms resizing once the instance is resized.
+
+        :returns: True if the instance is resized and stopped, False otherwise
+        :rtype: bool
+        """
+        try:
+            membership = instance.cloud_project_membership
 
-            nova.servers.confirm_resize(server_id)
+            clients = self.get_tenant_clients(membership)
 
-            if not self._wait_for_instance_status(server_id, nova, 'SHUTOFF'):
-                logger.error(
-                    'Failed to change flavor: timed out waiting instance %s to confirm resizing',
-                    instance.uuid,
-                )
-                raise CloudBackendError(
-                    'Timed out waiting instance %s to confirm resizing' % instance.uuid,
-                )
-        except (nova_exceptions.ClientException, cinder_exceptions.ClientException) as e:
+            nova = clients.nova
+            server = nova.servers.get(instance.backend_id)
+
+            if server.status == 'ERROR':
+                logger.error('Failed to change flavor of an instance %s: instance is erred in backend',
+                             instance.uuid)
+                raise CloudBackendError('Failed to resize instance %s' % instance.uuid)
+
+            if server.status == 'VERIFY_RESIZE':
+                nova.servers.confirm_resize(instance.backend_id)
+                return False
+
+            if server.status == 'SHUTOFF' and server.flavor['id'] == flavor.backend_id:
+                logger.info('Successfully changed flavor of an instance %s', instance.uuid)
+                return True
+
+            # Server is in RESIZE status as soon as resizing is requested,
+            # settling with the old flavor means that backend has reverted it, e.g. no host fits the new one
+            if (server.status in ('ACTIVE', 'SHUTOFF') and server.flavor['id'] != flavor.backend_id and
+                    getattr(server, 'OS-EXT-STS:task_state', None) is None):
+                logger.error('Failed to change flavor of an instance %s: resizing has been reverted in backend',
+                             instance.uuid)
+                raise CloudBackendError('Resizing of instance %s has been reverted' % instance.uuid)
+
+            # Instance is being resized
+            return False
+        except nova_exceptions.ClientException as e:
             logger.exception('Failed to change flavor of an instance %s', instance.uuid)
             six.reraise(CloudBackendError, e)
-        else:
-            logger.info('Successfully changed flavor of an instance %s', instance.uuid)
 
     # Helper methods
     def get_floating_ips(self, tenant_id, neutron):
@@ -1070,31 +1985,23 @@ class OpenStackBackend(object):
     def delete_security_group(self, backend_id, nova):
         nova.security_groups.delete(backend_id)
 
-    def push_security_group_rules(self, security_group, nova):
-        backend_security_group = nova.security_groups.get(group_id=security_group.backend_id)
-        backend_rules = {
-            rule['id']: self._normalize_security_group_rule(rule)
-            for rule in backend_security_group.rules
-        }
+    def push_security_group_rules(self, security_group, nova, backend_rules=None, nc_rules=None):
+        """
+        Make backend rules of the security group match its nodeconductor rules.
 
-        # list of nc rules, that do not exist in openstack
-        nonexistent_rules = []
-        # list of nc rules, that have wrong parameters in in openstack
-        unsynchronized_rules = []
-        # list of os rule ids, that exist in openstack and do not exist in nc
-        extra_rule_ids = backend_rules.keys()
-
-        for nc_rule in security_group.rules.all():
-            if nc_rule.backend_id not in backend_rules:
-                nonexistent_rules.append(nc_rule)
-            else:
-                backend_rule = backend_rules[nc_rule.backend_id]
-                if not self._are_rules_equal(backend_rule, nc_rule):
-                    unsynchronized_rules.append(nc_rule)
-                extra_rule_ids.remove(nc_rule.backend_id)
+        Backend and nodeconductor rules are fetched unless they are given.
+        Only rules that differ are deleted or created in backend.
+        """
+        if backend_rules is None:
+            backend_rules = nova.security_groups.get(group_id=security_group.backend_id).rules
+        if nc_rules is None:
+            nc_rules = security_group.rules.all()
+
+        _, missing_in_nc, missing_in_backend = self._diff_security_group_rules(backend_rules, nc_rules)
 
         # deleting extra rules
-        for backend_rule_id in extra_rule_ids:
+        for backend_rule in missing_in_nc:
+            backend_rule_id = backend_rule['id']
             logger.debug('About to delete security group rule with id %s in backend', backend_rule_id)
             try:
                 nova.security_group_rules.delete(backend_rule_id)
@@ -1104,20 +2011,8 @@ class OpenStackBackend(object):
             else:
                 logger.info('Security group rule with id %s successfully deleted in backend', backend_rule_id)
 
-        # deleting unsynchronized rules
-        for nc_rule in unsynchronized_rules:
-            logger.debug('About to delete security group rule with id %s', nc_rule.backend_id)
-            try:
-                nova.security_group_rules.delete(nc_rule.backend_id)
-            except nova_exceptions.ClientException:
-                logger.exception('Failed to remove rule with id %s from security group %s in backend',
-                                 nc_rule.backend_id, security_group)
-            else:
-                logger.info('Security group rule with id %s successfully deleted in backend',
-                            nc_rule.backend_id)
-
-        # creating nonexistent and unsynchronized rules
-        for nc_rule in unsynchronized_rules + nonexistent_rules:
+        # creating nonexistent rules
+        for nc_rule in missing_in_backend:
             logger.debug('About to create security group rule with id %s in backend', nc_rule.id)
             try:
                 # The database has empty strings instead of nulls
@@ -1126,7 +2021,7 @@ class OpenStackBackend(object):
                 else:
                     nc_rule_protocol = nc_rule.protocol
 
-                nova.security_group_rules.create(
+                backend_rule = nova.security_group_rules.create(
                     parent_group_id=security_group.backend_id,
                     ip_protocol=nc_rule_protocol,
                     from_port=nc_rule.from_port,
@@ -1137,71 +2032,21 @@ class OpenStackBackend(object):
                 logger.exception('Failed to create rule %s for security group %s in backend',
                                  nc_rule, security_group)
             else:
+                models.SecurityGroupRule.objects.filter(pk=nc_rule.pk).update(backend_id=backend_rule.id)
                 logger.info('Security group rule with id %s successfully created in backend', nc_rule.id)
 
-    def pull_security_group_rules(self, security_group, nova):
-        backend_security_group = nova.security_groups.get(group_id=security_group.backend_id)
-        backend_rules = [
-            self._normalize_security_group_rule(r)
-            for r in backend_security_group.rules
-        ]
-
-        # list of openstack rules, that do not exist in nc
-        nonexistent_rules = []
-        # list of openstack rules, that have wrong parameters in in nc
-        unsynchronized_rules = []
-        # list of nc rules, that have do not exist in openstack
-        extra_rules = security_group.rules.exclude(backend_id__in=[r['id'] for r in backend_rules])
-
-        with transaction.atomic():
-            for backend_rule in backend_rules:
-                try:
-                    nc_rule = security_group.rules.get(backend_id=backend_rule['id'])
-                    if not self._are_rules_equal(backend_rule, nc_rule):
-                        unsynchronized_rules.append(backend_rule)
-                except security_group.rules.model.DoesNotExist:
-                    nonexistent_rules.append(backend_rule)
-
-            # deleting extra rules
-            extra_rules.delete()
-            logger.info('Deleted stale security group rules in database')
-
-            # synchronizing unsynchronized rules
-            for backend_rule in unsynchronized_rules:
-                security_group.rules.filter(backend_id=backend_rule['id']).update(
-                    from_port=backend_rule['from_port'],
-                    to_port=backend_rule['to_port'],
-                    protocol=backend_rule['ip_protocol'],
-                    cidr=backend_rule['ip_range']['cidr'],
-                )
-            logger.info('Updated existing security group rules in database')
-
-            # creating non-existed rules
-            for backend_rule in nonexistent_rules:
-                rule = security_group.rules.create(
-                    from_port=backend_rule['from_port'],
-                    to_port=backend_rule['to_port'],
-                    protocol=backend_rule['ip_protocol'],
-                    cidr=backend_rule['ip_range']['cidr'],
-                    backend_id=backend_rule['id'],
-                )
-                logger.info('Created new security group rule %s in database', rule.id)
-
     def create_admin_session(self, keystone_url):
         nc_settings = getattr(settings, 'NODECONDUCTOR', {})
         openstacks = nc_settings.get('OPENSTACK_CREDENTIALS', ())
 
         try:
             credentials = next(o for o in openstacks if o['auth_url'] == keystone_url)
-            auth_plugin = v2.Password(**credentials)
-            session = keystone_session.Session(auth=auth_plugin)
-            # This will eagerly sign in throwing AuthorizationFailure on bad credentials
-            session.get_token()
-            return session
         except StopIteration as e:
             logger.exception('Failed to find OpenStack credentials for Keystone URL %s', keystone_url)
             six.reraise(CloudBackendError, e)
 
+        return self._create_session(credentials, tenant=credentials.get('tenant_name'))
+
     def create_tenant_session(self, membership):
         credentials = {
             'auth_url': membership.cloud.auth_url,
@@ -1210,12 +2055,7 @@ class OpenStackBackend(object):
             'tenant_id': membership.tenant_id,
         }
 
-        auth_plugin = v2.Password(**credentials)
-        session = keystone_session.Session(auth=auth_plugin)
-
-        # This will eagerly sign in throwing AuthorizationFailure on bad credentials
-        session.get_token()
-        return session
+        return self._create_session(credentials, tenant=membership.tenant_id)
 
     def create_user_session(self, membership):
         credentials = {
@@ -1225,13 +2065,63 @@ class OpenStackBackend(object):
             # Tenant is not set here since we don't want to check for tenant membership here
         }
 
+        # User session is used to verify stored credentials,
+        # hence it must always sign in rather than reuse a cached token
         auth_plugin = v2.Password(**credentials)
         session = keystone_session.Session(auth=auth_plugin)
 
         # This will eagerly sign in throwing AuthorizationFailure on bad credentials
-        session.get_token()
+        tracing.trace_call('keystone', 'get_token', session.get_token, cloud=credentials['auth_url'])
+        return session
+
+    def _create_session(self, credentials, tenant):
+        """
+        Create keystone session reusing a token shared through Django cache.
+
+        Tokens are keyed by (auth_url, username, tenant) and are refreshed
+        shortly before they expire. Cached token is dropped whenever
+        signing in fails with AuthorizationFailure.
+        """
+        auth_plugin = v2.Password(**credentials)
+        session = keystone_session.Session(auth=auth_plugin)
+
+        refresh_margin = _get_token_refresh_margin()
+        cache_key = _get_token_cache_key(credentials['auth_url'], credentials['username'], tenant)
+
+        cached_access = cache.get(cache_key)
+        if cached_access is not None:
+            auth_ref = access.AccessInfo.factory(body={'access': cached_access})
+            if not auth_ref.will_expire_soon(stale_duration=refresh_margin):
+                logger.debug('Reusing cached token for user %s at %s',
+                             credentials['username'], credentials['auth_url'])
+                auth_plugin.auth_ref = auth_ref
+                return session
+
+        try:
+            # This will eagerly sign in throwing AuthorizationFailure on bad credentials
+            tracing.trace_call('keystone', 'get_token', session.get_token,
+                               cloud=credentials['auth_url'], tenant=tenant)
+        except keystone_exceptions.AuthorizationFailure:
+            self.invalidate_session_token(credentials['auth_url'], credentials['username'], tenant)
+            raise
+
+        auth_ref = auth_plugin.auth_ref
+        try:
+            timeout = int((auth_ref.expires - timezone.now()).total_seconds()) - refresh_margin
+        except (AttributeError, TypeError, ValueError):
+            # Token without expiration info, do not cache it
+            timeout = 0
+
+        if timeout > 0:
+            # AccessInfo is a plain dict of token data, safe to be pickled by any cache backend
+            cache.set(cache_key, dict(auth_ref), timeout)
+
         return session
 
+    def invalidate_session_token(self, auth_url, username, tenant):
+        logger.info('Dropping cached token for user %s at %s', username, auth_url)
+        cache.delete(_get_token_cache_key(auth_url, username, tenant))
+
     # TODO: Remove it, reimplement url validation in some other way
     def get_credentials(self, keystone_url):
         nc_settings = getattr(settings, 'NODECONDUCTOR', {})
@@ -1278,11 +2168,13 @@ class OpenStackBackend(object):
     def create_glance_client(self, session):
         auth_plugin = session.auth
 
-        catalog = ServiceCatalog.factory(auth_plugin.get_auth_ref(session))
+        # Getting a token populates auth_ref, no need to sign in once again
+        token = session.get_token()
+        catalog = ServiceCatalog.factory(auth_plugin.auth_ref)
         endpoint = catalog.url_for(service_type='image')
 
         kwargs = {
-            'token': session.get_token(),
+            'token': token,
             'insecure': False,
             'timeout': 600,
             'ssl_compression': True,
@@ -1407,9 +2299,10 @@ class OpenStackBackend(object):
         network_name = self.get_tenant_name(membership)
 
         logger.info('Creating network %s', network_name)
-        if neutron.list_networks(name=network_name)['networks']:
+        matching_networks = neutron.list_networks(name=network_name)['networks']
+        if matching_networks:
             logger.info('Network %s already exists, using it instead', network_name)
-            return
+            return matching_networks[0]['id']
 
         network = {
             'name': network_name,
@@ -1438,9 +2331,46 @@ class OpenStackBackend(object):
         }
         neutron.create_subnet({'subnets': [subnet]})
 
+        return network_id
+
     def get_hypervisors_statistics(self, nova):
         return nova.hypervisors.statistics()._info
 
+    def _diff_keypairs(self, backend_keypairs, public_keys, prune=False):
+        """
+        Compare openstack keypairs with ssh public keys by names and fingerprints.
+
+        :param backend_keypairs: map of key names to openstack keypairs
+        :param public_keys: map of key names to ssh public keys
+        :returns: set of names of keypairs to delete and set of names of keypairs to create
+        :rtype: tuple
+        """
+        stale_key_names = set()
+        missing_key_names = set()
+
+        for key_name, public_key in public_keys.items():
+            try:
+                backend_keypair = backend_keypairs[key_name]
+            except KeyError:
+                missing_key_names.add(key_name)
+                continue
+
+            # There's no way to edit existing key inplace, hence it's recreated
+            if backend_keypair.fingerprint != public_key.fingerprint:
+                stale_key_names.add(key_name)
+                missing_key_names.add(key_name)
+
+        if prune:
+            stale_key_names.update(
+                key_name for key_name in backend_keypairs
+                if key_name not in public_keys and self._is_nodeconductor_key_name(key_name)
+            )
+
+        return stale_key_names, missing_key_names
+
+    def _is_nodeconductor_key_name(self, key_name):
+        return re.match(r'^[0-9a-f]{32}-', key_name) is not None
+
     def get_key_name(self, public_key):
         # We want names to be human readable in backend.
         # OpenStack only allows latin letters, digits, dashes, underscores and spaces
@@ -1458,42 +2388,164 @@ class OpenStackBackend(object):
 
     def _wait_for_instance_status(self, server_id, nova, complete_status,
                                   error_status=None, retries=20, poll_interval=3):
-        return self._wait_for_object_status(
-            server_id, nova.servers.get, complete_status, error_status, retries, poll_interval)
+        return self._wait_for_objects_status(
+            [(nova.servers, server_id, complete_status, error_status)], retries, poll_interval)
 
     def _wait_for_volume_status(self, volume_id, cinder, complete_status,
                                 error_status=None, retries=20, poll_interval=3):
-        return self._wait_for_object_status(
-            volume_id, cinder.volumes.get, complete_status, error_status, retries, poll_interval)
+        return self._wait_for_volumes_status([volume_id], cinder, complete_status, error_status, retries, poll_interval)
+
+    def _wait_for_volumes_status(self, volume_ids, cinder, complete_status,
+                                 error_status=None, retries=20, poll_interval=3):
+        return self._wait_for_objects_status(
+            [(cinder.volumes, volume_id, complete_status, error_status) for volume_id in volume_ids],
+            retries, poll_interval)
 
     def _wait_for_snapshot_status(self, snapshot_id, cinder, complete_status, error_status, retries=20, poll_interval=3):
-        return self._wait_for_object_status(
-            snapshot_id, cinder.volume_snapshots.get, complete_status, error_status, retries, poll_interval)
+        return self._wait_for_objects_status(
+            [(cinder.volume_snapshots, snapshot_id, complete_status, error_status)], retries, poll_interval)
 
     def _wait_for_backup_status(self, backup, cinder, complete_status, error_status, retries=20, poll_interval=3):
-        return self._wait_for_object_status(
-            backup, cinder.backups.get, complete_status, error_status, retries, poll_interval)
-
-    def _wait_for_object_status(self, obj_id, client_get_method, complete_status, error_status=None,
-                                retries=20, poll_interval=3):
-        complete_state_predicate = lambda o: o.status == complete_status
-        if error_status is not None:
-            error_state_predicate = lambda o: o.status == error_status
-        else:
-            error_state_predicate = lambda _: False
+        return self._wait_for_objects_status(
+            [(cinder.backups, backup, complete_status, error_status)], retries, poll_interval)
+
+    def _wait_for_objects_status(self, waits, retries=20, poll_interval=3, max_poll_interval=None):
+        """
+        Wait for several objects to reach their complete statuses at once.
+
+        Objects of the same manager are polled with a single list call per poll,
+        poll interval grows exponentially with random jitter. The overall waiting time
+        is limited by retries * poll_interval, the same as for a single object.
+        Poll interval grows up to max_poll_interval, four initial intervals by default.
+
+        :param waits: (manager, object id, complete status, error status) tuples
+        :type waits: list
+        :returns: True if all the objects have reached their complete statuses,
+                  False if any of them has reached its error status or waiting has timed out
+        :rtype: bool
+        """
+        pending = list(waits)
+        deadline = time.time() + retries * poll_interval
+        if max_poll_interval is None:
+            max_poll_interval = poll_interval * 4
+        delay = poll_interval
 
-        for _ in range(retries):
-            obj = client_get_method(obj_id)
+        while True:
+            statuses = self._get_objects_statuses(pending)
 
-            if complete_state_predicate(obj):
+            still_pending = []
+            for manager, obj_id, complete_status, error_status in pending:
+                status = statuses[manager, obj_id]
+
+                if error_status is not None and status == error_status:
+                    logger.debug('Object %s has reached error status %s', obj_id, status)
+                    return False
+
+                if status != complete_status:
+                    still_pending.append((manager, obj_id, complete_status, error_status))
+
+            pending = still_pending
+            if not pending:
                 return True
 
-            if error_state_predicate(obj):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+
+            # Equal jitter keeps concurrent waiters from polling in lockstep
+            time.sleep(min(remaining, delay / 2.0 + random.uniform(0, delay / 2.0)))
+            delay = min(delay * 2, max_poll_interval)
+
+    def _wait_for_completion(self, check_completion, retries=20, poll_interval=3, max_poll_interval=None):
+        """
+        Call check_completion until it reports completion or waiting times out.
+
+        Uses the same poll interval growth and time limit as _wait_for_objects_status().
+
+        :returns: True if check_completion has returned True, False if waiting has timed out
+        :rtype: bool
+        """
+        deadline = time.time() + retries * poll_interval
+        if max_poll_interval is None:
+            max_poll_interval = poll_interval * 4
+        delay = poll_interval
+
+        while not check_completion():
+            remaining = deadline - time.time()
+            if remaining <= 0:
                 return False
 
-            time.sleep(poll_interval)
+            time.sleep(min(remaining, delay / 2.0 + random.uniform(0, delay / 2.0)))
+            delay = min(delay * 2, max_poll_interval)
+
+        return True
+
+    def _map_concurrently(self, func, items):
+        """
+        Call func for every item in a separate thread and wait for all the calls to finish.
+
+        :returns: results of the calls in order of the items, None for failed calls,
+                  and exc_info of the first failed call or None if all the calls succeeded
+        :rtype: tuple
+        """
+        items = list(items)
+        if not items:
+            return [], None
+
+        def call(item):
+            # noinspection PyBroadException
+            try:
+                return func(item), None
+            except Exception:
+                return None, sys.exc_info()
+
+        pool = ThreadPool(len(items))
+        try:
+            outcomes = pool.map(call, items)
+        finally:
+            pool.close()
+            pool.join()
+
+        failures = [exc_info for _, exc_info in outcomes if exc_info is not None]
+        return [result for result, _ in outcomes], failures[0] if failures else None
+
+    def _cleanup_quietly(self, delete_method, obj_id, cinder):
+        try:
+            delete_method(obj_id, cinder)
+        except (cinder_exceptions.ClientException, CloudBackendInternalError):
+            logger.exception('Failed to clean up temporary object %s', obj_id)
+
+    def _delete_quietly(self, manager, obj_id):
+        try:
+            manager.delete(obj_id)
+        except (cinder_exceptions.ClientException, nova_exceptions.ClientException):
+            logger.exception('Failed to delete object %s', obj_id)
         else:
-            return False
+            logger.info('Deleted object %s', obj_id)
+
+    def _get_objects_statuses(self, waits):
+        """
+        Map (manager, object id) pairs to current statuses of the objects.
+        """
+        obj_ids_by_manager = OrderedDict()
+        for manager, obj_id, _, _ in waits:
+            obj_ids_by_manager.setdefault(manager, []).append(obj_id)
+
+        statuses = {}
+        for manager, obj_ids in obj_ids_by_manager.items():
+            # Listing is cheaper than fetching several objects one by one
+            if len(obj_ids) > 1:
+                listed_statuses = dict((o.id, o.status) for o in manager.list())
+            else:
+                listed_statuses = {}
+
+            for obj_id in obj_ids:
+                try:
+                    statuses[manager, obj_id] = listed_statuses[obj_id]
+                except KeyError:
+                    statuses[manager, obj_id] = manager.get(obj_id).status
+
+        return statuses
 
     def push_floating_ip_to_instance(self, server, instance, nova):
         if instance.external_ips is None or instance.internal_ips is None:
@@ -1552,6 +2604,8 @@ class OpenStackBackend(object):
 
         if not self._wait_for_snapshot_status(snapshot.id, cinder, 'available', 'error'):
             logger.error('Timed out creating snapshot for volume %s', volume_id)
+            # Do not leave broken snapshot behind, unless backend refuses to delete it
+            self._delete_quietly(cinder.volume_snapshots, snapshot.id)
             raise CloudBackendInternalError()
 
         logger.info('Successfully created snapshot %s for volume %s', snapshot.id, volume_id)
@@ -1594,6 +2648,8 @@ class OpenStackBackend(object):
 
         if not self._wait_for_volume_status(temporary_volume_id, cinder, 'available', 'error'):
             logger.error('Timed out creating temporary volume from snapshot %s', snapshot_id)
+            # Do not leave broken volume behind, unless backend refuses to delete it
+            self._delete_quietly(cinder.volumes, temporary_volume_id)
             raise CloudBackendInternalError()
 
         logger.info('Successfully created temporary volume %s from snapshot %s',
@@ -1726,89 +2782,235 @@ class OpenStackBackend(object):
 
         return new_server.id
 
-    def _are_rules_equal(self, backend_rule, nc_rule):
+    def _get_membership_security_groups(self, membership):
         """
-        Check equality of significant parameters in openstack and nodeconductor rules
+        Fetch security groups of the membership along with their rules in two queries.
+
+        :returns: list of security groups and a map of security group ids to lists of their rules
+        :rtype: tuple
         """
-        if backend_rule['from_port'] != nc_rule.from_port:
-            return False
-        if backend_rule['to_port'] != nc_rule.to_port:
-            return False
-        if backend_rule['ip_protocol'] != nc_rule.protocol:
-            return False
-        if backend_rule['ip_range']['cidr'] != nc_rule.cidr:
-            return False
-        return True
+        nc_security_groups = list(models.SecurityGroup.objects.filter(cloud_project_membership=membership))
 
-    def _are_security_groups_equal(self, backend_security_group, nc_security_group):
-        if backend_security_group.name != nc_security_group.name:
-            return False
-        if len(backend_security_group.rules) != nc_security_group.rules.count():
-            return False
-        for backend_rule, nc_rule in zip(backend_security_group.rules, nc_security_group.rules.all()):
-            if not self._are_rules_equal(backend_rule, nc_rule):
-                return False
-        return True
+        nc_rules_by_group = defaultdict(list)
+        for nc_rule in models.SecurityGroupRule.objects.filter(group__cloud_project_membership=membership):
+            nc_rules_by_group[nc_rule.group_id].append(nc_rule)
 
-    def _get_instance_volumes(self, nova, cinder, backend_instance_id):
-        try:
-            attached_volume_ids = [
-                v.volumeId
-                for v in nova.volumes.get_server_volumes(backend_instance_id)
-            ]
+        return nc_security_groups, nc_rules_by_group
+
+    def _get_backend_rule_fingerprint(self, backend_rule):
+        backend_rule = self._normalize_security_group_rule(backend_rule)
+        return (
+            backend_rule['ip_protocol'],
+            backend_rule['from_port'],
+            backend_rule['to_port'],
+            backend_rule['ip_range']['cidr'],
+        )
+
+    def _get_nc_rule_fingerprint(self, nc_rule):
+        return nc_rule.protocol, nc_rule.from_port, nc_rule.to_port, nc_rule.cidr
+
+    def _diff_security_group_rules(self, backend_rules, nc_rules):
+        """
+        Match openstack and nodeconductor rules by significant parameters regardless of their order.
+
+        :returns: list of matching (openstack rule, nc rule) pairs,
+                  list of openstack rules, that do not exist in nc,
+                  list of nc rules, that do not exist in openstack
+        :rtype: tuple
+        """
+        nc_rules_by_fingerprint = defaultdict(list)
+        for nc_rule in nc_rules:
+            nc_rules_by_fingerprint[self._get_nc_rule_fingerprint(nc_rule)].append(nc_rule)
+
+        matching = []
+        missing_in_nc = []
+        for backend_rule in backend_rules:
+            candidates = nc_rules_by_fingerprint[self._get_backend_rule_fingerprint(backend_rule)]
+            if not candidates:
+                missing_in_nc.append(backend_rule)
+                continue
+
+            # Prefer the rule that is already linked to the openstack one
+            nc_rule = next((r for r in candidates if r.backend_id == str(backend_rule['id'])), candidates[0])
+            candidates.remove(nc_rule)
+            matching.append((backend_rule, nc_rule))
+
+        missing_in_backend = [nc_rule for candidates in nc_rules_by_fingerprint.values() for nc_rule in candidates]
+
+        return matching, missing_in_nc, missing_in_backend
+
+    def _get_volumes_by_instance(self, cinder):
+        """
+        Map backend instance ids to lists of volumes attached to them
+        """
+        return _group_volumes_by_instance(cinder.volumes.list(detailed=True))
+
+    def _get_deleted_server_ids(self, nova, server_ids):
+        """
+        Return ids of the servers that are not found in backend.
+        """
+        deleted_ids = set()
+        for server_id in server_ids:
+            try:
+                nova.servers.get(server_id)
+            except nova_exceptions.NotFound:
+                deleted_ids.add(server_id)
+        return deleted_ids
+
+    def _get_changed_instances(self, nova, changes_since):
+        """
+        Split servers changed since the given moment into alive and deleted ones.
+
+        Returns a list of alive servers booted from volumes and a set of ids of deleted servers.
+        """
+        search_opts = {'changes-since': changes_since.isoformat()}
+
+        backend_instances = []
+        deleted_ids = set()
+        for server in nova.servers.list(search_opts=search_opts):
+            if server.status in ('DELETED', 'SOFT_DELETED'):
+                deleted_ids.add(server.id)
+            # Exclude instances that are booted from images
+            elif server.image == '':
+                backend_instances.append(server)
 
-            if len(attached_volume_ids) != 2:
-                logger.info('Skipping instance %s, only instances with 2 volumes are supported, found %d',
-                            backend_instance_id, len(attached_volume_ids))
-                raise LookupError
+        return backend_instances, deleted_ids
 
-            attached_volumes = [
-                cinder.volumes.get(volume_id)
-                for volume_id in attached_volume_ids
-            ]
+    def _get_templates_by_image(self, membership):
+        """
+        Map backend image ids to lists of templates within membership's cloud
+        """
+        templates_by_image = defaultdict(list)
+        images = models.Image.objects.filter(cloud=membership.cloud).select_related('template')
+        for image in images:
+            templates_by_image[image.backend_id].append(image.template)
+        return templates_by_image
+
+    def _get_instance_volumes(self, volumes_by_instance, backend_instance_id):
+        attached_volumes = volumes_by_instance.get(backend_instance_id, [])
+
+        if len(attached_volumes) != 2:
+            logger.info('Skipping instance %s, only instances with 2 volumes are supported, found %d',
+                        backend_instance_id, len(attached_volumes))
+            raise LookupError
 
+        try:
             # Blessed be OpenStack developers for returning booleans as strings
             system_volume = next(v for v in attached_volumes if v.bootable == 'true')
             data_volume = next(v for v in attached_volumes if v.bootable == 'false')
-        except (cinder_exceptions.ClientException, StopIteration) as e:
+        except StopIteration as e:
             logger.info('Skipping instance %s, failed to fetch volumes', backend_instance_id)
             six.reraise(LookupError, e)
         else:
             return system_volume, data_volume
 
-    def _get_instance_template(self, system_volume, membership, backend_instance_id):
+    def _get_instance_template(self, system_volume, templates_by_image, backend_instance_id):
         try:
             image_id = system_volume.volume_image_metadata['image_id']
-
-            return models.Template.objects.get(
-                images__backend_id=image_id,
-                images__cloud__cloudprojectmembership=membership,
-            )
+            templates = templates_by_image[image_id]
         except (KeyError, AttributeError):
             logger.info('Skipping instance %s, failed to infer template',
                         backend_instance_id)
             raise LookupError
-        except (models.Template.DoesNotExist, models.Template.MultipleObjectsReturned):
+
+        if len(templates) != 1:
             logger.info('Skipping instance %s, failed to infer template',
                         backend_instance_id)
             raise LookupError
 
-    def _get_flavor_info(self, nova, backend_instance):
+        return templates[0]
+
+    def _get_flavor_info(self, nova, flavors, backend_instance):
         try:
             flavor_id = backend_instance.flavor['id']
-            flavor = nova.flavors.get(flavor_id)
         except (KeyError, AttributeError):
             logger.info('Skipping instance %s, failed to infer flavor info',
                         backend_instance.id)
             raise LookupError
-        except nova_exceptions.ClientException as e:
-            logger.info('Skipping instance %s, failed to infer flavor info',
-                        backend_instance.id)
-            six.reraise(LookupError, e)
+
+        try:
+            flavor = flavors[flavor_id]
+        except KeyError:
+            # Private flavors are not listed, look them up one by one
+            try:
+                flavor = flavors[flavor_id] = nova.flavors.get(flavor_id)
+            except nova_exceptions.ClientException as e:
+                logger.info('Skipping instance %s, failed to infer flavor info',
+                            backend_instance.id)
+                six.reraise(LookupError, e)
+
+        cores = flavor.vcpus
+        ram = self.get_core_ram_size(flavor.ram)
+        return cores, ram
+
+    def _get_instance_changes(self, nc_instance, backend_instance, volumes_by_instance, flavors, nova):
+        """
+        Return values of instance fields that differ from the backend ones
+        """
+        backend_values = {}
+
+        state = self._get_instance_state(backend_instance)
+        # Transitional backend states are left to the tasks that handle them
+        if state in models.Instance.States.STABLE_STATES:
+            backend_values['state'] = state
+
+        try:
+            backend_values['cores'], backend_values['ram'] = self._get_flavor_info(nova, flavors, backend_instance)
+        except LookupError:
+            pass
+
+        try:
+            system_volume, data_volume = self._get_instance_volumes(volumes_by_instance, backend_instance.id)
+        except LookupError:
+            pass
         else:
-            cores = flavor.vcpus
-            ram = self.get_core_ram_size(flavor.ram)
-            return cores, ram
+            backend_values['system_volume_size'] = self.get_core_disk_size(system_volume.size)
+            backend_values['data_volume_size'] = self.get_core_disk_size(data_volume.size)
+
+        # Missing addresses are not propagated so that addresses
+        # that are not yet assigned in backend are kept intact
+        for field, address in self._get_instance_ips(backend_instance).items():
+            if address is not None:
+                backend_values[field] = address
+
+        # Start time is set when instance gets started and is cleared when it gets stopped,
+        # so it is only filled in for online instances that miss it
+        online = backend_values.get('state', nc_instance.state) == models.Instance.States.ONLINE
+        if not online:
+            backend_values['start_time'] = None
+        elif nc_instance.start_time is None:
+            backend_values['start_time'] = self._get_instance_start_time(backend_instance)
+
+        return dict(
+            (field, value)
+            for field, value in backend_values.items()
+            if getattr(nc_instance, field) != value
+        )
+
+    def _get_instance_ips(self, backend_instance):
+        ips = {
+            'internal_ips': None,
+            'external_ips': None,
+        }
+
+        try:
+            addresses = [a for network in backend_instance.addresses.values() for a in network]
+        except AttributeError:
+            return ips
+
+        for address in addresses:
+            if address.get('version', 4) != 4:
+                continue
+
+            if address.get('OS-EXT-IPS:type', 'fixed') == 'floating':
+                field = 'external_ips'
+            else:
+                field = 'internal_ips'
+
+            if ips[field] is None:
+                ips[field] = address.get('addr')
+
+        return ips
 
     def _normalize_security_group_rule(self, rule):
         if rule['ip_protocol'] is None:
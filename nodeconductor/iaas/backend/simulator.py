@@ -0,0 +1,1191 @@
+"""
+In-memory simulation of an OpenStack deployment.
+
+The simulator replaces OpenStack API clients used by OpenStackBackend with
+clients talking to a deployment kept in memory of the current process,
+so that synchronization, provisioning and backups can be exercised at scale
+without a real cloud.
+
+A deployment is simulated if its entry in OPENSTACK_CREDENTIALS has
+a ``simulation`` dictionary, see ``DEFAULT_OPTIONS`` for available options.
+"""
+from __future__ import unicode_literals
+
+import base64
+from collections import defaultdict
+import copy
+import functools
+import hashlib
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+import uuid
+
+from cinderclient import exceptions as cinder_exceptions
+from django.utils import dateparse
+from django.utils import six
+from django.utils import timezone
+from glanceclient import exc as glance_exceptions
+from keystoneclient import exceptions as keystone_exceptions
+from neutronclient.client import exceptions as neutron_exceptions
+from novaclient import exceptions as nova_exceptions
+
+from nodeconductor.iaas.backend.openstack import OpenStackBackend
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_OPTIONS = {
+    # Seconds every API call takes, either a number or a (min, max) pair
+    'latency': 0,
+    # Probability of an API call to fail with HTTP 500
+    'error_rate': 0,
+    # Seconds transitional statuses last, either a number or a dictionary
+    # with keys 'build', 'power', 'resize', 'delete', 'volume', 'snapshot' and 'backup'
+    'transition_time': 0,
+    # Servers booted from volumes created along with every new tenant
+    'servers_per_tenant': 0,
+    # Floating IPs allocated to every new tenant
+    'floating_ips_per_tenant': 0,
+    'quotas': {
+        'cores': 20,
+        'instances': 10,
+        'ram': 51200,
+        'gigabytes': 1000,
+    },
+    'flavors': (
+        {'id': '1', 'name': 'm1.tiny', 'vcpus': 1, 'ram': 512, 'disk': 1},
+        {'id': '2', 'name': 'm1.small', 'vcpus': 1, 'ram': 2048, 'disk': 20},
+        {'id': '3', 'name': 'm1.medium', 'vcpus': 2, 'ram': 4096, 'disk': 40},
+        {'id': '4', 'name': 'm1.large', 'vcpus': 4, 'ram': 8192, 'disk': 80},
+        {'id': '5', 'name': 'm1.xlarge', 'vcpus': 8, 'ram': 16384, 'disk': 160},
+    ),
+    'images': (
+        {'id': 'd15dc2c4-25d6-4150-93fe-a412499298d8', 'name': 'centos-7'},
+        {'id': '2ba8b2c6-1c12-4ac1-9e4b-a0bfc8ff7a95', 'name': 'ubuntu-14.04'},
+    ),
+}
+
+_simulated_clouds = {}
+_simulated_clouds_lock = threading.Lock()
+
+
+def get_simulated_cloud(auth_url, options=None):
+    """
+    Return simulated deployment identified by auth_url, creating it on first access.
+    """
+    with _simulated_clouds_lock:
+        try:
+            return _simulated_clouds[auth_url]
+        except KeyError:
+            logger.info('Simulating OpenStack deployment %s', auth_url)
+            cloud = _simulated_clouds[auth_url] = SimulatedCloud(options)
+            return cloud
+
+
+def reset_simulated_clouds():
+    with _simulated_clouds_lock:
+        _simulated_clouds.clear()
+
+
+def _get_id(obj):
+    return getattr(obj, 'id', obj)
+
+
+def _get_fingerprint(public_key):
+    key_body = base64.b64decode(public_key.strip().split()[1].encode('ascii'))
+    fp_plain = hashlib.md5(key_body).hexdigest()
+    return ':'.join(a + b for a, b in zip(fp_plain[::2], fp_plain[1::2]))
+
+
+def _matches(info, filters):
+    return all(info.get(key) == value for key, value in filters.items())
+
+
+def _paginate(infos, marker=None, limit=None, offset=0):
+    infos = sorted(infos, key=lambda info: info['id'])
+    if marker is not None:
+        ids = [info['id'] for info in infos]
+        if marker not in ids:
+            return None
+        offset = ids.index(marker) + 1
+    return infos[offset:offset + limit] if limit else infos[offset:]
+
+
+class SimulatedResource(object):
+    """
+    Snapshot of a simulated object, mimics resources returned by OpenStack clients.
+    """
+    def __init__(self, manager, info):
+        self.manager = manager
+        self._info = info
+        for key, value in info.items():
+            setattr(self, key, value)
+
+    def to_dict(self):
+        return copy.deepcopy(self._info)
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self._info.get('id'))
+
+
+class SimulatedServer(SimulatedResource):
+    def add_floating_ip(self, address, fixed_address=None):
+        self.manager.add_floating_ip(self, address, fixed_address)
+
+
+class SimulatedCloud(object):
+    """
+    State of a simulated deployment shared by all the clients connected to it.
+
+    Transitional statuses are advanced lazily on every API call,
+    all the state is guarded by a single lock.
+    """
+    def __init__(self, options=None):
+        self.options = copy.deepcopy(DEFAULT_OPTIONS)
+        self.options.update(options or {})
+
+        self.lock = threading.RLock()
+        self._transitions = []
+        self._sequence = itertools.count()
+        self._addresses = itertools.count(10)
+
+        self.tenants = {}
+        self.users = {}
+        self.roles = {}
+        self.user_roles = set()
+        self.networks = {}
+        self.subnets = {}
+        self.flavors = dict((f['id'], self._new_flavor(f)) for f in self.options['flavors'])
+        self.images = dict((i['id'], self._new_image(i)) for i in self.options['images'])
+        self.servers = {}
+        self.deleted_servers = {}
+        self.server_changes = {}
+        self.volumes = {}
+        self.snapshots = {}
+        self.backups = {}
+        self.keypairs = defaultdict(dict)
+        self.security_groups = {}
+        self.floating_ips = {}
+
+        self.admin_role = self.create_role('admin')
+        self.admin_tenant = self.create_tenant('admin', 'Administrative tenant', populate=False)
+
+    # API call simulation
+    def simulate_call(self, get_failure):
+        latency = self.options['latency']
+        if isinstance(latency, (tuple, list)):
+            latency = random.uniform(*latency)
+        if latency > 0:
+            time.sleep(latency)
+
+        if random.random() < self.options['error_rate']:
+            raise get_failure()
+
+    def schedule(self, kind, callback):
+        """
+        Call callback once the transition of the given kind is over.
+        """
+        transition_time = self.options['transition_time']
+        if isinstance(transition_time, dict):
+            transition_time = transition_time.get(kind, 0)
+
+        if transition_time <= 0:
+            callback()
+        else:
+            heapq.heappush(self._transitions, (time.time() + transition_time, next(self._sequence), callback))
+
+    def advance(self):
+        now = time.time()
+        while self._transitions and self._transitions[0][0] <= now:
+            _, _, callback = heapq.heappop(self._transitions)
+            callback()
+
+    # Factories
+    def new_id(self):
+        return six.text_type(uuid.uuid4())
+
+    def allocate_address(self, prefix):
+        n = next(self._addresses)
+        return '%s.%d.%d.%d' % (prefix, (n >> 16) & 255, (n >> 8) & 255, n & 255)
+
+    def _new_flavor(self, flavor):
+        info = {
+            'id': flavor['id'],
+            'name': flavor['name'],
+            'vcpus': flavor['vcpus'],
+            'ram': flavor['ram'],
+            'disk': flavor['disk'],
+            'is_public': flavor.get('is_public', True),
+        }
+        info['os-flavor-access:is_public'] = info['is_public']
+        return info
+
+    def _new_image(self, image):
+        return {
+            'id': image['id'],
+            'name': image['name'],
+            'is_public': image.get('is_public', True),
+            'deleted': False,
+            'status': 'active',
+        }
+
+    def create_role(self, name):
+        role = {'id': self.new_id(), 'name': name}
+        self.roles[role['id']] = role
+        return role
+
+    def create_tenant(self, name, description, populate=True):
+        tenant = {'id': self.new_id(), 'name': name, 'description': description, 'enabled': True}
+        self.tenants[tenant['id']] = tenant
+
+        self.create_security_group(tenant['id'], 'default', 'Default security group')
+
+        if not populate:
+            return tenant
+
+        for _ in range(self.options['floating_ips_per_tenant']):
+            floating_ip = {
+                'id': self.new_id(),
+                'tenant_id': tenant['id'],
+                'floating_ip_address': self.allocate_address('172'),
+                'fixed_ip_address': None,
+                'port_id': None,
+                'status': 'DOWN',
+            }
+            self.floating_ips[floating_ip['id']] = floating_ip
+
+        for i in range(self.options['servers_per_tenant']):
+            self.create_sample_server(tenant['id'], 'vm-%d' % i)
+
+        return tenant
+
+    def create_security_group(self, tenant_id, name, description):
+        group = {
+            'id': self.new_id(),
+            'tenant_id': tenant_id,
+            'name': name,
+            'description': description,
+            'rules': [],
+        }
+        self.security_groups[group['id']] = group
+        return group
+
+    def create_volume(self, tenant_id, size, name, image_id=None, status='creating'):
+        volume = {
+            'id': self.new_id(),
+            'size': size,
+            'display_name': name,
+            'display_description': '',
+            'status': status,
+            'bootable': 'false',
+            'attachments': [],
+            'os-vol-tenant-attr:tenant_id': tenant_id,
+        }
+        if image_id is not None:
+            volume['bootable'] = 'true'
+            volume['volume_image_metadata'] = {'image_id': image_id, 'image_name': self.images[image_id]['name']}
+        self.volumes[volume['id']] = volume
+        return volume
+
+    def create_server(self, tenant_id, name, flavor_id, volume_ids, key_name=None, security_groups=()):
+        server = {
+            'id': self.new_id(),
+            'tenant_id': tenant_id,
+            'name': name,
+            'status': 'BUILD',
+            'image': '',
+            'flavor': {'id': flavor_id},
+            'key_name': key_name,
+            'addresses': {},
+            'security_groups': list(security_groups),
+            'volume_ids': list(volume_ids),
+            'OS-SRV-USG:launched_at': None,
+        }
+        self.servers[server['id']] = server
+        self.touch_server(server)
+        return server
+
+    def create_sample_server(self, tenant_id, name):
+        image_id = next(iter(sorted(self.images)))
+        flavor = self.flavors[sorted(self.flavors)[0]]
+
+        system_volume = self.create_volume(tenant_id, flavor['disk'], '%s-system' % name, image_id, 'available')
+        data_volume = self.create_volume(tenant_id, flavor['disk'], '%s-data' % name, status='available')
+
+        server = self.create_server(tenant_id, name, flavor['id'], [system_volume['id'], data_volume['id']])
+        self.boot_server(server)
+
+    # Transitions
+    def touch_server(self, server):
+        self.server_changes[server['id']] = timezone.now()
+
+    def boot_server(self, server):
+        volumes = [self.volumes.get(volume_id) for volume_id in server['volume_ids']]
+        if any(volume is None or volume['status'] != 'available' for volume in volumes):
+            server['status'] = 'ERROR'
+            self.touch_server(server)
+            return
+
+        for device, volume in zip(('/dev/vda', '/dev/vdb', '/dev/vdc', '/dev/vdd'), volumes):
+            self.attach_volume(server, volume, device)
+
+        tenant = self.tenants[server['tenant_id']]
+        server['addresses'] = {
+            tenant['name']: [{
+                'addr': self.allocate_address('10'),
+                'version': 4,
+                'OS-EXT-IPS:type': 'fixed',
+            }],
+        }
+        self.start_server(server)
+
+    def start_server(self, server):
+        server['status'] = 'ACTIVE'
+        server['OS-SRV-USG:launched_at'] = timezone.now().replace(tzinfo=None).isoformat()
+        self.touch_server(server)
+
+    def stop_server(self, server):
+        server['status'] = 'SHUTOFF'
+        self.touch_server(server)
+
+    def delete_server(self, server):
+        for volume_id in server['volume_ids']:
+            # Volumes are deleted on termination
+            self.volumes.pop(volume_id, None)
+
+        del self.servers[server['id']]
+        server['status'] = 'DELETED'
+        self.deleted_servers[server['id']] = server
+        self.touch_server(server)
+
+    def attach_volume(self, server, volume, device):
+        volume['status'] = 'in-use'
+        volume['attachments'] = [{'server_id': server['id'], 'volume_id': volume['id'], 'device': device}]
+        if volume['id'] not in server['volume_ids']:
+            server['volume_ids'].append(volume['id'])
+
+    def detach_volume(self, server, volume):
+        volume['status'] = 'available'
+        volume['attachments'] = []
+        if volume['id'] in server['volume_ids']:
+            server['volume_ids'].remove(volume['id'])
+
+    def set_status(self, obj, status):
+        obj['status'] = status
+
+
+class SimulatedSession(object):
+    def __init__(self, cloud, user_id, tenant_id, is_admin=False):
+        self.cloud = cloud
+        self.user_id = user_id
+        self.tenant_id = tenant_id
+        self.is_admin = is_admin
+        self.token = uuid.uuid4().hex
+
+    def get_token(self):
+        return self.token
+
+
+def _api_call(method):
+    """
+    Simulate latency and failures of the API call and run it under the cloud lock.
+    """
+    @functools.wraps(method)
+    def wrapped(self, *args, **kwargs):
+        cloud = self.session.cloud
+        cloud.simulate_call(self.get_failure)
+        with cloud.lock:
+            cloud.advance()
+            return method(self, *args, **kwargs)
+    return wrapped
+
+
+class SimulatedManager(object):
+    resource_class = SimulatedResource
+
+    def __init__(self, session):
+        self.session = session
+        self.cloud = session.cloud
+
+    def get_failure(self):
+        raise NotImplementedError()
+
+    def get_not_found(self, obj_id):
+        raise NotImplementedError()
+
+    def wrap(self, info, exclude=()):
+        info = dict((key, copy.deepcopy(value)) for key, value in info.items() if key not in exclude)
+        return self.resource_class(self, info)
+
+    def is_visible(self, info, search_opts=None, tenant_key='tenant_id'):
+        if self.session.is_admin and search_opts and search_opts.get('all_tenants'):
+            return True
+        return info.get(tenant_key) == self.session.tenant_id
+
+    def lookup(self, objects, obj, tenant_key='tenant_id'):
+        obj_id = _get_id(obj)
+        try:
+            info = objects[obj_id]
+        except KeyError:
+            raise self.get_not_found(obj_id)
+
+        if not self.session.is_admin and info.get(tenant_key) != self.session.tenant_id:
+            raise self.get_not_found(obj_id)
+
+        return info
+
+
+# Keystone
+class SimulatedKeystoneManager(SimulatedManager):
+    def get_failure(self):
+        return keystone_exceptions.InternalServerError('Simulated failure')
+
+    def get_not_found(self, obj_id):
+        return keystone_exceptions.NotFound('Could not find %s' % obj_id)
+
+    def _find(self, objects, **kwargs):
+        for info in objects.values():
+            if _matches(info, kwargs):
+                return self.wrap(info, exclude=('password',))
+        raise self.get_not_found(kwargs)
+
+
+class SimulatedTenantManager(SimulatedKeystoneManager):
+    @_api_call
+    def create(self, tenant_name, description=None, enabled=True):
+        if any(t['name'] == tenant_name for t in self.cloud.tenants.values()):
+            raise keystone_exceptions.Conflict('Tenant %s already exists' % tenant_name)
+        return self.wrap(self.cloud.create_tenant(tenant_name, description))
+
+    @_api_call
+    def find(self, **kwargs):
+        return self._find(self.cloud.tenants, **kwargs)
+
+    @_api_call
+    def list(self):
+        return [self.wrap(t) for t in self.cloud.tenants.values()]
+
+
+class SimulatedUserManager(SimulatedKeystoneManager):
+    @_api_call
+    def create(self, name, password=None, email=None, tenant_id=None, enabled=True):
+        if any(u['name'] == name for u in self.cloud.users.values()):
+            raise keystone_exceptions.Conflict('User %s already exists' % name)
+
+        user = {'id': self.cloud.new_id(), 'name': name, 'password': password, 'enabled': enabled}
+        self.cloud.users[user['id']] = user
+        return self.wrap(user, exclude=('password',))
+
+    @_api_call
+    def find(self, **kwargs):
+        return self._find(self.cloud.users, **kwargs)
+
+
+class SimulatedRoleManager(SimulatedKeystoneManager):
+    @_api_call
+    def find(self, **kwargs):
+        return self._find(self.cloud.roles, **kwargs)
+
+    @_api_call
+    def add_user_role(self, user, role, tenant=None):
+        user_role = (_get_id(user), _get_id(role), _get_id(tenant))
+        if user_role in self.cloud.user_roles:
+            raise keystone_exceptions.Conflict('User already has role in tenant')
+        self.cloud.user_roles.add(user_role)
+
+
+class SimulatedKeystoneClient(object):
+    def __init__(self, session):
+        self.tenants = SimulatedTenantManager(session)
+        self.users = SimulatedUserManager(session)
+        self.roles = SimulatedRoleManager(session)
+
+
+# Neutron
+class SimulatedNeutronClient(SimulatedManager):
+    def get_failure(self):
+        return neutron_exceptions.NeutronClientException(message='Simulated failure', status_code=500)
+
+    def _list(self, objects, filters):
+        return [
+            copy.deepcopy(info) for info in objects.values()
+            if (self.session.is_admin or info['tenant_id'] == self.session.tenant_id) and _matches(info, filters)
+        ]
+
+    def _create(self, objects, body, singular, plural, defaults):
+        items = body[plural] if plural in body else [body[singular]]
+
+        created = []
+        for item in items:
+            info = dict(defaults, id=self.cloud.new_id(), tenant_id=self.session.tenant_id)
+            info.update(item)
+            objects[info['id']] = info
+            created.append(copy.deepcopy(info))
+
+        return {plural: created} if plural in body else {singular: created[0]}
+
+    @_api_call
+    def list_networks(self, **filters):
+        return {'networks': self._list(self.cloud.networks, filters)}
+
+    @_api_call
+    def create_network(self, body):
+        return self._create(self.cloud.networks, body, 'network', 'networks', {'status': 'ACTIVE', 'subnets': []})
+
+    @_api_call
+    def create_subnet(self, body):
+        return self._create(self.cloud.subnets, body, 'subnet', 'subnets', {'ip_version': 4})
+
+    @_api_call
+    def list_floatingips(self, **filters):
+        return {'floatingips': self._list(self.cloud.floating_ips, filters)}
+
+
+# Nova
+class SimulatedNovaManager(SimulatedManager):
+    def get_failure(self):
+        return nova_exceptions.ClientException(500, 'Simulated failure')
+
+    def get_not_found(self, obj_id):
+        return nova_exceptions.NotFound(404, 'Could not find %s' % obj_id)
+
+
+class SimulatedFlavorManager(SimulatedNovaManager):
+    def _list(self, is_public=True):
+        return [
+            self.wrap(f) for f in self.cloud.flavors.values()
+            if is_public is None or f['is_public'] == is_public
+        ]
+
+    @_api_call
+    def list(self, detailed=True, is_public=True):
+        return self._list(is_public)
+
+    @_api_call
+    def findall(self, **kwargs):
+        is_public = kwargs.pop('is_public', True)
+        return [f for f in self._list(is_public) if _matches(f._info, kwargs)]
+
+    @_api_call
+    def get(self, flavor):
+        try:
+            return self.wrap(self.cloud.flavors[_get_id(flavor)])
+        except KeyError:
+            raise self.get_not_found(_get_id(flavor))
+
+
+class SimulatedHypervisorManager(SimulatedNovaManager):
+    @_api_call
+    def statistics(self):
+        flavors = [self.cloud.flavors[s['flavor']['id']] for s in self.cloud.servers.values()]
+        vcpus_used = sum(f['vcpus'] for f in flavors)
+        memory_mb_used = sum(f['ram'] for f in flavors)
+        local_gb_used = sum(v['size'] for v in self.cloud.volumes.values())
+
+        return self.wrap({
+            'count': 1,
+            'vcpus': max(vcpus_used, 1024),
+            'vcpus_used': vcpus_used,
+            'memory_mb': max(memory_mb_used, 4 * 1024 * 1024),
+            'memory_mb_used': memory_mb_used,
+            'free_ram_mb': max(memory_mb_used, 4 * 1024 * 1024) - memory_mb_used,
+            'local_gb': max(local_gb_used, 100 * 1024),
+            'local_gb_used': local_gb_used,
+            'free_disk_gb': max(local_gb_used, 100 * 1024) - local_gb_used,
+            'running_vms': len(flavors),
+            'current_workload': 0,
+            'disk_available_least': 0,
+        })
+
+
+class SimulatedKeypairManager(SimulatedNovaManager):
+    @property
+    def keypairs(self):
+        return self.cloud.keypairs[self.session.tenant_id]
+
+    @_api_call
+    def list(self):
+        return [self.wrap(k) for k in self.keypairs.values()]
+
+    @_api_call
+    def findall(self, **kwargs):
+        return [self.wrap(k) for k in self.keypairs.values() if _matches(k, kwargs)]
+
+    @_api_call
+    def create(self, name, public_key=None):
+        if name in self.keypairs:
+            raise nova_exceptions.Conflict(409, 'Key pair %s already exists' % name)
+
+        try:
+            fingerprint = _get_fingerprint(public_key)
+        except (IndexError, TypeError, ValueError):
+            raise nova_exceptions.BadRequest(400, 'Keypair data is invalid')
+
+        keypair = {'id': name, 'name': name, 'public_key': public_key, 'fingerprint': fingerprint}
+        self.keypairs[name] = keypair
+        return self.wrap(keypair)
+
+    @_api_call
+    def delete(self, key):
+        try:
+            del self.keypairs[_get_id(key)]
+        except KeyError:
+            raise self.get_not_found(_get_id(key))
+
+
+class SimulatedQuotaManager(SimulatedNovaManager):
+    @_api_call
+    def get(self, tenant_id):
+        quotas = dict(self.cloud.options['quotas'], id=tenant_id)
+        return self.wrap(quotas)
+
+
+class SimulatedSecurityGroupManager(SimulatedNovaManager):
+    @_api_call
+    def list(self, search_opts=None):
+        return [self.wrap(g) for g in self.cloud.security_groups.values() if self.is_visible(g, search_opts)]
+
+    @_api_call
+    def get(self, group_id):
+        return self.wrap(self.lookup(self.cloud.security_groups, group_id))
+
+    @_api_call
+    def find(self, **kwargs):
+        if 'id' in kwargs:
+            kwargs['id'] = six.text_type(kwargs['id'])
+        for group in self.cloud.security_groups.values():
+            if self.is_visible(group) and _matches(group, kwargs):
+                return self.wrap(group)
+        raise self.get_not_found(kwargs)
+
+    @_api_call
+    def create(self, name, description):
+        if any(g['name'] == name for g in self.cloud.security_groups.values() if self.is_visible(g)):
+            raise nova_exceptions.BadRequest(400, 'Security group %s already exists' % name)
+        return self.wrap(self.cloud.create_security_group(self.session.tenant_id, name, description))
+
+    @_api_call
+    def update(self, group, name, description):
+        group = self.lookup(self.cloud.security_groups, group)
+        group['name'] = name
+        group['description'] = description
+        return self.wrap(group)
+
+    @_api_call
+    def delete(self, group):
+        group = self.lookup(self.cloud.security_groups, six.text_type(_get_id(group)))
+        if group['name'] == 'default':
+            raise nova_exceptions.BadRequest(400, 'Removing default security group not allowed')
+        del self.cloud.security_groups[group['id']]
+
+
+class SimulatedSecurityGroupRuleManager(SimulatedNovaManager):
+    @_api_call
+    def create(self, parent_group_id, ip_protocol=None, from_port=None, to_port=None, cidr=None, group_id=None):
+        group = self.lookup(self.cloud.security_groups, six.text_type(parent_group_id))
+
+        rule = {
+            'id': self.cloud.new_id(),
+            'parent_group_id': group['id'],
+            'ip_protocol': ip_protocol,
+            'from_port': from_port,
+            'to_port': to_port,
+            'ip_range': {'cidr': cidr} if cidr else {},
+            'group': {},
+        }
+        group['rules'].append(rule)
+        return self.wrap(rule)
+
+    @_api_call
+    def delete(self, rule):
+        rule_id = _get_id(rule)
+        for group in self.cloud.security_groups.values():
+            if self.is_visible(group):
+                for rule in group['rules']:
+                    if rule['id'] == rule_id:
+                        group['rules'].remove(rule)
+                        return
+        raise self.get_not_found(rule_id)
+
+
+class SimulatedServerManager(SimulatedNovaManager):
+    resource_class = SimulatedServer
+
+    def wrap(self, info, exclude=('volume_ids',)):
+        return super(SimulatedServerManager, self).wrap(info, exclude)
+
+    def _get_server(self, server):
+        return self.lookup(self.cloud.servers, server)
+
+    def _check_status(self, server, *statuses):
+        if server['status'] not in statuses:
+            raise nova_exceptions.Conflict(
+                409, 'Cannot perform action while server %s is in %s status' % (server['id'], server['status']))
+
+    def _list(self, search_opts=None):
+        search_opts = search_opts or {}
+        servers = list(self.cloud.servers.values())
+
+        if 'changes-since' in search_opts:
+            changes_since = dateparse.parse_datetime(search_opts['changes-since'])
+            if timezone.is_naive(changes_since):
+                changes_since = timezone.make_aware(changes_since, timezone.utc)
+
+            servers.extend(self.cloud.deleted_servers.values())
+            servers = [s for s in servers if self.cloud.server_changes[s['id']] >= changes_since]
+
+        return [self.wrap(s) for s in servers if self.is_visible(s, search_opts)]
+
+    @_api_call
+    def list(self, detailed=True, search_opts=None, marker=None, limit=None):
+        servers = _paginate([s._info for s in self._list(search_opts)], marker, limit)
+        if servers is None:
+            raise nova_exceptions.BadRequest(400, 'Marker %s could not be found' % marker)
+        return [self.wrap(s) for s in servers]
+
+    @_api_call
+    def findall(self, **kwargs):
+        return [s for s in self._list() if _matches(s._info, kwargs)]
+
+    @_api_call
+    def get(self, server):
+        return self.wrap(self._get_server(server))
+
+    @_api_call
+    def create(self, name, image, flavor, block_device_mapping=None, block_device_mapping_v2=None,
+               nics=None, key_name=None, security_groups=None, **kwargs):
+        flavor_id = _get_id(flavor)
+        if flavor_id not in self.cloud.flavors:
+            raise nova_exceptions.BadRequest(400, 'Flavor %s could not be found' % flavor_id)
+
+        if key_name is not None and key_name not in self.cloud.keypairs[self.session.tenant_id]:
+            raise nova_exceptions.BadRequest(400, 'Key pair %s not found' % key_name)
+
+        if block_device_mapping_v2 is not None:
+            volume_ids = [device['uuid'] for device in block_device_mapping_v2]
+        elif block_device_mapping is not None:
+            # Values are in <id>:<type>:<size>:<delete_on_terminate> format
+            volume_ids = [six.text_type(value).split(':')[0] for value in block_device_mapping.values()]
+        else:
+            raise nova_exceptions.BadRequest(400, 'Only servers booted from volumes are simulated')
+
+        for volume_id in volume_ids:
+            self.lookup(self.cloud.volumes, volume_id, 'os-vol-tenant-attr:tenant_id')
+
+        server = self.cloud.create_server(
+            self.session.tenant_id, name, flavor_id, volume_ids, key_name, security_groups or ())
+        self.cloud.schedule('build', lambda: self.cloud.boot_server(server))
+        return self.wrap(server)
+
+    @_api_call
+    def delete(self, server):
+        server = self._get_server(server)
+        self.cloud.schedule('delete', lambda: self.cloud.delete_server(server))
+
+    @_api_call
+    def start(self, server):
+        server = self._get_server(server)
+        self._check_status(server, 'SHUTOFF')
+        self.cloud.schedule('power', lambda: self.cloud.start_server(server))
+
+    @_api_call
+    def stop(self, server):
+        server = self._get_server(server)
+        self._check_status(server, 'ACTIVE')
+        self.cloud.schedule('power', lambda: self.cloud.stop_server(server))
+
+    @_api_call
+    def resize(self, server, flavor, disk_config=None):
+        server = self._get_server(server)
+        self._check_status(server, 'ACTIVE', 'SHUTOFF')
+
+        flavor_id = _get_id(flavor)
+        if flavor_id not in self.cloud.flavors:
+            raise nova_exceptions.BadRequest(400, 'Flavor %s could not be found' % flavor_id)
+
+        def finish_resize():
+            server['flavor'] = {'id': flavor_id}
+            server['status'] = 'VERIFY_RESIZE'
+            self.cloud.touch_server(server)
+
+        server['status_before_resize'] = server['status']
+        server['status'] = 'RESIZE'
+        self.cloud.touch_server(server)
+        self.cloud.schedule('resize', finish_resize)
+
+    @_api_call
+    def confirm_resize(self, server):
+        server = self._get_server(server)
+        self._check_status(server, 'VERIFY_RESIZE')
+        server['status'] = server.pop('status_before_resize')
+        self.cloud.touch_server(server)
+
+    @_api_call
+    def list_security_group(self, server):
+        server = self._get_server(server)
+        groups = []
+        for group_ref in server['security_groups']:
+            for group in self.cloud.security_groups.values():
+                if six.text_type(group_ref) in (group['id'], group['name']) and self.is_visible(group):
+                    groups.append(SimulatedResource(self, copy.deepcopy(group)))
+        return groups
+
+    @_api_call
+    def add_security_group(self, server, security_group):
+        server = self._get_server(server)
+        group = self.lookup(self.cloud.security_groups, six.text_type(_get_id(security_group)))
+        if group['id'] not in server['security_groups']:
+            server['security_groups'].append(group['id'])
+
+    @_api_call
+    def remove_security_group(self, server, security_group):
+        server = self._get_server(server)
+        try:
+            server['security_groups'].remove(six.text_type(_get_id(security_group)))
+        except ValueError:
+            raise nova_exceptions.BadRequest(400, 'Security group is not associated with the server')
+
+    @_api_call
+    def add_floating_ip(self, server, address, fixed_address=None):
+        server = self._get_server(server)
+
+        try:
+            floating_ip = next(
+                ip for ip in self.cloud.floating_ips.values()
+                if ip['floating_ip_address'] == address and ip['tenant_id'] == server['tenant_id']
+            )
+        except StopIteration:
+            raise self.get_not_found(address)
+
+        floating_ip['fixed_ip_address'] = fixed_address
+        floating_ip['status'] = 'ACTIVE'
+
+        network = next(iter(server['addresses'].values()), None)
+        if network is not None:
+            network.append({'addr': address, 'version': 4, 'OS-EXT-IPS:type': 'floating'})
+        self.cloud.touch_server(server)
+
+
+class SimulatedServerVolumeManager(SimulatedNovaManager):
+    def _get_server_and_volume(self, server_id, volume_id):
+        server = self.lookup(self.cloud.servers, server_id)
+        volume = self.lookup(self.cloud.volumes, volume_id, 'os-vol-tenant-attr:tenant_id')
+        return server, volume
+
+    @_api_call
+    def get_server_volumes(self, server_id):
+        server = self.lookup(self.cloud.servers, server_id)
+        attachments = [
+            attachment
+            for volume_id in server['volume_ids']
+            for attachment in self.cloud.volumes[volume_id]['attachments']
+        ]
+        return [
+            self.wrap({
+                'id': attachment['volume_id'],
+                'volumeId': attachment['volume_id'],
+                'serverId': attachment['server_id'],
+                'device': attachment['device'],
+            })
+            for attachment in attachments
+        ]
+
+    @_api_call
+    def create_server_volume(self, server_id, volume_id, device):
+        server, volume = self._get_server_and_volume(server_id, volume_id)
+        if volume['status'] != 'available':
+            raise nova_exceptions.BadRequest(400, 'Volume %s is not available' % volume_id)
+
+        device = device or '/dev/vd%s' % 'abcdefgh'[len(server['volume_ids'])]
+        volume['status'] = 'attaching'
+        self.cloud.schedule('volume', lambda: self.cloud.attach_volume(server, volume, device))
+
+    @_api_call
+    def delete_server_volume(self, server_id, attachment_id):
+        server, volume = self._get_server_and_volume(server_id, attachment_id)
+        if volume['status'] != 'in-use':
+            raise nova_exceptions.BadRequest(400, 'Volume %s is not attached' % attachment_id)
+
+        volume['status'] = 'detaching'
+        self.cloud.schedule('volume', lambda: self.cloud.detach_volume(server, volume))
+
+
+class SimulatedNovaClient(object):
+    def __init__(self, session):
+        self.flavors = SimulatedFlavorManager(session)
+        self.hypervisors = SimulatedHypervisorManager(session)
+        self.keypairs = SimulatedKeypairManager(session)
+        self.quotas = SimulatedQuotaManager(session)
+        self.security_groups = SimulatedSecurityGroupManager(session)
+        self.security_group_rules = SimulatedSecurityGroupRuleManager(session)
+        self.servers = SimulatedServerManager(session)
+        self.volumes = SimulatedServerVolumeManager(session)
+
+
+# Cinder
+class SimulatedCinderManager(SimulatedManager):
+    tenant_key = 'os-vol-tenant-attr:tenant_id'
+
+    def get_failure(self):
+        return cinder_exceptions.ClientException(500, 'Simulated failure')
+
+    def get_not_found(self, obj_id):
+        return cinder_exceptions.NotFound(404, 'Could not find %s' % obj_id)
+
+    @property
+    def objects(self):
+        raise NotImplementedError()
+
+    def _check_status(self, obj, *statuses):
+        if obj['status'] not in statuses:
+            raise cinder_exceptions.BadRequest(
+                400, 'Status of %s must be one of %s, found %s' % (obj['id'], ', '.join(statuses), obj['status']))
+
+    @_api_call
+    def list(self, detailed=True, search_opts=None):
+        search_opts = search_opts or {}
+        objects = [o for o in self.objects.values() if self.is_visible(o, search_opts, self.tenant_key)]
+        objects = _paginate(objects, limit=search_opts.get('limit'), offset=search_opts.get('offset', 0))
+        return [self.wrap(o) for o in objects]
+
+    @_api_call
+    def get(self, obj):
+        return self.wrap(self.lookup(self.objects, obj, self.tenant_key))
+
+
+class SimulatedVolumeManager(SimulatedCinderManager):
+    @property
+    def objects(self):
+        return self.cloud.volumes
+
+    @_api_call
+    def create(self, size, snapshot_id=None, source_volid=None, display_name=None, display_description=None,
+               volume_type=None, user_id=None, project_id=None, availability_zone=None, metadata=None,
+               imageRef=None):
+        image_id = imageRef
+        if snapshot_id is not None:
+            snapshot = self.lookup(self.cloud.snapshots, snapshot_id, self.tenant_key)
+            self._check_status(snapshot, 'available')
+            image_id = snapshot['image_id']
+        elif image_id is not None and image_id not in self.cloud.images:
+            raise cinder_exceptions.BadRequest(400, 'Image %s could not be found' % image_id)
+
+        volume = self.cloud.create_volume(self.session.tenant_id, size, display_name, image_id)
+        volume['display_description'] = display_description or ''
+        self.cloud.schedule('volume', lambda: self.cloud.set_status(volume, 'available'))
+        return self.wrap(volume)
+
+    @_api_call
+    def delete(self, volume):
+        volume = self.lookup(self.objects, volume, self.tenant_key)
+        self._check_status(volume, 'available', 'error', 'error_restoring')
+        if any(s['volume_id'] == volume['id'] for s in self.cloud.snapshots.values()):
+            raise cinder_exceptions.BadRequest(400, 'Volume %s still has dependent snapshots' % volume['id'])
+        del self.objects[volume['id']]
+
+    @_api_call
+    def extend(self, volume, new_size):
+        volume = self.lookup(self.objects, volume, self.tenant_key)
+        self._check_status(volume, 'available')
+
+        def finish_extension():
+            volume['size'] = new_size
+            volume['status'] = 'available'
+
+        volume['status'] = 'extending'
+        self.cloud.schedule('volume', finish_extension)
+
+
+class SimulatedVolumeSnapshotManager(SimulatedCinderManager):
+    @property
+    def objects(self):
+        return self.cloud.snapshots
+
+    @_api_call
+    def create(self, volume_id, force=False, display_name=None, display_description=None):
+        volume = self.lookup(self.cloud.volumes, volume_id, self.tenant_key)
+        if not force:
+            self._check_status(volume, 'available')
+
+        snapshot = {
+            'id': self.cloud.new_id(),
+            'volume_id': volume['id'],
+            'size': volume['size'],
+            'image_id': volume.get('volume_image_metadata', {}).get('image_id'),
+            'display_name': display_name,
+            'display_description': display_description,
+            'status': 'creating',
+            self.tenant_key: volume[self.tenant_key],
+        }
+        self.objects[snapshot['id']] = snapshot
+        self.cloud.schedule('snapshot', lambda: self.cloud.set_status(snapshot, 'available'))
+        return self.wrap(snapshot)
+
+    @_api_call
+    def delete(self, snapshot):
+        snapshot = self.lookup(self.objects, snapshot, self.tenant_key)
+        self._check_status(snapshot, 'available', 'error')
+        del self.objects[snapshot['id']]
+
+
+class SimulatedBackupManager(SimulatedCinderManager):
+    @property
+    def objects(self):
+        return self.cloud.backups
+
+    @_api_call
+    def create(self, volume_id, container=None, name=None, description=None):
+        volume = self.lookup(self.cloud.volumes, volume_id, self.tenant_key)
+        self._check_status(volume, 'available')
+
+        backup = {
+            'id': self.cloud.new_id(),
+            'volume_id': volume['id'],
+            'size': volume['size'],
+            'image_id': volume.get('volume_image_metadata', {}).get('image_id'),
+            'name': name,
+            'description': description,
+            'container': container,
+            'status': 'creating',
+            self.tenant_key: volume[self.tenant_key],
+        }
+        self.objects[backup['id']] = backup
+
+        def finish_backup():
+            backup['status'] = 'available'
+            if volume['status'] == 'backing-up':
+                volume['status'] = 'available'
+
+        volume['status'] = 'backing-up'
+        self.cloud.schedule('backup', finish_backup)
+        return self.wrap(backup)
+
+    @_api_call
+    def delete(self, backup):
+        backup = self.lookup(self.objects, backup, self.tenant_key)
+        self._check_status(backup, 'available', 'error')
+        del self.objects[backup['id']]
+
+
+class SimulatedRestoreManager(SimulatedCinderManager):
+    @_api_call
+    def restore(self, backup_id, volume_id=None):
+        backup = self.lookup(self.cloud.backups, backup_id, self.tenant_key)
+        self._check_status(backup, 'available')
+
+        volume = self.cloud.create_volume(
+            self.session.tenant_id, backup['size'], 'restore_backup_%s' % backup['id'],
+            backup['image_id'], 'restoring-backup')
+        self.cloud.schedule('volume', lambda: self.cloud.set_status(volume, 'available'))
+
+        return self.wrap({'backup_id': backup['id'], 'volume_id': volume['id']})
+
+
+class SimulatedVolumeQuotaManager(SimulatedCinderManager):
+    @_api_call
+    def get(self, tenant_id):
+        quotas = dict(self.cloud.options['quotas'], id=tenant_id)
+        return self.wrap(quotas)
+
+
+class SimulatedCinderClient(object):
+    def __init__(self, session):
+        self.volumes = SimulatedVolumeManager(session)
+        self.volume_snapshots = SimulatedVolumeSnapshotManager(session)
+        self.backups = SimulatedBackupManager(session)
+        self.restores = SimulatedRestoreManager(session)
+        self.quotas = SimulatedVolumeQuotaManager(session)
+
+
+# Glance
+class SimulatedImageManager(SimulatedManager):
+    def get_failure(self):
+        return glance_exceptions.HTTPInternalServerError('Simulated failure')
+
+    def get_not_found(self, obj_id):
+        return glance_exceptions.HTTPNotFound('Could not find %s' % obj_id)
+
+    @_api_call
+    def list(self, **kwargs):
+        return [self.wrap(i) for i in self.cloud.images.values()]
+
+    @_api_call
+    def get(self, image):
+        try:
+            return self.wrap(self.cloud.images[_get_id(image)])
+        except KeyError:
+            raise self.get_not_found(_get_id(image))
+
+
+class SimulatedGlanceClient(object):
+    def __init__(self, session):
+        self.images = SimulatedImageManager(session)
+
+
+# noinspection PyMethodMayBeStatic
+class OpenStackSimulatorBackend(OpenStackBackend):
+    """
+    OpenStack backend working with a deployment simulated in memory of the current process.
+
+    Every process has its own simulated deployments, hence Celery workers
+    should run in a single process, e.g. with --pool=solo or --pool=threads,
+    for the web server and the workers to observe the same state of a deployment
+    provided that they are run together.
+    """
+    def __init__(self, options=None):
+        super(OpenStackSimulatorBackend, self).__init__()
+        self.options = options
+
+    def get_simulated_cloud(self, auth_url):
+        return get_simulated_cloud(auth_url, self.options)
+
+    def create_admin_session(self, keystone_url):
+        cloud = self.get_simulated_cloud(keystone_url)
+        return SimulatedSession(cloud, None, cloud.admin_tenant['id'], is_admin=True)
+
+    def create_tenant_session(self, membership):
+        return self._authenticate(membership, tenant_id=membership.tenant_id)
+
+    def create_user_session(self, membership):
+        return self._authenticate(membership)
+
+    def invalidate_session_token(self, auth_url, username, tenant):
+        # Simulated sessions are never cached
+        pass
+
+    def _authenticate(self, membership, tenant_id=None):
+        cloud = self.get_simulated_cloud(membership.cloud.auth_url)
+
+        with cloud.lock:
+            try:
+                user = next(u for u in cloud.users.values() if u['name'] == membership.username)
+            except StopIteration:
+                raise keystone_exceptions.AuthorizationFailure('Invalid user / password')
+
+            if user['password'] != membership.password:
+                raise keystone_exceptions.AuthorizationFailure('Invalid user / password')
+
+            if tenant_id is not None:
+                if not any(r[0] == user['id'] and r[2] == tenant_id for r in cloud.user_roles):
+                    raise keystone_exceptions.AuthorizationFailure('User is not authorized for tenant %s' % tenant_id)
+
+        return SimulatedSession(cloud, user['id'], tenant_id)
+
+    def create_cinder_client(self, session):
+        return SimulatedCinderClient(session)
+
+    def create_glance_client(self, session):
+        return SimulatedGlanceClient(session)
+
+    def create_keystone_client(self, session):
+        return SimulatedKeystoneClient(session)
+
+    def create_neutron_client(self, session):
+        return SimulatedNeutronClient(session)
+
+    def create_nova_client(self, session):
+        return SimulatedNovaClient(session)
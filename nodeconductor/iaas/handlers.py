@@ -49,7 +49,7 @@ def propagate_new_users_key_to_his_projects_clouds(sender, instance=None, create
         # Note: importing here to avoid circular import hell
         from nodeconductor.iaas import tasks
 
-        tasks.push_ssh_public_keys.delay([public_key.uuid.hex], list(membership_pks))
+        tasks.enqueue_ssh_public_keys([public_key.uuid.hex], list(membership_pks))
 
 
 def propagate_users_keys_to_clouds_of_newly_granted_project(sender, structure, user, role, **kwargs):
@@ -67,8 +67,7 @@ def propagate_users_keys_to_clouds_of_newly_granted_project(sender, structure, u
         # Note: importing here to avoid circular import hell
         from nodeconductor.iaas import tasks
 
-        tasks.push_ssh_public_keys.delay(
-            list(ssh_public_key_uuids), list(membership_pks))
+        tasks.enqueue_ssh_public_keys(list(ssh_public_key_uuids), list(membership_pks))
 
 
 @lru_cache(maxsize=1)
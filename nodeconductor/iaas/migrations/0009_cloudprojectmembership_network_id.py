@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iaas', '0008_cloudprojectmembership_instances_synced_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cloudprojectmembership',
+            name='network_id',
+            field=models.CharField(max_length=64, blank=True),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iaas', '0009_cloudprojectmembership_network_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cloudprojectmembership',
+            name='pull_interval',
+            field=models.PositiveIntegerField(null=True, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='cloudprojectmembership',
+            name='next_pull_at',
+            field=models.DateTimeField(null=True, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='cloudprojectmembership',
+            name='last_pull_changes',
+            field=models.PositiveIntegerField(null=True, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='cloudprojectmembership',
+            name='last_pull_duration',
+            field=models.FloatField(null=True, blank=True),
+            preserve_default=True,
+        ),
+    ]
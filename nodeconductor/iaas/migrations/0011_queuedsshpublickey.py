@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('iaas', '0010_cloudprojectmembership_pull_scheduling'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedSshPublicKey',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('cloud_project_membership', models.ForeignKey(related_name='+', to='iaas.CloudProjectMembership')),
+                ('public_key', models.ForeignKey(related_name='+', to='core.SshPublicKey')),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='queuedsshpublickey',
+            unique_together=set([('cloud_project_membership', 'public_key')]),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iaas', '0011_queuedsshpublickey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cloudprojectmembership',
+            name='instances_pull_interval',
+            field=models.PositiveIntegerField(null=True, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='cloudprojectmembership',
+            name='next_instances_pull_at',
+            field=models.DateTimeField(null=True, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='cloudprojectmembership',
+            name='pending_pull_changes',
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=True,
+        ),
+    ]
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 import logging
 from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.contenttypes import generic as ct_generic
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator, URLValidator
@@ -58,9 +59,16 @@ class Cloud(core_models.UuidMixin, core_models.SynchronizableMixin, models.Model
                                 validators=[URLValidator(), validate_known_keystone_urls])
 
     def get_backend(self):
-        # TODO: Support different clouds instead of hard-coding
         # Importing here to avoid circular imports hell
         from nodeconductor.iaas.backend.openstack import OpenStackBackend
+        from nodeconductor.iaas.backend.simulator import OpenStackSimulatorBackend
+
+        nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+        openstacks = nc_settings.get('OPENSTACK_CREDENTIALS', ())
+        credentials = next((o for o in openstacks if o['auth_url'] == self.auth_url), {})
+
+        if 'simulation' in credentials:
+            return OpenStackSimulatorBackend(credentials['simulation'])
 
         return OpenStackBackend()
 
@@ -82,6 +90,21 @@ class CloudProjectMembership(core_models.SynchronizableMixin, models.Model):
     password = models.CharField(max_length=100, blank=True)
 
     tenant_id = models.CharField(max_length=64, blank=True)
+    network_id = models.CharField(max_length=64, blank=True)
+
+    # High-water mark of the last instance synchronization with backend
+    instances_synced_at = models.DateTimeField(blank=True, null=True)
+
+    # Adaptive scheduling of periodic pulls, intervals are in seconds
+    pull_interval = models.PositiveIntegerField(blank=True, null=True)
+    next_pull_at = models.DateTimeField(blank=True, null=True)
+    last_pull_changes = models.PositiveIntegerField(blank=True, null=True)
+    last_pull_duration = models.FloatField(blank=True, null=True)
+    # Incremental pulls of instances are scheduled on their own, changes they have applied
+    # since the last full pull count towards the schedule of the next one
+    instances_pull_interval = models.PositiveIntegerField(blank=True, null=True)
+    next_instances_pull_at = models.DateTimeField(blank=True, null=True)
+    pending_pull_changes = models.PositiveIntegerField(default=0)
 
     class Meta(object):
         unique_together = ('cloud', 'tenant_id')
@@ -102,6 +125,16 @@ class CloudProjectMember(models.Model):
     cloud_project_membership = models.ForeignKey(CloudProjectMembership, related_name='+')
 
 
+class QueuedSshPublicKey(CloudProjectMember):
+    """
+    Ssh public key waiting to be pushed to a cloud project membership.
+    """
+    class Meta(object):
+        unique_together = ('cloud_project_membership', 'public_key')
+
+    public_key = models.ForeignKey(core_models.SshPublicKey, related_name='+')
+
+
 @python_2_unicode_compatible
 class Flavor(core_models.UuidMixin, models.Model):
     """
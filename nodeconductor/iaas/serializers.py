@@ -1,7 +1,10 @@
 from __future__ import unicode_literals
 
+import uuid
+
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.utils import six
 from rest_framework import serializers, status, exceptions
 
 from nodeconductor.backup import serializers as backup_serializers
@@ -262,6 +265,151 @@ class InstanceCreateSerializer(core_serializers.PermissionFieldFilteringMixin,
         return super(InstanceCreateSerializer, self).restore_object(attrs, instance)
 
 
+class HostnamesField(serializers.WritableField):
+    def from_native(self, value):
+        if not isinstance(value, (list, tuple)) or not all(
+                isinstance(hostname, six.string_types) and hostname for hostname in value):
+            raise ValidationError('Enter a list of hostnames.')
+
+        if len(set(value)) != len(value):
+            raise ValidationError('Hostnames must be unique.')
+
+        return list(value)
+
+
+class InstanceBatchCreateSerializer(InstanceCreateSerializer):
+    """
+    Create a batch of identical instances, either a number of them named
+    after the hostname or the ones with the given hostnames.
+    """
+    max_batch_size = 100
+
+    hostname = serializers.CharField(required=False)
+    count = serializers.IntegerField(min_value=1, max_value=max_batch_size, required=False, write_only=True)
+    hostnames = HostnamesField(required=False, write_only=True)
+
+    class Meta(InstanceCreateSerializer.Meta):
+        fields = ('url', 'uuid', 'hostname', 'count', 'hostnames', 'description',
+                  'template', 'project', 'security_groups', 'flavor', 'ssh_public_key')
+
+    def validate(self, attrs):
+        count = attrs.pop('count', None)
+        hostnames = attrs.get('hostnames')
+
+        if (count is None) == (hostnames is None):
+            raise ValidationError('Either count or hostnames is required.')
+
+        if count is not None:
+            hostname = attrs.get('hostname')
+            if not hostname:
+                raise ValidationError('Hostname is required to name a number of instances.')
+            hostnames = attrs['hostnames'] = ['%s-%d' % (hostname, i) for i in range(1, count + 1)]
+
+        if not hostnames or len(hostnames) > self.max_batch_size:
+            raise ValidationError('Batch must contain from 1 to %d instances.' % self.max_batch_size)
+
+        max_length = models.Instance._meta.get_field('hostname').max_length
+        if any(len(hostname) > max_length for hostname in hostnames):
+            raise ValidationError('Hostnames must be at most %d characters long.' % max_length)
+
+        attrs = super(InstanceBatchCreateSerializer, self).validate(attrs)
+
+        membership = models.CloudProjectMembership.objects.select_related(
+            'resource_quota', 'resource_quota_usage').get(project=attrs['project'], cloud=attrs['flavor'].cloud)
+        self.validate_quota(membership, attrs['flavor'], len(hostnames))
+
+        return attrs
+
+    def validate_quota(self, membership, flavor, instances_count):
+        """
+        Ensure the whole batch fits into the membership's quota.
+        """
+        try:
+            quota = membership.resource_quota
+            usage = membership.resource_quota_usage
+        except (models.ResourceQuota.DoesNotExist, models.ResourceQuotaUsage.DoesNotExist):
+            # Quota is not pulled yet, backend is going to enforce it anyway
+            return
+
+        data_volume_size = models.Instance._meta.get_field('data_volume_size').default
+        requested = {
+            'vcpu': flavor.cores * instances_count,
+            'ram': flavor.ram * instances_count,
+            'storage': (flavor.disk + data_volume_size) * instances_count,
+            'max_instances': instances_count,
+        }
+
+        exceeded = sorted(
+            resource for resource, amount in requested.items()
+            if getattr(usage, resource) + amount > getattr(quota, resource)
+        )
+        if exceeded:
+            raise ValidationError('Batch exceeds %s quota of the cloud project membership.' % ', '.join(exceeded))
+
+    def restore_object(self, attrs, instance=None):
+        self.hostnames = attrs.pop('hostnames')
+        return super(InstanceBatchCreateSerializer, self).restore_object(attrs, instance)
+
+    def save_object(self, obj, **kwargs):
+        """
+        Create instances of the batch in bulk along with their security groups and licenses.
+
+        Restored object serves as a prototype of the instances, they are stored to self.object.
+        """
+        related_data = getattr(obj, '_related_data', {})
+        instance_security_groups = related_data.get('security_groups') or []
+        template_licenses = list(obj.template.template_licenses.all())
+
+        fields = dict(
+            (field.attname, getattr(obj, field.attname))
+            for field in models.Instance._meta.concrete_fields
+            if not field.primary_key and field.name != 'uuid'
+        )
+
+        with transaction.atomic():
+            instances = [models.Instance(**dict(fields, hostname=hostname)) for hostname in self.hostnames]
+            models.Instance.objects.bulk_create(instances)
+
+            # Primary keys are not populated by bulk_create, uuids are
+            instances = list(models.Instance.objects.filter(
+                uuid__in=[instance.uuid for instance in instances]).order_by('pk'))
+
+            models.InstanceSecurityGroup.objects.bulk_create([
+                models.InstanceSecurityGroup(instance=instance, security_group=isg.security_group)
+                for instance in instances
+                for isg in instance_security_groups
+            ])
+
+            models.InstanceLicense.objects.bulk_create([
+                models.InstanceLicense(
+                    instance=instance,
+                    template_license=template_license,
+                    setup_fee=template_license.setup_fee,
+                    monthly_fee=template_license.monthly_fee,
+                )
+                for instance in instances
+                for template_license in template_licenses
+            ])
+
+        self.object = instances
+
+
+class UuidsField(serializers.WritableField):
+    def from_native(self, value):
+        if not isinstance(value, (list, tuple)):
+            raise ValidationError('Enter a list of UUIDs.')
+
+        try:
+            return [uuid.UUID(item).hex for item in value]
+        except (TypeError, AttributeError, ValueError):
+            raise ValidationError('Enter a list of UUIDs.')
+
+
+class InstanceBatchOperationSerializer(serializers.Serializer):
+    operation = serializers.ChoiceField(choices=(('start', 'start'), ('stop', 'stop'), ('destroy', 'destroy')))
+    instances = UuidsField(required=False)
+
+
 class InstanceUpdateSerializer(serializers.HyperlinkedModelSerializer):
 
     security_groups = InstanceSecurityGroupSerializer(
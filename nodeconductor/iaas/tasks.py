@@ -1,22 +1,37 @@
 # coding: utf-8
 from __future__ import absolute_import, unicode_literals
 
+from collections import defaultdict
+from datetime import timedelta
 import logging
+from multiprocessing.pool import ThreadPool
+import random
+import time
 
-from celery import shared_task
+from celery import group, shared_task
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
 
 from nodeconductor.core import models as core_models
 from nodeconductor.core.models import SynchronizationStates
-from nodeconductor.core.tasks import tracked_processing, set_state, StateChangeError
+from nodeconductor.core.tasks import tracked_processing, set_state, set_states, StateChangeError, Lease, singleflight
 from nodeconductor.core.log import EventLoggerAdapter
 from nodeconductor.iaas import models
-from nodeconductor.iaas.backend import CloudBackendError
+from nodeconductor.iaas.backend import CloudBackendError, CloudUnavailableError
+from nodeconductor.iaas.backend.governor import CloudGovernor
 from nodeconductor.monitoring.zabbix.api_client import ZabbixApiClient
 from nodeconductor.monitoring.zabbix.errors import ZabbixError
 
 logger = logging.getLogger(__name__)
 event_logger = EventLoggerAdapter(logger)
 
+# Maximum number of entities scheduled for synchronization by a single query
+SCHEDULING_CHUNK_SIZE = 500
+
+# Minimal number of memberships of a cloud pulled at once that pays off listing resources of all its tenants
+CLOUD_SWEEP_MIN_MEMBERSHIPS = 10
+
 
 # XXX: There are no usages of this error.
 class ResizingError(KeyError, models.Instance.DoesNotExist):
@@ -51,14 +66,253 @@ def delete_zabbix_host_and_service(instance):
         )
 
 
+def _is_cloud_suspended(auth_url):
+    # Scheduled synchronizations would fail fast anyway, do not bother
+    return CloudGovernor(auth_url).is_open()
+
+
+def _schedule_syncing(model_class, uuids_or_pks):
+    """
+    Move entities to syncing scheduled state with an update query per chunk.
+
+    :returns: identifiers of the entities that have been scheduled
+    :rtype: list
+    """
+    scheduled = []
+    for index in range(0, len(uuids_or_pks), SCHEDULING_CHUNK_SIZE):
+        scheduled.extend(set_states(model_class, uuids_or_pks[index:index + SCHEDULING_CHUNK_SIZE], 'schedule_syncing'))
+    return scheduled
+
+
+def _get_membership_pull_interval(pull_interval, changes, duration):
+    """
+    Return number of seconds till the next periodic pull of a membership.
+
+    Pulls of memberships that have changed since the previous pull get twice as frequent,
+    of the ones that have not -- twice as rare, within MEMBERSHIP_PULL_MIN_INTERVAL and
+    MEMBERSHIP_PULL_MAX_INTERVAL. Slow memberships are pulled at most every ten durations of their pull.
+    """
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    min_interval = nc_settings.get('MEMBERSHIP_PULL_MIN_INTERVAL', 5 * 60)
+    max_interval = nc_settings.get('MEMBERSHIP_PULL_MAX_INTERVAL', 6 * 60 * 60)
+
+    if pull_interval is None:
+        # Memberships used to be pulled every 30 minutes
+        pull_interval = 30 * 60
+
+    if changes:
+        pull_interval //= 2
+    else:
+        pull_interval *= 2
+
+    return min(max(pull_interval, min_interval, int(duration * 10)), max_interval)
+
+
+def _schedule_next_membership_pull(membership, changes, duration):
+    # Instances changed by incremental pulls meanwhile are not changed by the full pull anymore,
+    # but the membership has changed all the same
+    changes += membership.pending_pull_changes
+
+    pull_interval = _get_membership_pull_interval(membership.pull_interval, changes, duration)
+    # Jitter spreads pulls of the memberships evenly over time
+    countdown = pull_interval * random.uniform(0.9, 1.1)
+
+    models.CloudProjectMembership.objects.filter(pk=membership.pk).update(
+        pull_interval=pull_interval,
+        next_pull_at=timezone.now() + timedelta(seconds=countdown),
+        last_pull_changes=changes,
+        last_pull_duration=duration,
+        pending_pull_changes=F('pending_pull_changes') - membership.pending_pull_changes,
+    )
+
+    logger.debug('Pull of cloud membership %s changed %d resources in %.1fs, next one is due in %ds',
+                 membership.pk, changes, duration, countdown)
+
+
+def _schedule_next_membership_instances_pull(membership, changes, duration):
+    pull_interval = _get_membership_pull_interval(membership.instances_pull_interval, changes, duration)
+    countdown = pull_interval * random.uniform(0.9, 1.1)
+
+    models.CloudProjectMembership.objects.filter(pk=membership.pk).update(
+        instances_pull_interval=pull_interval,
+        next_instances_pull_at=timezone.now() + timedelta(seconds=countdown),
+        pending_pull_changes=F('pending_pull_changes') + changes,
+    )
+
+    logger.debug('Incremental pull of cloud membership %s changed %d instances in %.1fs, next one is due in %ds',
+                 membership.pk, changes, duration, countdown)
+
+
+def _get_instance_operation_poll_countdown(attempt):
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    poll_interval = nc_settings.get('INSTANCE_OPERATION_POLL_INTERVAL', 5)
+    # Check progress more and more rarely, but at least every 8 intervals
+    return min(poll_interval * 2 ** attempt, poll_interval * 8)
+
+
+def _get_instance_operation_deadline():
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    return time.time() + nc_settings.get('INSTANCE_OPERATION_TIMEOUT', 30 * 60)
+
+
+def _get_instance_provisioning_countdown(index):
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    rate = nc_settings.get('INSTANCE_PROVISIONING_RATE', 30)
+    # Spread provisioning of a batch over time, rate is in instances per minute
+    return index * 60.0 / rate
+
+
+def _set_instance_erred(instance_uuid, event_type=None):
+    if event_type is not None:
+        event_logger.error(
+            'Failed to process Instance with id %s', instance_uuid,
+            extra={'instance': models.Instance.objects.filter(uuid=instance_uuid).first(), 'event_type': event_type}
+        )
+
+    try:
+        set_state(models.Instance, instance_uuid, 'set_erred')
+    except StateChangeError:
+        # No logging is needed since set_state already logged everything
+        pass
+
+
+def _begin_instance_operation(instance_uuid, processing_state, request_operation, event_type=None):
+    """
+    Move the instance to processing state and request an operation from backend.
+
+    Backend operations are not waited for, see _check_instance_operation().
+
+    :returns: True if the operation was requested, False otherwise
+    :rtype: bool
+    """
+    try:
+        set_state(models.Instance, instance_uuid, processing_state)
+    except StateChangeError:
+        # No logging is needed since set_state already logged everything
+        return False
+
+    # noinspection PyBroadException
+    try:
+        instance = models.Instance.objects.get(uuid=instance_uuid)
+
+        backend = instance.cloud_project_membership.cloud.get_backend()
+        request_operation(backend, instance)
+    except Exception:
+        logger.exception('Failed to %s Instance with id %s', processing_state, instance_uuid)
+        _set_instance_erred(instance_uuid, event_type)
+        return False
+
+    return True
+
+
+def _check_instance_operation(poll_task, instance_uuid, processing_state, args, deadline, attempt, check_operation,
+                              event_type=None):
+    """
+    Check progress of a backend operation on the instance without waiting.
+
+    If the operation is still in progress poll_task is scheduled to check it again later,
+    if it has failed or timed out the instance is marked as erred.
+
+    Poll tasks must not run concurrently for the same instance, see singleflight(),
+    duplicates delivered after the instance has left processing_state do nothing.
+
+    :returns: True if the operation is completed, False otherwise
+    :rtype: bool
+    """
+    # noinspection PyBroadException
+    try:
+        instance = models.Instance.objects.get(uuid=instance_uuid)
+
+        if instance.state != processing_state:
+            # Operation is handled by another delivery of the task already
+            logger.info('Skipping check of Instance with id %s, it is not in %s state any more',
+                        instance_uuid, instance.get_state_display())
+            return False
+
+        backend = instance.cloud_project_membership.cloud.get_backend()
+        if check_operation(backend, instance):
+            return True
+    except CloudUnavailableError as e:
+        # Cloud is busy or suspended, the operation is checked again later
+        logger.info('Postponing check of Instance with id %s: %s', instance_uuid, e)
+    except Exception:
+        logger.exception('Failed to process Instance with id %s', instance_uuid)
+        _set_instance_erred(instance_uuid, event_type)
+        return False
+
+    if time.time() >= deadline:
+        logger.error('Timed out processing Instance with id %s', instance_uuid)
+        _set_instance_erred(instance_uuid, event_type)
+        return False
+
+    poll_task.apply_async(
+        args=(instance_uuid,) + tuple(args),
+        kwargs={'deadline': deadline, 'attempt': attempt + 1},
+        countdown=_get_instance_operation_poll_countdown(attempt),
+    )
+    return False
+
+
+# Long running instance operations are split into a task requesting the operation
+# and a task checking its progress, which reschedules itself until the operation
+# is completed. This way workers are not blocked while backend is busy.
 @shared_task
-@tracked_processing(models.Instance, processing_state='begin_provisioning', desired_state='set_online')
 def schedule_provisioning(instance_uuid, backend_flavor_id):
-    instance = models.Instance.objects.get(uuid=instance_uuid)
+    is_requested = _begin_instance_operation(
+        instance_uuid, 'begin_provisioning',
+        lambda backend, instance: backend.request_instance_provisioning(instance, backend_flavor_id),
+    )
+
+    if is_requested:
+        poll_provisioning.apply_async(
+            args=(instance_uuid, backend_flavor_id),
+            kwargs={'deadline': _get_instance_operation_deadline()},
+            countdown=_get_instance_operation_poll_countdown(0),
+        )
+
+
+@shared_task
+def schedule_batch_provisioning(instance_uuids, backend_flavor_id):
+    """
+    Provision a batch of identical instances at INSTANCE_PROVISIONING_RATE.
+
+    Backend resources shared by the instances are looked up once beforehand,
+    provisioning of every instance picks them from cache.
+    """
+    instance = models.Instance.objects.get(uuid=instance_uuids[0])
 
     backend = instance.cloud_project_membership.cloud.get_backend()
-    backend.provision_instance(instance, backend_flavor_id)
-    create_zabbix_host_and_service(instance)
+    try:
+        backend.prepare_instance_provisioning(instance, backend_flavor_id)
+    except CloudBackendError:
+        # Provisioning of every instance is going to fail on its own
+        logger.warn('Failed to prepare provisioning of a batch of %d instances', len(instance_uuids), exc_info=1)
+
+    group(
+        schedule_provisioning.si(instance_uuid, backend_flavor_id).set(
+            countdown=_get_instance_provisioning_countdown(index))
+        for index, instance_uuid in enumerate(instance_uuids)
+    ).apply_async()
+
+
+@shared_task
+@singleflight('iaas:instance:{0}')
+def poll_provisioning(instance_uuid, backend_flavor_id, deadline, attempt=0):
+    is_completed = _check_instance_operation(
+        poll_provisioning, instance_uuid, models.Instance.States.PROVISIONING, (backend_flavor_id,),
+        deadline, attempt,
+        lambda backend, instance: backend.check_instance_provisioning(instance, backend_flavor_id),
+    )
+
+    if is_completed:
+        instance = models.Instance.objects.get(uuid=instance_uuid)
+        create_zabbix_host_and_service(instance)
+
+        try:
+            set_state(models.Instance, instance_uuid, 'set_online')
+        except StateChangeError:
+            # No logging is needed since set_state already logged everything
+            pass
 
 
 @shared_task
@@ -81,50 +335,253 @@ def schedule_starting(instance_uuid):
 
 @shared_task
 def schedule_deleting(instance_uuid):
-    try:
-        set_state(models.Instance, instance_uuid, 'begin_deleting')
-    except StateChangeError:
-        # No logging is needed since set_state already logged everything
-        return
+    is_requested = _begin_instance_operation(
+        instance_uuid, 'begin_deleting',
+        lambda backend, instance: backend.request_instance_deletion(instance),
+        event_type='instance_deletion',
+    )
 
-    # noinspection PyBroadException
-    try:
-        instance = models.Instance.objects.get(uuid=instance_uuid)
+    if is_requested:
+        poll_deleting.apply_async(
+            args=(instance_uuid,),
+            kwargs={'deadline': _get_instance_operation_deadline()},
+            countdown=_get_instance_operation_poll_countdown(0),
+        )
 
-        backend = instance.cloud_project_membership.cloud.get_backend()
-        backend.delete_instance(instance)
 
+@shared_task
+@singleflight('iaas:instance:{0}')
+def poll_deleting(instance_uuid, deadline, attempt=0):
+    is_completed = _check_instance_operation(
+        poll_deleting, instance_uuid, models.Instance.States.DELETING, (), deadline, attempt,
+        lambda backend, instance: backend.check_instance_deletion(instance),
+        event_type='instance_deletion',
+    )
+
+    if is_completed:
+        instance = models.Instance.objects.get(uuid=instance_uuid)
         delete_zabbix_host_and_service(instance)
-    except Exception:
-        # noinspection PyProtectedMember
-        logger.exception('Failed to begin_deleting Instance with id %s', instance_uuid)
-        event_logger.exception(
-            'Failed to begin_deleting Instance with id %s', instance_uuid,
-            extra={'instance': instance, 'event_type': 'instance_deletion'}
-        )
-        set_state(models.Instance, instance_uuid, 'set_erred')
-    else:
+
         # Actually remove the instance from the database
         models.Instance.objects.filter(uuid=instance_uuid).delete()
 
 
 @shared_task
-@tracked_processing(models.Instance, processing_state='begin_resizing', desired_state='set_offline')
 def update_flavor(instance_uuid, flavor_uuid):
-    instance = models.Instance.objects.get(uuid=instance_uuid)
-    flavor = models.Flavor.objects.get(uuid=flavor_uuid)
+    is_requested = _begin_instance_operation(
+        instance_uuid, 'begin_resizing',
+        lambda backend, instance: backend.request_flavor_update(
+            instance, models.Flavor.objects.get(uuid=flavor_uuid)),
+    )
 
-    backend = instance.cloud_project_membership.cloud.get_backend()
-    backend.update_flavor(instance, flavor)
+    if is_requested:
+        poll_flavor_update.apply_async(
+            args=(instance_uuid, flavor_uuid),
+            kwargs={'deadline': _get_instance_operation_deadline()},
+            countdown=_get_instance_operation_poll_countdown(0),
+        )
+
+
+@shared_task
+@singleflight('iaas:instance:{0}')
+def poll_flavor_update(instance_uuid, flavor_uuid, deadline, attempt=0):
+    is_completed = _check_instance_operation(
+        poll_flavor_update, instance_uuid, models.Instance.States.RESIZING, (flavor_uuid,), deadline, attempt,
+        lambda backend, instance: backend.check_flavor_update(
+            instance, models.Flavor.objects.get(uuid=flavor_uuid)),
+    )
+
+    if is_completed:
+        try:
+            set_state(models.Instance, instance_uuid, 'set_offline')
+        except StateChangeError:
+            # No logging is needed since set_state already logged everything
+            pass
 
 
 @shared_task
-@tracked_processing(models.Instance, processing_state='begin_resizing', desired_state='set_offline')
 def extend_disk(instance_uuid):
-    instance = models.Instance.objects.get(uuid=instance_uuid)
+    is_requested = _begin_instance_operation(
+        instance_uuid, 'begin_resizing',
+        lambda backend, instance: backend.request_disk_extension(instance),
+    )
 
-    backend = instance.cloud_project_membership.cloud.get_backend()
-    backend.extend_disk(instance)
+    if is_requested:
+        poll_disk_extension.apply_async(
+            args=(instance_uuid,),
+            kwargs={'deadline': _get_instance_operation_deadline()},
+            countdown=_get_instance_operation_poll_countdown(0),
+        )
+
+
+@shared_task
+@singleflight('iaas:instance:{0}')
+def poll_disk_extension(instance_uuid, deadline, attempt=0):
+    is_completed = _check_instance_operation(
+        poll_disk_extension, instance_uuid, models.Instance.States.RESIZING, (), deadline, attempt,
+        lambda backend, instance: backend.check_disk_extension(instance),
+    )
+
+    if is_completed:
+        try:
+            set_state(models.Instance, instance_uuid, 'set_offline')
+        except StateChangeError:
+            # No logging is needed since set_state already logged everything
+            pass
+
+
+def _set_instances_erred(instances, event_type=None):
+    if event_type is not None:
+        for instance in instances:
+            event_logger.error(
+                'Failed to process Instance with id %s', instance.uuid,
+                extra={'instance': instance, 'event_type': event_type}
+            )
+
+    set_states(models.Instance, [instance.uuid for instance in instances], 'set_erred')
+
+
+def _begin_membership_instances_operation(membership_pk, instance_uuids, processing_state, operation,
+                                          poll_task, event_type=None):
+    """
+    Move instances of the membership to processing state and request an operation on all of them at once.
+
+    Backend operations are not waited for, poll_task checks their progress,
+    see _check_membership_instances_operation().
+    """
+    instance_uuids = set_states(models.Instance, instance_uuids, processing_state)
+    if not instance_uuids:
+        return
+
+    membership = models.CloudProjectMembership.objects.select_related('cloud').get(pk=membership_pk)
+    instances = list(models.Instance.objects.filter(uuid__in=instance_uuids))
+
+    backend = membership.cloud.get_backend()
+    # noinspection PyBroadException
+    try:
+        with backend.tenant_clients(membership):
+            requested = backend.request_instances_operation(membership, instances, operation)
+    except Exception:
+        logger.exception('Failed to %s %d instances of cloud membership %s',
+                         processing_state, len(instances), membership_pk)
+        requested = []
+
+    failed = [instance for instance in instances if instance not in requested]
+    if failed:
+        _set_instances_erred(failed, event_type)
+
+    if requested:
+        poll_task.apply_async(
+            args=(membership_pk, [instance.uuid.hex for instance in requested]),
+            kwargs={'deadline': _get_instance_operation_deadline()},
+            countdown=_get_instance_operation_poll_countdown(0),
+        )
+
+
+def _check_membership_instances_operation(poll_task, membership_pk, instance_uuids, processing_state, operation,
+                                          deadline, attempt, event_type=None):
+    """
+    Check progress of a backend operation on instances of the membership without waiting.
+
+    Instances the operation is still in progress for are checked again later by poll_task,
+    the ones it has failed or timed out for are marked as erred.
+
+    :returns: instances the operation is completed for
+    :rtype: list
+    """
+    # Instances that have left the processing state are handled by another delivery of the task already
+    instances = list(models.Instance.objects.filter(uuid__in=instance_uuids, state=processing_state))
+    if not instances:
+        return []
+
+    membership = models.CloudProjectMembership.objects.select_related('cloud').get(pk=membership_pk)
+
+    backend = membership.cloud.get_backend()
+    # noinspection PyBroadException
+    try:
+        with backend.tenant_clients(membership):
+            completed, failed = backend.check_instances_operation(membership, instances, operation)
+    except CloudUnavailableError as e:
+        # Cloud is busy or suspended, the operation is checked again later
+        logger.info('Postponing check of %d instances of cloud membership %s: %s', len(instances), membership_pk, e)
+        completed, failed = [], []
+    except Exception:
+        logger.exception('Failed to process %d instances of cloud membership %s', len(instances), membership_pk)
+        completed, failed = [], instances
+
+    remaining = [instance for instance in instances if instance not in completed and instance not in failed]
+    if remaining and time.time() >= deadline:
+        logger.error('Timed out processing %d instances of cloud membership %s', len(remaining), membership_pk)
+        failed, remaining = failed + remaining, []
+
+    if failed:
+        _set_instances_erred(failed, event_type)
+
+    if remaining:
+        poll_task.apply_async(
+            args=(membership_pk, [instance.uuid.hex for instance in remaining]),
+            kwargs={'deadline': deadline, 'attempt': attempt + 1},
+            countdown=_get_instance_operation_poll_countdown(attempt),
+        )
+
+    return completed
+
+
+# Operations on several instances of a membership are requested at once
+# and their progress is checked by a single self-rescheduling task
+@shared_task
+def start_membership_instances(membership_pk, instance_uuids):
+    _begin_membership_instances_operation(
+        membership_pk, instance_uuids, 'begin_starting', 'start', poll_membership_instances_starting)
+
+
+@shared_task
+def poll_membership_instances_starting(membership_pk, instance_uuids, deadline, attempt=0):
+    started = _check_membership_instances_operation(
+        poll_membership_instances_starting, membership_pk, instance_uuids,
+        models.Instance.States.STARTING, 'start', deadline, attempt,
+    )
+
+    set_states(models.Instance, [instance.uuid for instance in started], 'set_online')
+
+
+@shared_task
+def stop_membership_instances(membership_pk, instance_uuids):
+    _begin_membership_instances_operation(
+        membership_pk, instance_uuids, 'begin_stopping', 'stop', poll_membership_instances_stopping)
+
+
+@shared_task
+def poll_membership_instances_stopping(membership_pk, instance_uuids, deadline, attempt=0):
+    stopped = _check_membership_instances_operation(
+        poll_membership_instances_stopping, membership_pk, instance_uuids,
+        models.Instance.States.STOPPING, 'stop', deadline, attempt,
+    )
+
+    set_states(models.Instance, [instance.uuid for instance in stopped], 'set_offline')
+
+
+@shared_task
+def delete_membership_instances(membership_pk, instance_uuids):
+    _begin_membership_instances_operation(
+        membership_pk, instance_uuids, 'begin_deleting', 'delete', poll_membership_instances_deleting,
+        event_type='instance_deletion',
+    )
+
+
+@shared_task
+def poll_membership_instances_deleting(membership_pk, instance_uuids, deadline, attempt=0):
+    deleted = _check_membership_instances_operation(
+        poll_membership_instances_deleting, membership_pk, instance_uuids,
+        models.Instance.States.DELETING, 'delete', deadline, attempt,
+        event_type='instance_deletion',
+    )
+
+    for instance in deleted:
+        delete_zabbix_host_and_service(instance)
+
+    # Actually remove the instances from the database
+    models.Instance.objects.filter(pk__in=[instance.pk for instance in deleted]).delete()
 
 
 @shared_task
@@ -141,11 +598,17 @@ def push_instance_security_groups(instance_uuid):
     processing_state='begin_syncing',
     desired_state='set_in_sync',
 )
+@singleflight('iaas:cloud:{0}')
 def pull_cloud_account(cloud_account_uuid):
     cloud_account = models.Cloud.objects.get(uuid=cloud_account_uuid)
 
     backend = cloud_account.get_backend()
-    backend.pull_cloud_account(cloud_account)
+    try:
+        with backend.admin_clients(cloud_account.auth_url):
+            backend.pull_cloud_account(cloud_account)
+    except CloudUnavailableError as e:
+        # Cloud is busy or suspended, it is pulled on the next round
+        logger.info('Postponing pull of cloud account %s: %s', cloud_account.uuid, e)
 
 
 @shared_task
@@ -153,11 +616,18 @@ def pull_cloud_accounts():
     # TODO: Extract to a service
     queryset = models.Cloud.objects.filter(state=SynchronizationStates.IN_SYNC)
 
-    for cloud_account in queryset.iterator():
-        cloud_account.schedule_syncing()
-        cloud_account.save()
+    cloud_account_uuids = []
+    for cloud_account in queryset.only('uuid', 'auth_url').iterator():
+        if _is_cloud_suspended(cloud_account.auth_url):
+            logger.info('Skipping pull of cloud account %s, access to it is suspended', cloud_account.uuid)
+            continue
+
+        cloud_account_uuids.append(cloud_account.uuid.hex)
+
+    cloud_account_uuids = _schedule_syncing(models.Cloud, cloud_account_uuids)
 
-        pull_cloud_account.delay(cloud_account.uuid.hex)
+    if cloud_account_uuids:
+        group(pull_cloud_account.si(cloud_account_uuid.hex) for cloud_account_uuid in cloud_account_uuids).apply_async()
 
 
 @shared_task
@@ -170,37 +640,197 @@ def sync_cloud_account(cloud_account_uuid):
     cloud = models.Cloud.objects.get(uuid=cloud_account_uuid)
 
     backend = cloud.get_backend()
-    backend.push_cloud_account(cloud)
-    backend.pull_cloud_account(cloud)
+    with backend.admin_clients(cloud.auth_url):
+        backend.push_cloud_account(cloud)
+        backend.pull_cloud_account(cloud)
 
 
-@shared_task
 @tracked_processing(
     models.CloudProjectMembership,
     processing_state='begin_syncing',
     desired_state='set_in_sync',
 )
-def pull_cloud_membership(membership_pk):
+@singleflight('iaas:membership:{0}')
+def _pull_cloud_membership(membership_pk, backend=None):
     membership = models.CloudProjectMembership.objects.get(pk=membership_pk)
 
-    backend = membership.cloud.get_backend()
-    backend.pull_security_groups(membership)
-    backend.pull_instances(membership)
-    backend.pull_resource_quota(membership)
-    backend.pull_resource_quota_usage(membership)
-    backend.pull_floating_ips(membership)
+    if backend is None:
+        backend = membership.cloud.get_backend()
+
+    started_at = time.time()
+
+    try:
+        with backend.tenant_clients(membership):
+            changes = backend.pull_security_groups(membership)
+            changes += backend.pull_instances(membership)
+            backend.pull_resource_quota(membership)
+            backend.pull_resource_quota_usage(membership)
+            changes += backend.pull_floating_ips(membership)
+    except CloudUnavailableError as e:
+        # Cloud is busy or suspended, the membership is still due and is pulled on the next round
+        logger.info('Postponing pull of cloud membership %s: %s', membership.pk, e)
+        return
+
+    _schedule_next_membership_pull(membership, changes, time.time() - started_at)
+
+
+@shared_task
+def pull_cloud_membership(membership_pk):
+    _pull_cloud_membership(membership_pk)
+
+
+def _pull_cloud_memberships_batch(cloud_account, membership_pks, backend, lease):
+    if len(membership_pks) >= CLOUD_SWEEP_MIN_MEMBERSHIPS:
+        # Resources of all the tenants are listed once and shared by the memberships of the batch
+        with backend.admin_clients(cloud_account.auth_url), backend.cloud_sweep(cloud_account):
+            for membership_pk in membership_pks:
+                _pull_cloud_membership(membership_pk, backend=backend)
+                lease.extend()
+    else:
+        for membership_pk in membership_pks:
+            _pull_cloud_membership(membership_pk, backend=backend)
+            lease.extend()
+
+
+@shared_task
+def pull_cloud_account_memberships(cloud_account_uuid, membership_pks):
+    cloud_account = models.Cloud.objects.get(uuid=cloud_account_uuid)
+
+    # Memberships of a cloud that is being swept already are handed over to the in-flight sweep,
+    # so that resources of all the tenants are not listed twice
+    lease = Lease('iaas:cloud_memberships:%s' % cloud_account_uuid)
+    lease.join(membership_pks)
+
+    while lease.acquire():
+        try:
+            backend = cloud_account.get_backend()
+            joined_pks = lease.pop_joined()
+
+            while joined_pks:
+                _pull_cloud_memberships_batch(cloud_account, joined_pks, backend, lease)
+                # Memberships joined meanwhile are pulled as another batch, listed afresh
+                joined_pks = lease.pop_joined()
+        finally:
+            lease.release()
+
+        # Memberships might have been joined after the last check, but before the lease was released
+        if not lease.has_joined():
+            break
 
 
 @shared_task
 def pull_cloud_memberships():
     # TODO: Extract to a service
-    queryset = models.CloudProjectMembership.objects.filter(state=SynchronizationStates.IN_SYNC)
+    # Every membership is pulled as often as it changes, see _get_membership_pull_interval()
+    queryset = models.CloudProjectMembership.objects.filter(
+        Q(next_pull_at__isnull=True) | Q(next_pull_at__lte=timezone.now()),
+        state=SynchronizationStates.IN_SYNC,
+    )
 
-    for membership in queryset.iterator():
-        membership.schedule_syncing()
-        membership.save()
+    membership_pks_by_cloud = defaultdict(list)
+    for membership_pk, cloud_pk in queryset.values_list('pk', 'cloud_id').iterator():
+        membership_pks_by_cloud[cloud_pk].append(membership_pk)
+
+    clouds = models.Cloud.objects.filter(pk__in=list(membership_pks_by_cloud)).only('uuid', 'auth_url')
+
+    cloud_uuids = {}
+    membership_pks = []
+    for cloud in clouds:
+        if _is_cloud_suspended(cloud.auth_url):
+            logger.info('Skipping pull of %d memberships of cloud %s, access to it is suspended',
+                        len(membership_pks_by_cloud[cloud.pk]), cloud.uuid)
+            continue
+
+        cloud_uuids[cloud.pk] = cloud.uuid.hex
+        membership_pks.extend(membership_pks_by_cloud[cloud.pk])
+
+    scheduled_pks = set(_schedule_syncing(models.CloudProjectMembership, membership_pks))
+
+    # Memberships of the same cloud are pulled by a single task sharing listings of the cloud
+    signatures = []
+    for cloud_pk, cloud_uuid in cloud_uuids.items():
+        cloud_membership_pks = [pk for pk in membership_pks_by_cloud[cloud_pk] if pk in scheduled_pks]
+        if cloud_membership_pks:
+            signatures.append(pull_cloud_account_memberships.si(cloud_uuid, cloud_membership_pks))
+
+    if signatures:
+        group(signatures).apply_async()
+
+
+@singleflight('iaas:membership:{0}')
+def _pull_cloud_membership_instances(membership_pk, backend=None):
+    membership = models.CloudProjectMembership.objects.get(pk=membership_pk)
+
+    # Full synchronization of the membership is in progress, it will pull instances itself
+    if membership.state != SynchronizationStates.IN_SYNC:
+        logger.debug('Skipping incremental pull of instances of cloud membership %s, it is not in sync',
+                     membership.pk)
+        return
+
+    if backend is None:
+        backend = membership.cloud.get_backend()
+
+    started_at = time.time()
+
+    try:
+        changes = backend.pull_instances(membership, incremental=True)
+    except CloudBackendError:
+        # The membership is still due and is pulled on the next round
+        logger.warn('Failed to pull instances of cloud membership %s', membership.pk, exc_info=1)
+        return
+
+    _schedule_next_membership_instances_pull(membership, changes, time.time() - started_at)
 
-        pull_cloud_membership.delay(membership.pk)
+
+@shared_task
+def pull_cloud_membership_instances(membership_pk):
+    _pull_cloud_membership_instances(membership_pk)
+
+
+@shared_task
+def pull_cloud_account_memberships_instances(cloud_account_uuid, membership_pks):
+    cloud_account = models.Cloud.objects.get(uuid=cloud_account_uuid)
+    backend = cloud_account.get_backend()
+
+    if len(membership_pks) >= CLOUD_SWEEP_MIN_MEMBERSHIPS:
+        # Servers of all the tenants are listed once rather than asked for changes tenant by tenant
+        with backend.admin_clients(cloud_account.auth_url), backend.cloud_sweep(cloud_account):
+            for membership_pk in membership_pks:
+                _pull_cloud_membership_instances(membership_pk, backend=backend)
+    else:
+        for membership_pk in membership_pks:
+            _pull_cloud_membership_instances(membership_pk, backend=backend)
+
+
+@shared_task
+def pull_cloud_memberships_instances():
+    # Instances of every membership are pulled as often as they change, like the memberships themselves
+    queryset = models.CloudProjectMembership.objects.filter(
+        Q(next_instances_pull_at__isnull=True) | Q(next_instances_pull_at__lte=timezone.now()),
+        state=SynchronizationStates.IN_SYNC,
+    )
+
+    membership_pks_by_cloud = defaultdict(list)
+    for membership_pk, cloud_pk in queryset.values_list('pk', 'cloud_id').iterator():
+        membership_pks_by_cloud[cloud_pk].append(membership_pk)
+
+    clouds = models.Cloud.objects.filter(pk__in=list(membership_pks_by_cloud)).only('uuid', 'auth_url')
+
+    # Memberships of the same cloud are pulled by a task per chunk sharing listings of the cloud,
+    # chunks keep every task well within the period of the pulls
+    signatures = []
+    for cloud in clouds:
+        if _is_cloud_suspended(cloud.auth_url):
+            logger.info('Skipping pull of instances of cloud %s, access to it is suspended', cloud.uuid)
+            continue
+
+        membership_pks = membership_pks_by_cloud[cloud.pk]
+        for index in range(0, len(membership_pks), SCHEDULING_CHUNK_SIZE):
+            signatures.append(pull_cloud_account_memberships_instances.si(
+                cloud.uuid.hex, membership_pks[index:index + SCHEDULING_CHUNK_SIZE]))
+
+    if signatures:
+        group(signatures).apply_async()
 
 
 @shared_task
@@ -214,51 +844,53 @@ def sync_cloud_membership(membership_pk):
 
     backend = membership.cloud.get_backend()
 
-    # Propagate cloud-project membership itself
-    backend.push_membership(membership)
+    with backend.admin_clients(membership.cloud.auth_url), backend.tenant_clients(membership):
+        # Propagate cloud-project membership itself
+        backend.push_membership(membership)
 
-    # Propagate ssh public keys of users involved in the project
-    for public_key in core_models.SshPublicKey.objects.filter(
-            user__groups__projectrole__project=membership.project).iterator():
+        # Propagate ssh public keys of users involved in the project
+        public_keys = core_models.SshPublicKey.objects.filter(
+            user__groups__projectrole__project=membership.project).distinct()
         try:
-            backend.push_ssh_public_key(membership, public_key)
+            backend.push_ssh_public_keys(membership, list(public_keys), prune=True)
         except CloudBackendError:
             logger.warn(
-                'Failed to push public key %s to cloud membership %s',
-                public_key.uuid, membership.pk,
+                'Failed to push public keys to cloud membership %s',
+                membership.pk,
                 exc_info=1,
             )
             event_logger.warning(
-                'Failed to push public key %s to cloud membership %s',
-                public_key.uuid, membership.pk,
+                'Failed to push public keys to cloud membership %s',
+                membership.pk,
                 extra={'project': membership.project, 'cloud': membership.cloud, 'event_type': 'sync_cloud_membership'}
             )
 
-    # Propagate membership security groups
-    try:
-        backend.push_security_groups(membership)
-    except CloudBackendError:
-        logger.warn(
-            'Failed to push security groups to cloud membership %s',
-            membership.pk,
-            exc_info=1,
-        )
-        event_logger.warning(
-            'Failed to push security groups to cloud membership %s',
-            public_key.uuid, membership.pk,
-            extra={'project': membership.project, 'cloud': membership.cloud, 'event_type': 'sync_cloud_membership'}
-        )
+        # Propagate membership security groups
+        try:
+            backend.push_security_groups(membership)
+        except CloudBackendError:
+            logger.warn(
+                'Failed to push security groups to cloud membership %s',
+                membership.pk,
+                exc_info=1,
+            )
+            event_logger.warning(
+                'Failed to push security groups to cloud membership %s',
+                membership.pk,
+                extra={'project': membership.project, 'cloud': membership.cloud, 'event_type': 'sync_cloud_membership'}
+            )
+
+        # Pull created membership quotas
+        try:
+            backend.pull_resource_quota(membership)
+            backend.pull_resource_quota_usage(membership)
+        except CloudBackendError:
+            logger.warn(
+                'Failed to pull resource quota and usage data to cloud membership %s',
+                membership.pk,
+                exc_info=1,
+            )
 
-    # Pull created membership quotas
-    try:
-        backend.pull_resource_quota(membership)
-        backend.pull_resource_quota_usage(membership)
-    except CloudBackendError:
-        logger.warn(
-            'Failed to pull resource quota and usage data to cloud membership %s',
-            membership.pk,
-            exc_info=1,
-        )
 
 @shared_task
 @tracked_processing(
@@ -266,14 +898,58 @@ def sync_cloud_membership(membership_pk):
     processing_state='begin_syncing',
     desired_state='set_in_sync',
 )
+@singleflight('iaas:cloud:{0}')
 def pull_images(cloud_account_uuid):
     cloud = models.Cloud.objects.get(uuid=cloud_account_uuid)
-    cloud.get_backend().pull_images(cloud)
+
+    backend = cloud.get_backend()
+    with backend.admin_clients(cloud.auth_url):
+        backend.pull_images(cloud)
+
+
+def enqueue_ssh_public_keys(ssh_public_keys_uuids, membership_pks):
+    """
+    Schedule pushing of public keys to cloud memberships coalescing it with other pending pushes.
+
+    Keys are queued per membership in the database for SSH_PUBLIC_KEYS_PUSH_DELAY seconds,
+    then all of them are pushed to the membership at once by the first scheduled push.
+    """
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    delay = nc_settings.get('SSH_PUBLIC_KEYS_PUSH_DELAY', 10)
+
+    public_key_pks = list(core_models.SshPublicKey.objects.filter(
+        uuid__in=ssh_public_keys_uuids).values_list('pk', flat=True))
+
+    for membership_pk in membership_pks:
+        queued = False
+        for public_key_pk in public_key_pks:
+            _, created = models.QueuedSshPublicKey.objects.get_or_create(
+                cloud_project_membership_id=membership_pk, public_key_id=public_key_pk)
+            queued = queued or created
+
+        # Keys that are queued already will be pushed by the push scheduled with them
+        if queued:
+            push_queued_ssh_public_keys.apply_async(args=(membership_pk,), countdown=delay)
+
+
+@shared_task
+def push_queued_ssh_public_keys(membership_pk):
+    queued_keys = list(models.QueuedSshPublicKey.objects.filter(
+        cloud_project_membership_id=membership_pk).select_related('public_key'))
+
+    if not queued_keys:
+        # Keys have been pushed by a push scheduled earlier
+        return
+
+    # Delete only the keys that are pushed, the ones queued meanwhile have their own push scheduled
+    models.QueuedSshPublicKey.objects.filter(pk__in=[k.pk for k in queued_keys]).delete()
+
+    push_ssh_public_keys([k.public_key.uuid.hex for k in queued_keys], [membership_pk])
 
 
 @shared_task
 def push_ssh_public_keys(ssh_public_keys_uuids, membership_pks):
-    public_keys = core_models.SshPublicKey.objects.filter(uuid__in=ssh_public_keys_uuids)
+    public_keys = list(core_models.SshPublicKey.objects.filter(uuid__in=ssh_public_keys_uuids))
 
     existing_keys = set(k.uuid.hex for k in public_keys)
     missing_keys = set(ssh_public_keys_uuids) - existing_keys
@@ -284,8 +960,9 @@ def push_ssh_public_keys(ssh_public_keys_uuids, membership_pks):
         )
 
     membership_queryset = models.CloudProjectMembership.objects.filter(
-        pk__in=membership_pks)
+        pk__in=membership_pks).select_related('cloud')
 
+    memberships = []
     for membership in membership_queryset.iterator():
         if membership.state != core_models.SynchronizationStates.IN_SYNC:
             logging.warn(
@@ -294,16 +971,42 @@ def push_ssh_public_keys(ssh_public_keys_uuids, membership_pks):
             )
             continue
 
-        backend = membership.cloud.get_backend()
-        for public_key in public_keys:
-            try:
-                backend.push_ssh_public_key(membership, public_key)
-            except CloudBackendError:
-                logger.warn(
-                    'Failed to push public key %s to cloud membership %s',
-                    public_key.uuid, membership.pk,
-                    exc_info=1,
-                )
+        memberships.append(membership)
+
+    _push_memberships_ssh_public_keys(memberships, public_keys)
+
+
+def _push_membership_ssh_public_keys(membership, public_keys):
+    backend = membership.cloud.get_backend()
+    try:
+        with backend.tenant_clients(membership):
+            backend.push_ssh_public_keys(membership, public_keys)
+    except CloudBackendError:
+        logger.warn(
+            'Failed to push public keys %s to cloud membership %s',
+            ', '.join(public_key.uuid.hex for public_key in public_keys), membership.pk,
+            exc_info=1,
+        )
+
+
+def _push_memberships_ssh_public_keys(memberships, public_keys):
+    """
+    Push public keys to memberships concurrently, using a bounded pool of threads.
+
+    Memberships must have their clouds fetched, threads do not touch the database.
+    """
+    if not memberships or not public_keys:
+        return
+
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    concurrency = nc_settings.get('SSH_PUBLIC_KEYS_PUSH_CONCURRENCY', 10)
+
+    pool = ThreadPool(min(concurrency, len(memberships)))
+    try:
+        pool.map(lambda membership: _push_membership_ssh_public_keys(membership, public_keys), memberships)
+    finally:
+        pool.close()
+        pool.join()
 
 
 @shared_task
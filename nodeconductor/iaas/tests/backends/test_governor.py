@@ -0,0 +1,142 @@
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from keystoneclient import exceptions as keystone_exceptions
+from novaclient import exceptions as nova_exceptions
+import mock
+import requests
+
+from nodeconductor.iaas.backend import CloudUnavailableError
+from nodeconductor.iaas.backend.governor import CloudGovernor, is_cloud_failure
+from nodeconductor.iaas.backend.openstack import OpenStackClients
+
+
+@override_settings(NODECONDUCTOR={
+    'CLOUD_GOVERNOR': {'CONCURRENCY': 1, 'WAIT_TIMEOUT': 0, 'FAILURE_THRESHOLD': 2},
+})
+class CloudGovernorTest(SimpleTestCase):
+    auth_url = 'http://keystone.example.com:5000/v2.0'
+
+    def setUp(self):
+        cache.clear()
+        self.governor = CloudGovernor(self.auth_url)
+
+    def tearDown(self):
+        cache.clear()
+
+    def fail_call(self, governor=None, exception=None):
+        exception = exception or nova_exceptions.ClientException(500, 'Internal error')
+        with self.assertRaises(exception.__class__):
+            with (governor or self.governor).access():
+                raise exception
+
+    def test_call_fails_when_all_slots_are_held(self):
+        with self.governor.access():
+            with self.assertRaises(CloudUnavailableError):
+                CloudGovernor(self.auth_url).call(mock.Mock())
+
+    def test_slot_is_released_after_call(self):
+        self.governor.call(mock.Mock())
+
+        func = mock.Mock(return_value='result')
+        self.assertEqual(CloudGovernor(self.auth_url).call(func, 'arg'), 'result')
+        func.assert_called_once_with('arg')
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        self.fail_call()
+        self.assertFalse(self.governor.is_open())
+
+        self.fail_call()
+        self.assertTrue(self.governor.is_open())
+
+        func = mock.Mock()
+        with self.assertRaises(CloudUnavailableError):
+            self.governor.call(func)
+        self.assertFalse(func.called)
+
+    def test_client_errors_do_not_open_circuit(self):
+        for _ in range(3):
+            self.fail_call(exception=nova_exceptions.NotFound(404, 'Not found'))
+            self.fail_call(exception=keystone_exceptions.Unauthorized('Invalid user / password'))
+
+        self.assertFalse(self.governor.is_open())
+
+    def test_client_errors_reset_failures(self):
+        self.fail_call()
+        self.fail_call(exception=nova_exceptions.NotFound(404, 'Not found'))
+        self.fail_call()
+
+        self.assertFalse(self.governor.is_open())
+
+    def test_transport_errors_and_timeouts_are_cloud_failures(self):
+        self.assertTrue(is_cloud_failure(requests.exceptions.ConnectionError('Connection refused')))
+        self.assertTrue(is_cloud_failure(keystone_exceptions.ConnectionRefused('Connection refused')))
+        self.assertTrue(is_cloud_failure(keystone_exceptions.RequestTimeout('Request timeout')))
+        self.assertTrue(is_cloud_failure(nova_exceptions.ClientException(503, 'Service unavailable')))
+        self.assertFalse(is_cloud_failure(nova_exceptions.Conflict(409, 'Conflict')))
+        self.assertFalse(is_cloud_failure(keystone_exceptions.AuthorizationFailure('Invalid user / password')))
+
+    def test_circuit_closes_after_successful_probe(self):
+        self.fail_call()
+        self.fail_call()
+
+        # Recovery timeout has passed
+        cache.delete(self.governor._get_cache_key('open'))
+
+        with self.governor.access():
+            # Only a single probe is let through
+            with self.assertRaises(CloudUnavailableError):
+                CloudGovernor(self.auth_url).call(mock.Mock())
+
+        self.fail_call()
+        self.assertFalse(self.governor.is_open())
+
+    def test_circuit_opens_again_after_failed_probe(self):
+        self.fail_call()
+        self.fail_call()
+
+        cache.delete(self.governor._get_cache_key('open'))
+        self.fail_call()
+
+        self.assertTrue(self.governor.is_open())
+
+
+@override_settings(NODECONDUCTOR={
+    'CLOUD_GOVERNOR': {'CONCURRENCY': 1, 'WAIT_TIMEOUT': 0, 'FAILURE_THRESHOLD': 2},
+})
+class GovernedClientsTest(SimpleTestCase):
+    auth_url = 'http://keystone.example.com:5000/v2.0'
+
+    def setUp(self):
+        cache.clear()
+        self.governor = CloudGovernor(self.auth_url)
+
+        self.nova = mock.Mock()
+        backend = mock.Mock()
+        backend.create_nova_client.return_value = self.nova
+        self.clients = OpenStackClients(backend, mock.Mock, (self.auth_url, 'tenant'))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_every_client_call_holds_a_slot(self):
+        nova = self.clients.nova
+
+        with self.governor.access():
+            with self.assertRaises(CloudUnavailableError):
+                nova.servers.list()
+
+        self.assertFalse(self.nova.servers.list.called)
+
+    def test_failed_client_calls_open_circuit_even_if_failures_are_handled(self):
+        self.nova.servers.list.side_effect = nova_exceptions.ClientException(500, 'Internal error')
+
+        for _ in range(2):
+            try:
+                self.clients.nova.servers.list()
+            except nova_exceptions.ClientException:
+                pass
+
+        self.assertTrue(self.governor.is_open())
@@ -1,15 +1,26 @@
 from __future__ import unicode_literals
 
 import collections
+import datetime
+import time
 import unittest
+import uuid
 
+from django.core.cache import cache
+from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from keystoneclient import access
 from keystoneclient import exceptions as keystone_exceptions
 import mock
+from novaclient import exceptions as nova_exceptions
 
-from nodeconductor.iaas.backend import CloudBackendError
-from nodeconductor.iaas.backend.openstack import OpenStackBackend
-from nodeconductor.iaas.models import Flavor, Instance, Image, ResourceQuota, ResourceQuotaUsage, FloatingIP
+from nodeconductor.iaas.backend import CloudBackendError, CloudBackendInternalError
+from nodeconductor.iaas.backend.openstack import OpenStackBackend, OpenStackCloudSweep, LISTING_PAGE_SIZE
+from nodeconductor.iaas.models import (
+    CloudProjectMembership, Flavor, Instance, Image, ResourceQuota, ResourceQuotaUsage, FloatingIP,
+    SecurityGroup, SecurityGroupRule)
 from nodeconductor.iaas.tests import factories
 
 NovaFlavor = collections.namedtuple(
@@ -68,6 +79,65 @@ class OpenStackBackendConversionTest(unittest.TestCase):
         self.assertEqual(core_disk, 4096)
 
 
+class OpenStackBackendTokenCacheTest(unittest.TestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.membership = mock.Mock(username='user', password='pass', tenant_id='tenant')
+        self.membership.cloud.auth_url = 'http://example.com:5000/v2'
+
+        self.backend = OpenStackBackend()
+
+        password_patcher = mock.patch('nodeconductor.iaas.backend.openstack.v2.Password')
+        session_patcher = mock.patch('nodeconductor.iaas.backend.openstack.keystone_session.Session')
+        self.password_mock = password_patcher.start()
+        self.session_mock = session_patcher.start()
+        self.addCleanup(password_patcher.stop)
+        self.addCleanup(session_patcher.stop)
+
+    def tearDown(self):
+        cache.clear()
+
+    def given_token_expiring_in(self, delta):
+        expires = timezone.now() + delta
+        self.password_mock.return_value.auth_ref = access.AccessInfo.factory(body={
+            'access': {
+                'token': {'id': 'token-id', 'expires': expires.isoformat()},
+                'user': {'id': 'user-id', 'name': 'user'},
+                'serviceCatalog': [],
+            },
+        })
+
+    def test_tenant_session_signs_in_once_for_same_credentials(self):
+        self.given_token_expiring_in(datetime.timedelta(hours=1))
+
+        self.backend.create_tenant_session(self.membership)
+        self.backend.create_tenant_session(self.membership)
+
+        self.assertEqual(self.session_mock.return_value.get_token.call_count, 1,
+                         'Cached token should have been reused')
+
+    def test_tenant_session_signs_in_again_if_token_is_about_to_expire(self):
+        self.given_token_expiring_in(datetime.timedelta(seconds=30))
+
+        self.backend.create_tenant_session(self.membership)
+        self.backend.create_tenant_session(self.membership)
+
+        self.assertEqual(self.session_mock.return_value.get_token.call_count, 2,
+                         'Token about to expire should not have been reused')
+
+    def test_tenant_session_signs_in_again_after_token_invalidation(self):
+        self.given_token_expiring_in(datetime.timedelta(hours=1))
+
+        self.backend.create_tenant_session(self.membership)
+        self.backend.invalidate_session_token(
+            self.membership.cloud.auth_url, self.membership.username, self.membership.tenant_id)
+        self.backend.create_tenant_session(self.membership)
+
+        self.assertEqual(self.session_mock.return_value.get_token.call_count, 2,
+                         'Invalidated token should not have been reused')
+
+
 class OpenStackBackendCloudAccountApiTest(unittest.TestCase):
 
     def setUp(self):
@@ -123,7 +193,7 @@ class OpenStackBackendMembershipApiTest(unittest.TestCase):
         self.backend.create_cinder_client = mock.Mock(return_value=self.cinder_client)
         self.backend.get_or_create_tenant = mock.Mock(return_value=self.tenant)
         self.backend.get_or_create_user = mock.Mock(return_value=('john', 'doe'))
-        self.backend.get_or_create_network = mock.Mock()
+        self.backend.get_or_create_network = mock.Mock(return_value='network-id')
         self.backend.ensure_user_is_tenant_admin = mock.Mock()
         self.backend.push_security_group = mock.Mock()
         self.backend.create_tenant_session = mock.Mock()
@@ -158,6 +228,7 @@ class OpenStackBackendMembershipApiTest(unittest.TestCase):
         self.assertEquals(self.membership.username, 'john')
         self.assertEquals(self.membership.password, 'doe')
         self.assertEquals(self.membership.tenant_id, self.tenant.id)
+        self.assertEquals(self.membership.network_id, 'network-id')
 
         self.membership.save.assert_called_once_with()
 
@@ -232,6 +303,25 @@ class OpenStackBackendMembershipApiTest(unittest.TestCase):
         reread_quota_usage = ResourceQuotaUsage.objects.get(id=quota_usage.id)
         self.assertEqual(reread_quota_usage.max_instances, len(self.instances))
 
+    def test_tenant_clients_context_reuses_session_and_clients(self):
+        membership = factories.CloudProjectMembershipFactory(tenant_id='test_backend_id')
+        # when
+        with self.backend.tenant_clients(membership):
+            self.backend.pull_resource_quota(membership)
+            self.backend.pull_resource_quota_usage(membership)
+        # then
+        self.assertEqual(self.backend.create_tenant_session.call_count, 1)
+        self.assertEqual(self.backend.create_nova_client.call_count, 1)
+        self.assertEqual(self.backend.create_cinder_client.call_count, 1)
+
+    def test_tenant_clients_are_not_reused_outside_of_context(self):
+        membership = factories.CloudProjectMembershipFactory(tenant_id='test_backend_id')
+        # when
+        self.backend.pull_resource_quota(membership)
+        self.backend.pull_resource_quota_usage(membership)
+        # then
+        self.assertEqual(self.backend.create_tenant_session.call_count, 2)
+
     def test_pull_quota_resource_usage_intiates_backup_storage(self):
         # this test will be removed, as soon as we can get backup storage size from openstack
         from nodeconductor.backup.tests import factories as backup_factories
@@ -254,6 +344,71 @@ class OpenStackBackendMembershipApiTest(unittest.TestCase):
         )
 
 
+class OpenStackBackendSshPublicKeysTest(unittest.TestCase):
+    def setUp(self):
+        self.nova_client = mock.Mock()
+        self.membership = mock.Mock()
+
+        self.backend = OpenStackBackend()
+        self.backend.create_tenant_session = mock.Mock()
+        self.backend.create_nova_client = mock.Mock(return_value=self.nova_client)
+
+        self.public_key = self._mock_public_key('key1', 'aa:bb')
+
+    def _mock_public_key(self, name, fingerprint):
+        public_key = mock.Mock(uuid=uuid.uuid4(), fingerprint=fingerprint, public_key='ssh-rsa %s' % name)
+        public_key.name = name
+        return public_key
+
+    def _mock_keypair(self, public_key, fingerprint=None):
+        keypair = mock.Mock(fingerprint=fingerprint or public_key.fingerprint)
+        keypair.name = self.backend.get_key_name(public_key)
+        return keypair
+
+    def test_push_ssh_public_keys_skips_existing_keys(self):
+        self.nova_client.keypairs.list.return_value = [self._mock_keypair(self.public_key)]
+
+        self.backend.push_ssh_public_keys(self.membership, [self.public_key])
+
+        self.assertFalse(self.nova_client.keypairs.delete.called)
+        self.assertFalse(self.nova_client.keypairs.create.called)
+
+    def test_push_ssh_public_keys_creates_missing_and_recreates_changed_keys(self):
+        changed_key = self._mock_public_key('key2', 'cc:dd')
+        self.nova_client.keypairs.list.return_value = [self._mock_keypair(changed_key, fingerprint='ee:ff')]
+
+        self.backend.push_ssh_public_keys(self.membership, [self.public_key, changed_key])
+
+        self.nova_client.keypairs.delete.assert_called_once_with(self.backend.get_key_name(changed_key))
+        self.assertEqual(self.nova_client.keypairs.create.call_count, 2)
+        self.nova_client.keypairs.create.assert_any_call(
+            name=self.backend.get_key_name(self.public_key), public_key=self.public_key.public_key)
+        self.nova_client.keypairs.create.assert_any_call(
+            name=self.backend.get_key_name(changed_key), public_key=changed_key.public_key)
+
+    def test_push_ssh_public_keys_deletes_only_extra_nodeconductor_keys_on_prune(self):
+        extra_keypair = self._mock_keypair(self._mock_public_key('key2', 'cc:dd'))
+        foreign_keypair = mock.Mock()
+        foreign_keypair.name = 'manually-added-key'
+        self.nova_client.keypairs.list.return_value = [
+            self._mock_keypair(self.public_key), extra_keypair, foreign_keypair]
+
+        self.backend.push_ssh_public_keys(self.membership, [self.public_key], prune=True)
+
+        self.nova_client.keypairs.delete.assert_called_once_with(extra_keypair.name)
+        self.assertFalse(self.nova_client.keypairs.create.called)
+
+    def test_push_ssh_public_keys_raises_cloud_backend_error_after_pushing_other_keys(self):
+        other_key = self._mock_public_key('key2', 'cc:dd')
+        self.nova_client.keypairs.list.return_value = []
+        self.nova_client.keypairs.create.side_effect = [nova_exceptions.ClientException(500), mock.Mock()]
+
+        with self.assertRaises(CloudBackendError):
+            self.backend.push_ssh_public_keys(self.membership, [self.public_key, other_key])
+
+        self.assertEqual(self.nova_client.keypairs.create.call_count, 2)
+
+
 class OpenStackBackendSecurityGroupsTest(TransactionTestCase):
 
     def setUp(self):
@@ -273,7 +428,7 @@ class OpenStackBackendSecurityGroupsTest(TransactionTestCase):
         self.backend.create_neutron_client = mock.Mock(return_value=self.neutron_client)
         self.backend.get_or_create_tenant = mock.Mock(return_value=self.tenant)
         self.backend.get_or_create_user = mock.Mock(return_value=('john', 'doe'))
-        self.backend.get_or_create_network = mock.Mock()
+        self.backend.get_or_create_network = mock.Mock(return_value='network-id')
         self.backend.ensure_user_is_tenant_admin = mock.Mock()
         self.backend.push_security_group = mock.Mock()
         self.backend.create_tenant_session = mock.Mock()
@@ -297,6 +452,7 @@ class OpenStackBackendSecurityGroupsTest(TransactionTestCase):
         group2 = mock.Mock()
         group2.name = 'group2'
         group2.id = 1
+        group2.rules = []
         self.nova_client.security_groups.list = mock.Mock(return_value=[group2])
         # when
         self.backend.push_security_groups(self.membership)
@@ -318,6 +474,110 @@ class OpenStackBackendSecurityGroupsTest(TransactionTestCase):
         with self.assertRaises(CloudBackendError):
             self.backend.push_security_groups(self.membership)
 
+    def _create_nc_rule(self, group, backend_id, from_port):
+        return SecurityGroupRule.objects.create(
+            group=group, protocol='tcp', from_port=from_port, to_port=from_port,
+            cidr='10.0.0.0/24', backend_id=backend_id)
+
+    def _mock_backend_rule(self, backend_id, from_port, ip_protocol='tcp', cidr='10.0.0.0/24'):
+        return {
+            'id': backend_id,
+            'ip_protocol': ip_protocol,
+            'from_port': from_port,
+            'to_port': from_port,
+            'ip_range': {'cidr': cidr},
+        }
+
+    def _mock_backend_group(self, group, rules):
+        backend_group = mock.Mock()
+        backend_group.name = group.name
+        backend_group.id = group.backend_id
+        backend_group.rules = rules
+        return backend_group
+
+    def test_push_security_groups_skips_groups_with_reordered_equal_rules(self):
+        group = factories.SecurityGroupFactory(cloud_project_membership=self.membership, backend_id='1')
+        self._create_nc_rule(group, '10', 22)
+        self._create_nc_rule(group, '11', 80)
+        backend_group = self._mock_backend_group(group, [
+            self._mock_backend_rule('11', 80),
+            self._mock_backend_rule('10', 22),
+        ])
+        self.nova_client.security_groups.list = mock.Mock(return_value=[backend_group])
+        # when
+        self.backend.push_security_groups(self.membership)
+        # then
+        self.assertFalse(self.backend.update_security_group.called)
+        self.assertFalse(self.backend.push_security_group_rules.called)
+
+    def test_push_security_group_rules_writes_only_differing_rules(self):
+        group = factories.SecurityGroupFactory(cloud_project_membership=self.membership, backend_id='1')
+        self._create_nc_rule(group, '10', 22)
+        new_rule = self._create_nc_rule(group, '', 443)
+        backend_rules = [
+            self._mock_backend_rule('10', 22),
+            self._mock_backend_rule('12', 8080),
+        ]
+        self.nova_client.security_group_rules.create.return_value = mock.Mock(id='13')
+        del self.backend.push_security_group_rules
+        # when
+        self.backend.push_security_group_rules(group, self.nova_client, backend_rules=backend_rules)
+        # then
+        self.nova_client.security_group_rules.delete.assert_called_once_with('12')
+        self.nova_client.security_group_rules.create.assert_called_once_with(
+            parent_group_id='1', ip_protocol='tcp', from_port=443, to_port=443, cidr='10.0.0.0/24')
+        self.assertEqual(SecurityGroupRule.objects.get(pk=new_rule.pk).backend_id, '13')
+
+    def test_pull_security_groups_writes_only_differing_rules(self):
+        group = factories.SecurityGroupFactory(cloud_project_membership=self.membership, backend_id='1')
+        kept_rule = self._create_nc_rule(group, '10', 22)
+        stale_rule = self._create_nc_rule(group, '11', 80)
+        backend_group = self._mock_backend_group(group, [
+            self._mock_backend_rule('12', 443),
+            self._mock_backend_rule('10', 22),
+        ])
+        self.nova_client.security_groups.list = mock.Mock(return_value=[backend_group])
+        # when
+        self.backend.pull_security_groups(self.membership)
+        # then
+        rules = SecurityGroupRule.objects.filter(group=group)
+        self.assertEqual(set(rules.values_list('backend_id', flat=True)), {'10', '12'})
+        self.assertTrue(rules.filter(pk=kept_rule.pk).exists())
+        self.assertFalse(rules.filter(pk=stale_rule.pk).exists())
+        self.assertFalse(self.nova_client.security_groups.get.called)
+
+    def test_pull_security_groups_creates_groups_with_rules_and_deletes_stale_groups(self):
+        stale_group = factories.SecurityGroupFactory(cloud_project_membership=self.membership, backend_id='2')
+        backend_group = mock.Mock()
+        backend_group.name = 'new group'
+        backend_group.id = '3'
+        backend_group.rules = [self._mock_backend_rule('14', None, ip_protocol=None, cidr=None)]
+        del backend_group.rules[0]['ip_range']['cidr']
+        self.nova_client.security_groups.list = mock.Mock(return_value=[backend_group])
+        # when
+        self.backend.pull_security_groups(self.membership)
+        # then
+        self.assertFalse(SecurityGroup.objects.filter(pk=stale_group.pk).exists())
+        new_group = SecurityGroup.objects.get(cloud_project_membership=self.membership, backend_id='3')
+        rule = new_group.rules.get()
+        self.assertEqual((rule.protocol, rule.cidr, rule.backend_id), ('', '0.0.0.0/0', '14'))
+
+    def test_pull_security_groups_creates_new_groups_in_bulk(self):
+        backend_groups = []
+        for backend_id in ('4', '5'):
+            backend_group = mock.Mock(id=backend_id, rules=[self._mock_backend_rule('1%s' % backend_id, 22)])
+            backend_group.name = 'group %s' % backend_id
+            backend_groups.append(backend_group)
+        self.nova_client.security_groups.list = mock.Mock(return_value=backend_groups)
+        # when
+        with mock.patch.object(SecurityGroup.objects, 'create') as mocked_create:
+            self.backend.pull_security_groups(self.membership)
+        # then
+        self.assertFalse(mocked_create.called)
+        for backend_id in ('4', '5'):
+            group = SecurityGroup.objects.get(cloud_project_membership=self.membership, backend_id=backend_id)
+            self.assertEqual(group.rules.get().backend_id, '1%s' % backend_id)
+
 
 class OpenStackBackendFlavorApiTest(TransactionTestCase):
     def setUp(self):
@@ -408,6 +668,23 @@ class OpenStackBackendFlavorApiTest(TransactionTestCase):
 
         self.assertFalse(is_present, 'Flavor should have been deleted from the database')
 
+    def test_pull_flavors_does_not_write_unchanged_flavors(self):
+        self.nova_client.flavors.findall.return_value = [nc_flavor_to_nova_flavor(f) for f in self.flavors]
+
+        # Only flavors are read
+        with self.assertNumQueries(1):
+            self.backend.pull_flavors(self.cloud_account)
+
+    def test_pull_flavors_creates_new_flavors_at_once(self):
+        self.nova_client.flavors.findall.return_value = [
+            NovaFlavor(next_unique_flavor_id(), 'flavor', 1, 512, 10) for _ in range(3)
+        ] + [nc_flavor_to_nova_flavor(f) for f in self.flavors]
+
+        with self.assertNumQueries(2):
+            self.backend.pull_flavors(self.cloud_account)
+
+        self.assertEqual(self.cloud_account.flavors.count(), 5)
+
 
 class OpenStackBackendFloatingIPTest(TransactionTestCase):
 
@@ -428,7 +705,7 @@ class OpenStackBackendFloatingIPTest(TransactionTestCase):
         self.backend.create_neutron_client = mock.Mock(return_value=self.neutron_client)
         self.backend.get_or_create_tenant = mock.Mock(return_value=self.tenant)
         self.backend.get_or_create_user = mock.Mock(return_value=('john', 'doe'))
-        self.backend.get_or_create_network = mock.Mock()
+        self.backend.get_or_create_network = mock.Mock(return_value='network-id')
         self.backend.ensure_user_is_tenant_admin = mock.Mock()
         self.backend.create_tenant_session = mock.Mock()
         self.floating_ips = [
@@ -467,6 +744,162 @@ class OpenStackBackendFloatingIPTest(TransactionTestCase):
         self.assertEqual(reread_ip.status, backend_ip['status'])
         self.assertEqual(reread_ip.backend_id, backend_ip['id'])
 
+    def test_pull_floating_ips_creates_new_ips_at_once_and_skips_unchanged_ones(self):
+        backend_ip = self.floating_ips[0]
+        factories.FloatingIPFactory(
+            backend_id=backend_ip['id'], address=backend_ip['floating_ip_address'], status=backend_ip['status'],
+            cloud_project_membership=self.membership)
+
+        with self.assertNumQueries(2):
+            changes = self.backend.pull_floating_ips(self.membership)
+
+        self.assertEqual(FloatingIP.objects.filter(cloud_project_membership=self.membership).count(), 3)
+        self.assertEqual(changes, 2)
+
+
+class OpenStackBackendCloudSweepTest(TransactionTestCase):
+    def setUp(self):
+        self.nova_client = mock.Mock()
+        self.nova_client.servers.list.return_value = []
+        self.nova_client.servers.findall.return_value = []
+        self.nova_client.flavors.list.return_value = []
+        self.cinder_client = mock.Mock()
+        self.cinder_client.volumes.list.return_value = []
+        self.neutron_client = mock.Mock()
+
+        self.cloud = factories.CloudFactory()
+        self.membership1 = factories.CloudProjectMembershipFactory(cloud=self.cloud)
+        self.membership2 = factories.CloudProjectMembershipFactory(cloud=self.cloud)
+
+        # Mock low level non-AbstractCloudBackend api methods
+        self.backend = OpenStackBackend()
+        self.backend.create_admin_session = mock.Mock()
+        self.backend.create_tenant_session = mock.Mock()
+        self.backend.create_nova_client = mock.Mock(return_value=self.nova_client)
+        self.backend.create_cinder_client = mock.Mock(return_value=self.cinder_client)
+        self.backend.create_neutron_client = mock.Mock(return_value=self.neutron_client)
+
+    def test_cloud_sweep_lists_servers_of_all_tenants_once(self):
+        with self.backend.cloud_sweep(self.cloud):
+            self.backend.pull_instances(self.membership1)
+            self.backend.pull_instances(self.membership2)
+
+        self.nova_client.servers.list.assert_called_once_with(
+            search_opts={'all_tenants': 1}, marker=None, limit=OpenStackCloudSweep.PAGE_SIZE)
+        self.assertFalse(self.backend.create_tenant_session.called,
+                         'Tenant session should not have been created within cloud sweep')
+
+    def test_cloud_sweep_lists_servers_page_by_page(self):
+        servers = [mock.Mock(id='server-%s' % i, tenant_id=self.membership1.tenant_id) for i in range(3)]
+        self.nova_client.servers.list.side_effect = lambda search_opts, marker, limit: {
+            None: servers[:2],
+            'server-1': servers[2:],
+            'server-2': [],
+        }[marker]
+
+        with self.backend.cloud_sweep(self.cloud) as sweep:
+            listed_servers = sweep.get_servers(self.membership1.tenant_id)
+
+        self.assertEqual(listed_servers, servers)
+
+    def test_cloud_sweep_stops_listing_when_pagination_is_ignored(self):
+        servers = [mock.Mock(id='server-%s' % i, tenant_id=self.membership1.tenant_id) for i in range(3)]
+        self.nova_client.servers.list.return_value = servers
+
+        with self.backend.cloud_sweep(self.cloud) as sweep:
+            listed_servers = sweep.get_servers(self.membership1.tenant_id)
+
+        self.assertEqual(listed_servers, servers)
+        self.assertEqual(self.nova_client.servers.list.call_count, 2)
+
+    def test_cloud_sweep_lists_servers_again_once_listing_is_outdated(self):
+        with self.backend.cloud_sweep(self.cloud) as sweep:
+            sweep.get_servers(self.membership1.tenant_id)
+            with mock.patch('time.time', return_value=time.time() + sweep.max_age):
+                sweep.get_servers(self.membership1.tenant_id)
+
+        self.assertEqual(self.nova_client.servers.list.call_count, 2)
+
+    def test_cloud_sweep_keeps_instances_whose_servers_were_created_after_listing(self):
+        instance = factories.InstanceFactory(
+            backend_id='server-uuid-1', state=Instance.States.ONLINE, cloud_project_membership=self.membership1)
+
+        with self.backend.cloud_sweep(self.cloud):
+            self.backend.pull_instances(self.membership1)
+
+        self.nova_client.servers.get.assert_called_once_with('server-uuid-1')
+        self.assertTrue(Instance.objects.filter(pk=instance.pk).exists())
+
+    def test_cloud_sweep_deletes_instances_whose_servers_are_not_found(self):
+        instance = factories.InstanceFactory(
+            backend_id='server-uuid-1', state=Instance.States.ONLINE, cloud_project_membership=self.membership1)
+        self.nova_client.servers.get.side_effect = nova_exceptions.NotFound(404)
+
+        with self.backend.cloud_sweep(self.cloud):
+            self.backend.pull_instances(self.membership1)
+
+        self.assertFalse(Instance.objects.filter(pk=instance.pk).exists())
+
+    def test_cloud_sweep_looks_up_servers_of_stale_instances_outside_of_transaction(self):
+        factories.InstanceFactory(
+            backend_id='server-uuid-1', state=Instance.States.ONLINE, cloud_project_membership=self.membership1)
+        in_atomic_block = []
+        self.nova_client.servers.get.side_effect = lambda server_id: in_atomic_block.append(
+            connection.in_atomic_block)
+
+        with self.backend.cloud_sweep(self.cloud):
+            self.backend.pull_instances(self.membership1)
+
+        self.assertEqual(in_atomic_block, [False])
+
+    def test_cloud_sweep_marks_instances_synced_as_of_listing(self):
+        with self.backend.cloud_sweep(self.cloud) as sweep:
+            sweep.get_servers(self.membership1.tenant_id)
+            with mock.patch('time.time', return_value=time.time() + 30):
+                self.backend.pull_instances(self.membership1, incremental=True)
+
+        membership = CloudProjectMembership.objects.get(pk=self.membership1.pk)
+        self.assertLess(membership.instances_synced_at, timezone.now() - datetime.timedelta(seconds=20))
+
+    def test_cloud_sweep_keeps_floating_ips_allocated_after_listing(self):
+        self.neutron_client.list_floatingips.side_effect = lambda **filters: {'floatingips': [
+            {'status': 'DOWN', 'floating_ip_address': '10.7.201.114', 'id': 'ip-2',
+             'tenant_id': self.membership1.tenant_id},
+        ] if filters else []}
+        factories.FloatingIPFactory(backend_id='ip-2', cloud_project_membership=self.membership1)
+
+        with self.backend.cloud_sweep(self.cloud):
+            self.backend.pull_floating_ips(self.membership1)
+
+        self.assertTrue(FloatingIP.objects.filter(backend_id='ip-2').exists())
+
+    def test_cloud_sweep_distributes_floating_ips_between_memberships_by_tenant(self):
+        self.neutron_client.list_floatingips.return_value = {'floatingips': [
+            {'status': 'ACTIVE', 'floating_ip_address': '10.7.201.163', 'id': 'ip-1',
+             'tenant_id': self.membership1.tenant_id},
+            {'status': 'DOWN', 'floating_ip_address': '10.7.201.114', 'id': 'ip-2',
+             'tenant_id': self.membership2.tenant_id},
+        ]}
+
+        with self.backend.cloud_sweep(self.cloud):
+            self.backend.pull_floating_ips(self.membership1)
+            self.backend.pull_floating_ips(self.membership2)
+
+        self.neutron_client.list_floatingips.assert_called_once_with()
+        self.assertTrue(FloatingIP.objects.filter(
+            backend_id='ip-1', cloud_project_membership=self.membership1).exists())
+        self.assertTrue(FloatingIP.objects.filter(
+            backend_id='ip-2', cloud_project_membership=self.membership2).exists())
+        self.assertEqual(FloatingIP.objects.count(), 2)
+
+    def test_memberships_are_pulled_with_tenant_clients_outside_of_cloud_sweep(self):
+        self.backend.pull_instances(self.membership1)
+
+        self.assertTrue(self.backend.create_tenant_session.called,
+                        'Tenant session should have been created outside of cloud sweep')
+        self.assertFalse(self.backend.create_admin_session.called,
+                         'Admin session should not have been created outside of cloud sweep')
+
 
 class OpenStackBackendImageApiTest(TransactionTestCase):
     def setUp(self):
@@ -680,12 +1113,32 @@ class OpenStackBackendImageApiTest(TransactionTestCase):
         except Image.DoesNotExist:
             self.fail("Image's backend_id should have been updated")
 
+    def test_pulling_does_not_write_up_to_date_images(self):
+        # Given
+        existing_image = GlanceImage(self.image.backend_id, is_public=True, deleted=False)
+
+        self.glance_client.images.list.return_value = iter([
+            existing_image,
+        ])
+
+        # When
+        # Only template mappings and images are read
+        with self.assertNumQueries(2):
+            self.backend.pull_images(self.cloud_account)
+
+        # Then
+        self.assertTrue(self.cloud_account.images.filter(pk=self.image.pk, backend_id=self.image.backend_id).exists())
+
 
 class OpenStackBackendInstanceApiTest(TransactionTestCase):
     def setUp(self):
         self.nova_client = mock.Mock()
         self.nova_client.servers.list.return_value = []
         self.nova_client.servers.findall.return_value = []
+        self.nova_client.flavors.list.return_value = []
+
+        self.cinder_client = mock.Mock()
+        self.cinder_client.volumes.list.return_value = []
 
         self.membership = factories.CloudProjectMembershipFactory()
 
@@ -693,6 +1146,7 @@ class OpenStackBackendInstanceApiTest(TransactionTestCase):
         self.backend = OpenStackBackend()
         self.backend.create_tenant_session = mock.Mock()
         self.backend.create_nova_client = mock.Mock(return_value=self.nova_client)
+        self.backend.create_cinder_client = mock.Mock(return_value=self.cinder_client)
 
     # XXX: import only the 1st data volume, sort by device name
 
@@ -737,7 +1191,6 @@ class OpenStackBackendInstanceApiTest(TransactionTestCase):
                          'No instances should have been deleted from the database')
 
     # Creation tests
-    @unittest.skip("Not implemented yet")
     def test_pull_instances_creates_instances_missing_in_database(self):
         # Given
         self.given_minimal_importable_instance()
@@ -748,12 +1201,200 @@ class OpenStackBackendInstanceApiTest(TransactionTestCase):
         # Then
         membership_params = self._get_membership_params()
 
-        # TODO:
-        instance = Instance.objects.filter(backend_id='', **membership_params).first()
+        instance = Instance.objects.filter(backend_id='server-uuid-1', **membership_params).first()
         self.assertIsNotNone(instance,
                              'Instance should have been created')
 
+        self.assertEqual(instance.template, self.template)
+        self.assertEqual(instance.cores, 3)
+        self.assertEqual(instance.ram, 5)
+        self.assertEqual(instance.system_volume_id, 'system-volume-1')
+        self.assertEqual(instance.data_volume_id, 'data-volume-1')
+
+    def test_pull_instances_fetches_volumes_and_flavors_of_all_instances_at_once(self):
+        # Given
+        self.given_minimal_importable_instance()
+
+        # When
+        self.when()
+
+        # Then
+        self.cinder_client.volumes.list.assert_called_once_with(detailed=True)
+        self.nova_client.flavors.list.assert_called_once_with()
+
+        self.assertFalse(self.nova_client.volumes.get_server_volumes.called,
+                         'Volumes should not have been fetched per instance')
+        self.assertFalse(self.cinder_client.volumes.get.called,
+                         'Volumes should not have been fetched per instance')
+        self.assertFalse(self.nova_client.flavors.get.called,
+                         'Flavors should not have been fetched per instance')
+
+    def test_pull_instances_skips_instances_with_unknown_template(self):
+        # Given
+        self.given_minimal_importable_instance()
+        Image.objects.all().delete()
+
+        # When
+        self.when()
+
+        # Then
+        is_present = Instance.objects.filter(**self._get_membership_params()).exists()
+        self.assertFalse(is_present, 'Instance with unknown template should not have been created')
+
+    # Update tests
+    def test_pull_instances_updates_matching_instances_stopped_in_backend(self):
+        # Given
+        server = self.given_minimal_importable_instance()
+        server.status = 'SHUTOFF'
+
+        instance = self.given_matching_instance(server, state=Instance.States.ONLINE)
+
+        # When
+        changes = self.when()
+
+        # Then
+        reread_instance = Instance.objects.get(pk=instance.pk)
+        self.assertEqual(reread_instance.state, Instance.States.OFFLINE)
+        self.assertIsNone(reread_instance.start_time)
+        self.assertEqual(changes, 1)
+
+    def test_pull_instances_updates_resized_matching_instances(self):
+        # Given
+        server = self.given_minimal_importable_instance()
+        instance = self.given_matching_instance(server, cores=1, data_volume_size=1024)
+
+        # When
+        self.when()
+
+        # Then
+        reread_instance = Instance.objects.get(pk=instance.pk)
+        self.assertEqual(reread_instance.cores, 3)
+        self.assertEqual(reread_instance.data_volume_size, 20 * 1024)
+
+    def test_pull_instances_doesnt_change_matching_instances_in_sync_with_backend(self):
+        # Given
+        server = self.given_minimal_importable_instance()
+        instance = self.given_matching_instance(server)
+
+        volumes_by_instance = self.backend._get_volumes_by_instance(self.cinder_client)
+        flavors = dict((f.id, f) for f in self.nova_client.flavors.list())
+
+        # When
+        changes = self.backend._get_instance_changes(
+            instance, server, volumes_by_instance, flavors, self.nova_client)
+
+        # Then
+        self.assertEqual(changes, {}, 'Instance in sync with backend should not have been changed')
+
+    def test_pull_instances_doesnt_count_matching_instances_in_sync_with_backend(self):
+        # Given
+        server = self.given_minimal_importable_instance()
+        self.given_matching_instance(server)
+
+        # When
+        changes = self.when()
+
+        # Then
+        self.assertEqual(changes, 0)
+
+    def test_pull_instances_doesnt_import_instances_being_processed(self):
+        # Given
+        server = self.given_minimal_importable_instance()
+        self.given_matching_instance(server, state=Instance.States.STARTING)
+
+        # When
+        self.when()
+
+        # Then
+        instance_count = Instance.objects.filter(backend_id=server.id, **self._get_membership_params()).count()
+        self.assertEqual(instance_count, 1, 'Instance being processed should not have been imported again')
+
+    # Incremental synchronization tests
+    def test_pull_instances_stores_high_water_mark(self):
+        # When
+        self.when()
+
+        # Then
+        reread_membership = CloudProjectMembership.objects.get(pk=self.membership.pk)
+        self.assertIsNotNone(reread_membership.instances_synced_at)
+
+    def test_incremental_pull_instances_falls_back_to_full_sync_if_membership_was_never_synchronized(self):
+        # When
+        self.backend.pull_instances(self.membership, incremental=True)
+
+        # Then
+        self.nova_client.servers.findall.assert_called_once_with(image='')
+        self.assertFalse(self.nova_client.servers.list.called,
+                         'Changed instances should not have been queried')
+
+    def test_incremental_pull_instances_queries_instances_changed_since_previous_sync(self):
+        # Given
+        synced_at = timezone.now() - datetime.timedelta(minutes=5)
+        self.membership.instances_synced_at = synced_at
+
+        # When
+        with override_settings(NODECONDUCTOR={'OPENSTACK_INSTANCE_SYNC_OVERLAP': 60}):
+            self.backend.pull_instances(self.membership, incremental=True)
+
+        # Then
+        changes_since = synced_at - datetime.timedelta(seconds=60)
+        self.nova_client.servers.list.assert_called_once_with(
+            search_opts={'changes-since': changes_since.isoformat()})
+        self.assertFalse(self.nova_client.servers.findall.called,
+                         'All instances should not have been queried')
+
+    def test_incremental_pull_instances_deletes_only_instances_deleted_in_backend(self):
+        # Given
+        self.membership.instances_synced_at = timezone.now()
+        membership_params = self._get_membership_params()
+
+        deleted_instance = factories.InstanceFactory(backend_id='server-uuid-1', **membership_params)
+        unchanged_instance = factories.InstanceFactory(backend_id='server-uuid-2', **membership_params)
+
+        server = mock.Mock(id='server-uuid-1', status='DELETED')
+        self.nova_client.servers.list.return_value = [server]
+
+        # When
+        self.backend.pull_instances(self.membership, incremental=True)
+
+        # Then
+        self.assertFalse(Instance.objects.filter(pk=deleted_instance.pk).exists(),
+                         'Instance deleted in backend should have been deleted from the database')
+        self.assertTrue(Instance.objects.filter(pk=unchanged_instance.pk).exists(),
+                        'Unchanged instance should not have been deleted from the database')
+
+    def test_incremental_pull_instances_updates_instances_changed_in_backend(self):
+        # Given
+        server = self.given_minimal_importable_instance()
+        server.status = 'SHUTOFF'
+        self.nova_client.servers.list.return_value = [server]
+        self.membership.instances_synced_at = timezone.now()
+
+        instance = self.given_matching_instance(server, state=Instance.States.ONLINE)
+
+        # When
+        self.backend.pull_instances(self.membership, incremental=True)
+
+        # Then
+        reread_instance = Instance.objects.get(pk=instance.pk)
+        self.assertEqual(reread_instance.state, Instance.States.OFFLINE)
+
     # Helper methods
+    def given_matching_instance(self, server, **kwargs):
+        params = dict(
+            backend_id=server.id,
+            state=Instance.States.ONLINE,
+            cores=3,
+            ram=5,
+            system_volume_size=10 * 1024,
+            data_volume_size=20 * 1024,
+            internal_ips='192.168.42.10',
+            external_ips='10.7.201.10',
+        )
+        params.update(self._get_membership_params())
+        params.update(kwargs)
+        return factories.InstanceFactory(**params)
+
     def given_minimal_importable_instance(self):
         # Create a flavor
         flavor = NovaFlavor(next_unique_flavor_id(), 'id1', 3, 5, 8)
@@ -776,14 +1417,35 @@ class OpenStackBackendInstanceApiTest(TransactionTestCase):
         }
         server.status = 'ACTIVE'
         server.image = ''
+        server.key_name = ''
+        server.to_dict.return_value = {}
+        server.addresses = {
+            'tenant-network': [
+                {'addr': '192.168.42.10', 'version': 4, 'OS-EXT-IPS:type': 'fixed'},
+                {'addr': '10.7.201.10', 'version': 4, 'OS-EXT-IPS:type': 'floating'},
+            ],
+        }
+
+        # Create a template available within membership's cloud
+        self.template = factories.TemplateFactory()
+        factories.ImageFactory(cloud=self.membership.cloud, template=self.template, backend_id='image-uuid-1')
+
+        attachments = [{'server_id': server.id}]
+        system_volume = mock.Mock(id='system-volume-1', size=10, bootable='true', attachments=attachments,
+                                  volume_image_metadata={'image_id': 'image-uuid-1'})
+        data_volume = mock.Mock(id='data-volume-1', size=20, bootable='false', attachments=attachments)
 
         # Mock volume fetches
+        self.cinder_client.volumes.list.return_value = [system_volume, data_volume]
         # Mock flavor fetches
+        self.nova_client.flavors.list.return_value = [flavor]
         # Mock server fetches
         self.nova_client.servers.findall.return_value = [server]
 
+        return server
+
     def when(self):
-        self.backend.pull_instances(self.membership)
+        return self.backend.pull_instances(self.membership)
 
     def _get_membership_params(self):
         return dict(
@@ -792,6 +1454,348 @@ class OpenStackBackendInstanceApiTest(TransactionTestCase):
         )
 
 
+class OpenStackBackendInstanceOperationsTest(unittest.TestCase):
+    def setUp(self):
+        self.nova_client = mock.Mock()
+        self.cinder_client = mock.Mock()
+
+        self.instance = mock.Mock()
+        self.instance.backend_id = ''
+        self.instance.system_volume_id = 'system-volume-1'
+        self.instance.data_volume_id = 'data-volume-1'
+        self.instance.data_volume_size = 20 * 1024
+
+        # Mock low level non-AbstractCloudBackend api methods
+        self.backend = OpenStackBackend()
+        self.backend.create_tenant_session = mock.Mock()
+        self.backend.create_nova_client = mock.Mock(return_value=self.nova_client)
+        self.backend.create_cinder_client = mock.Mock(return_value=self.cinder_client)
+        self.backend._create_instance_server = mock.Mock()
+        self.backend.push_floating_ip_to_instance = mock.Mock()
+
+    # check_instance_provisioning tests
+    def test_check_instance_provisioning_waits_for_all_volumes_to_become_available(self):
+        self.given_volumes_statuses('available', 'creating')
+
+        is_completed = self.backend.check_instance_provisioning(self.instance, 'flavor-1')
+
+        self.assertFalse(is_completed)
+        self.assertFalse(self.backend._create_instance_server.called,
+                         'Instance should not have been booted before its volumes are available')
+
+    def test_check_instance_provisioning_boots_instance_once_volumes_are_available(self):
+        self.given_volumes_statuses('available', 'available')
+
+        is_completed = self.backend.check_instance_provisioning(self.instance, 'flavor-1')
+
+        self.assertFalse(is_completed)
+        self.backend._create_instance_server.assert_called_once_with(self.instance, 'flavor-1', mock.ANY)
+
+    def test_check_instance_provisioning_raises_if_volume_creation_failed(self):
+        self.given_volumes_statuses('available', 'error')
+
+        with self.assertRaises(CloudBackendError):
+            self.backend.check_instance_provisioning(self.instance, 'flavor-1')
+
+    def test_check_instance_provisioning_completes_once_instance_is_online(self):
+        self.instance.backend_id = 'server-uuid-1'
+        self.nova_client.servers.get.return_value = mock.Mock(
+            status='ACTIVE', addresses={'tenant-network': [{'addr': '192.168.42.10'}]})
+
+        is_completed = self.backend.check_instance_provisioning(self.instance, 'flavor-1')
+
+        self.assertTrue(is_completed)
+        self.assertIsNotNone(self.instance.start_time)
+        self.backend.push_floating_ip_to_instance.assert_called_once_with(
+            self.nova_client.servers.get.return_value, self.instance, self.nova_client)
+
+    # check_disk_extension tests
+    def test_check_disk_extension_extends_detached_volume(self):
+        volume = mock.Mock(id='data-volume-1', status='available', size=10)
+        self.cinder_client.volumes.get.return_value = volume
+
+        is_completed = self.backend.check_disk_extension(self.instance)
+
+        self.assertFalse(is_completed)
+        self.cinder_client.volumes.extend.assert_called_once_with(volume, 20)
+
+    def test_check_disk_extension_attaches_extended_volume_back(self):
+        self.instance.backend_id = 'server-uuid-1'
+        self.cinder_client.volumes.get.return_value = mock.Mock(id='data-volume-1', status='available', size=20)
+
+        is_completed = self.backend.check_disk_extension(self.instance)
+
+        self.assertFalse(is_completed)
+        self.nova_client.volumes.create_server_volume.assert_called_once_with('server-uuid-1', 'data-volume-1', None)
+
+    def test_check_disk_extension_completes_once_extended_volume_is_attached(self):
+        self.cinder_client.volumes.get.return_value = mock.Mock(id='data-volume-1', status='in-use', size=20)
+
+        self.assertTrue(self.backend.check_disk_extension(self.instance))
+
+    # check_flavor_update tests
+    def test_check_flavor_update_confirms_resize(self):
+        self.instance.backend_id = 'server-uuid-1'
+        self.nova_client.servers.get.return_value = mock.Mock(status='VERIFY_RESIZE')
+
+        is_completed = self.backend.check_flavor_update(self.instance, mock.Mock(backend_id='flavor-2'))
+
+        self.assertFalse(is_completed)
+        self.nova_client.servers.confirm_resize.assert_called_once_with('server-uuid-1')
+
+    def test_check_flavor_update_completes_once_instance_is_stopped_with_new_flavor(self):
+        self.nova_client.servers.get.return_value = mock.Mock(status='SHUTOFF', flavor={'id': 'flavor-2'})
+
+        is_completed = self.backend.check_flavor_update(self.instance, mock.Mock(backend_id='flavor-2'))
+
+        self.assertTrue(is_completed)
+
+    def test_check_flavor_update_waits_while_instance_is_resized(self):
+        self.nova_client.servers.get.return_value = mock.Mock(
+            status='RESIZE', flavor={'id': 'flavor-1'}, **{'OS-EXT-STS:task_state': 'resize_migrating'})
+
+        is_completed = self.backend.check_flavor_update(self.instance, mock.Mock(backend_id='flavor-2'))
+
+        self.assertFalse(is_completed)
+
+    def test_check_flavor_update_raises_if_resize_is_reverted(self):
+        self.nova_client.servers.get.return_value = mock.Mock(
+            status='SHUTOFF', flavor={'id': 'flavor-1'}, **{'OS-EXT-STS:task_state': None})
+
+        with self.assertRaises(CloudBackendError):
+            self.backend.check_flavor_update(self.instance, mock.Mock(backend_id='flavor-2'))
+
+    # check_instance_deletion tests
+    def test_check_instance_deletion_completes_once_instance_is_gone(self):
+        self.nova_client.servers.get.side_effect = nova_exceptions.NotFound(404)
+
+        self.assertTrue(self.backend.check_instance_deletion(self.instance))
+
+    def test_check_instance_deletion_waits_while_instance_exists(self):
+        self.assertFalse(self.backend.check_instance_deletion(self.instance))
+
+    # Helper methods
+    def given_volumes_statuses(self, system_volume_status, data_volume_status):
+        self.cinder_client.volumes.list.return_value = [
+            mock.Mock(id='system-volume-1', status=system_volume_status),
+            mock.Mock(id='data-volume-1', status=data_volume_status),
+        ]
+
+
+class OpenStackBackendBatchInstanceOperationsTest(TransactionTestCase):
+    def setUp(self):
+        self.nova_client = mock.Mock()
+
+        self.membership = factories.CloudProjectMembershipFactory()
+        self.instances = [
+            factories.InstanceFactory(
+                cloud_project_membership=self.membership, backend_id='server-%d' % i, start_time=None)
+            for i in range(3)
+        ]
+
+        # Mock low level non-AbstractCloudBackend api methods
+        self.backend = OpenStackBackend()
+        self.backend.create_tenant_session = mock.Mock()
+        self.backend.create_nova_client = mock.Mock(return_value=self.nova_client)
+
+    def test_check_instances_operation_checks_all_instances_with_single_listing(self):
+        self.nova_client.servers.list.return_value = [
+            mock.Mock(id='server-0', status='SHUTOFF'),
+            mock.Mock(id='server-1', status='ERROR'),
+            mock.Mock(id='server-2', status='ACTIVE'),
+        ]
+
+        with self.backend.tenant_clients(self.membership):
+            stopped, failed = self.backend.check_instances_operation(self.membership, self.instances, 'stop')
+
+        self.assertEqual(stopped, self.instances[:1])
+        self.assertEqual(failed, self.instances[1:2])
+        self.assertEqual(self.backend.create_nova_client.call_count, 1)
+        self.nova_client.servers.list.assert_any_call(marker=None, limit=LISTING_PAGE_SIZE)
+
+    def test_instances_failed_to_be_requested_are_skipped(self):
+        self.nova_client.servers.start.side_effect = [None, nova_exceptions.ClientException(409), None]
+
+        requested = self.backend.request_instances_operation(self.membership, self.instances, 'start')
+
+        self.assertEqual(requested, [self.instances[0], self.instances[2]])
+
+    def test_started_instances_get_start_time(self):
+        self.nova_client.servers.list.return_value = [mock.Mock(id='server-0', status='ACTIVE')]
+
+        self.backend.check_instances_operation(self.membership, self.instances, 'start')
+
+        self.assertEqual(Instance.objects.filter(start_time__isnull=False).count(), 1)
+
+    def test_check_instances_deletion_completes_instances_gone_from_backend(self):
+        self.nova_client.servers.list.return_value = [mock.Mock(id='server-1', status='DELETING')]
+
+        deleted, failed = self.backend.check_instances_operation(self.membership, self.instances, 'delete')
+
+        self.assertEqual(deleted, [self.instances[0], self.instances[2]])
+        self.assertEqual(failed, [])
+
+
+class OpenStackBackendProvisioningResourcesTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.nova_client = mock.Mock()
+        self.nova_client.flavors.get.return_value = mock.Mock(id='flavor-1')
+        self.nova_client.flavors.findall.return_value = []
+        key = mock.Mock()
+        key.name = 'user-key'
+        self.nova_client.keypairs.findall.return_value = [key]
+        self.glance_client = mock.Mock()
+        self.glance_client.images.get.return_value = mock.Mock(id='image-1')
+        self.glance_client.images.list.return_value = [GlanceImage('image-1', is_public=True, deleted=False)]
+        self.neutron_client = mock.Mock()
+        self.neutron_client.list_networks.return_value = {'networks': [{'id': 'network-2'}]}
+
+        self.membership = factories.CloudProjectMembershipFactory(network_id='network-1')
+        template = factories.TemplateFactory()
+        factories.ImageFactory(cloud=self.membership.cloud, template=template, backend_id='image-1')
+        factories.TemplateMappingFactory(template=template, backend_image_id='image-1')
+
+        self.instance = mock.Mock(
+            cloud_project_membership=self.membership, template=template, key_name='key', key_fingerprint='fp')
+
+        # Mock low level non-AbstractCloudBackend api methods
+        self.backend = OpenStackBackend()
+        self.backend.create_admin_session = mock.Mock()
+        self.backend.create_tenant_session = mock.Mock()
+        self.backend.create_nova_client = mock.Mock(return_value=self.nova_client)
+        self.backend.create_glance_client = mock.Mock(return_value=self.glance_client)
+        self.backend.create_neutron_client = mock.Mock(return_value=self.neutron_client)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_provisioning_resources(self):
+        clients = self.backend.get_tenant_clients(self.membership)
+        return self.backend._get_provisioning_resources(self.instance, 'flavor-1', clients)
+
+    def test_stored_network_id_is_used(self):
+        resources = self.get_provisioning_resources()
+
+        self.assertEqual(resources, ('network-1', 'user-key', 'flavor-1', 'image-1'))
+        self.assertFalse(self.neutron_client.list_networks.called)
+
+    def test_network_id_is_looked_up_and_stored_if_missing(self):
+        CloudProjectMembership.objects.filter(pk=self.membership.pk).update(network_id='')
+        self.membership.network_id = ''
+
+        resources = self.get_provisioning_resources()
+
+        self.assertEqual(resources[0], 'network-2')
+        self.assertEqual(CloudProjectMembership.objects.get(pk=self.membership.pk).network_id, 'network-2')
+
+    def test_resolved_resources_are_cached(self):
+        self.get_provisioning_resources()
+        self.get_provisioning_resources()
+
+        self.assertEqual(self.nova_client.keypairs.findall.call_count, 1)
+        self.assertEqual(self.nova_client.flavors.get.call_count, 1)
+        self.assertEqual(self.glance_client.images.get.call_count, 1)
+
+    def test_pulling_cloud_account_invalidates_cached_flavors_and_images(self):
+        self.get_provisioning_resources()
+
+        self.backend.pull_cloud_account(self.membership.cloud)
+        self.get_provisioning_resources()
+
+        self.assertEqual(self.nova_client.keypairs.findall.call_count, 1)
+        self.assertEqual(self.nova_client.flavors.get.call_count, 2)
+        self.assertEqual(self.glance_client.images.get.call_count, 2)
+
+    def test_failed_resolution_is_not_cached(self):
+        self.nova_client.keypairs.findall.return_value = []
+        with self.assertRaises(CloudBackendError):
+            self.get_provisioning_resources()
+
+        key = mock.Mock()
+        key.name = 'user-key'
+        self.nova_client.keypairs.findall.return_value = [key]
+
+        self.assertEqual(self.get_provisioning_resources()[1], 'user-key')
+
+
+class OpenStackBackendBackupTest(unittest.TestCase):
+    def setUp(self):
+        self.nova_client = mock.Mock()
+        self.cinder_client = mock.Mock()
+
+        self.instance = mock.Mock()
+        self.instance.backend_id = 'server-uuid-1'
+
+        self.volumes = [
+            mock.Mock(id='system-volume-1', device='/dev/vda'),
+            mock.Mock(id='data-volume-1', device='/dev/vdb'),
+        ]
+
+        # Mock low level non-AbstractCloudBackend api methods
+        self.backend = OpenStackBackend()
+        self.backend.create_tenant_session = mock.Mock()
+        self.backend.create_nova_client = mock.Mock(return_value=self.nova_client)
+        self.backend.create_cinder_client = mock.Mock(return_value=self.cinder_client)
+        self.backend.get_attached_volumes = mock.Mock(return_value=self.volumes)
+        self.backend.create_snapshot = mock.Mock(side_effect=lambda volume_id, cinder: 'snapshot-' + volume_id)
+        self.backend.create_temporary_volume = mock.Mock(side_effect=lambda snapshot_id, cinder: 'tmp-' + snapshot_id)
+        self.backend.create_volume_backup = mock.Mock(side_effect=lambda volume_id, device, cinder: 'backup-' + device)
+        self.backend.delete_temporary_volume = mock.Mock()
+        self.backend.delete_temporary_snapshot = mock.Mock()
+
+    def test_backup_instance_backs_up_all_attached_volumes(self):
+        backups = self.backend.backup_instance(self.instance)
+
+        self.assertEqual(backups, ['backup-/dev/vda', 'backup-/dev/vdb'])
+        self.assertEqual(self.backend.delete_temporary_volume.call_count, 2)
+        self.assertEqual(self.backend.delete_temporary_snapshot.call_count, 2)
+
+    def test_backup_instance_cleans_up_temporary_objects_and_partial_backups_on_failure(self):
+        def create_volume_backup(volume_id, device, cinder):
+            if device == '/dev/vdb':
+                raise CloudBackendInternalError()
+            return 'backup-' + device
+
+        self.backend.create_volume_backup.side_effect = create_volume_backup
+
+        with self.assertRaises(CloudBackendError):
+            self.backend.backup_instance(self.instance)
+
+        self.backend.delete_temporary_volume.assert_any_call('tmp-snapshot-data-volume-1', self.cinder_client)
+        self.backend.delete_temporary_snapshot.assert_any_call('snapshot-data-volume-1', self.cinder_client)
+        self.cinder_client.backups.delete.assert_called_once_with('backup-/dev/vda')
+
+    def test_restore_instance_restores_all_backups(self):
+        self.backend.restore_volume_backup = mock.Mock(side_effect=lambda backup_id, cinder: 'restored-' + backup_id)
+        self.cinder_client.backups.get.side_effect = lambda backup_id: mock.Mock(description='/dev/' + backup_id)
+        self.backend.create_vm = mock.Mock(return_value='new-server-uuid')
+
+        new_vm = self.backend.restore_instance(self.instance, ['vdb', 'vda'])
+
+        self.assertEqual(new_vm, 'new-server-uuid')
+        self.backend.create_vm.assert_called_once_with(
+            'server-uuid-1', collections.OrderedDict([('/dev/vda', 'restored-vda'), ('/dev/vdb', 'restored-vdb')]),
+            self.nova_client)
+
+    def test_restore_instance_deletes_restored_volumes_on_failure(self):
+        def restore_volume_backup(backup_id, cinder):
+            if backup_id == 'vdb':
+                raise CloudBackendInternalError()
+            return 'restored-' + backup_id
+
+        self.backend.restore_volume_backup = mock.Mock(side_effect=restore_volume_backup)
+        self.cinder_client.backups.get.side_effect = lambda backup_id: mock.Mock(description='/dev/' + backup_id)
+        self.backend.create_vm = mock.Mock()
+
+        with self.assertRaises(CloudBackendError):
+            self.backend.restore_instance(self.instance, ['vda', 'vdb'])
+
+        self.cinder_client.volumes.delete.assert_called_once_with('restored-vda')
+        self.assertFalse(self.backend.create_vm.called, 'Instance should not have been created')
+
+
 class OpenStackBackendHelperApiTest(unittest.TestCase):
     def setUp(self):
         self.keystone_client = mock.Mock()
@@ -912,3 +1916,60 @@ class OpenStackBackendHelperApiTest(unittest.TestCase):
             'Username should contain project name'
         )
         self.assertTrue(password, 'Password should not be empty')
+
+    # _wait_for_objects_status tests
+    @mock.patch('nodeconductor.iaas.backend.openstack.time.sleep')
+    def test_wait_for_objects_status_lists_objects_of_the_same_manager_once_per_poll(self, sleep):
+        cinder = mock.Mock()
+        cinder.volumes.list.side_effect = [
+            [mock.Mock(id='volume-1', status='creating'), mock.Mock(id='volume-2', status='available')],
+            [mock.Mock(id='volume-1', status='available'), mock.Mock(id='volume-2', status='available')],
+        ]
+
+        is_complete = self.backend._wait_for_volumes_status(['volume-1', 'volume-2'], cinder, 'available', 'error')
+
+        self.assertTrue(is_complete, 'Volumes should have become available')
+        self.assertEqual(cinder.volumes.list.call_count, 2)
+        self.assertFalse(cinder.volumes.get.called, 'Volumes should not have been fetched one by one')
+        self.assertEqual(sleep.call_count, 1)
+
+    @mock.patch('nodeconductor.iaas.backend.openstack.time.sleep')
+    def test_wait_for_objects_status_fetches_single_object_directly(self, sleep):
+        cinder = mock.Mock()
+        cinder.volumes.get.return_value = mock.Mock(status='available')
+
+        is_complete = self.backend._wait_for_volume_status('volume-1', cinder, 'available', 'error')
+
+        self.assertTrue(is_complete, 'Volume should have become available')
+        cinder.volumes.get.assert_called_once_with('volume-1')
+        self.assertFalse(cinder.volumes.list.called, 'Volumes should not have been listed')
+
+    @mock.patch('nodeconductor.iaas.backend.openstack.time.sleep')
+    def test_wait_for_objects_status_fails_once_any_object_reaches_error_status(self, sleep):
+        cinder = mock.Mock()
+        cinder.volumes.list.return_value = [
+            mock.Mock(id='volume-1', status='creating'), mock.Mock(id='volume-2', status='error')]
+
+        is_complete = self.backend._wait_for_volumes_status(['volume-1', 'volume-2'], cinder, 'available', 'error')
+
+        self.assertFalse(is_complete, 'Waiting should have failed')
+        self.assertFalse(sleep.called, 'Waiting should have failed without polling again')
+
+    @mock.patch('nodeconductor.iaas.backend.openstack.time')
+    def test_wait_for_objects_status_times_out_with_growing_poll_interval(self, mocked_time):
+        clock = [0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        mocked_time.time.side_effect = lambda: clock[0]
+        mocked_time.sleep.side_effect = sleep
+
+        nova = mock.Mock()
+        nova.servers.get.return_value = mock.Mock(status='BUILD')
+
+        is_complete = self.backend._wait_for_instance_status('server-1', nova, 'ACTIVE', retries=20, poll_interval=3)
+
+        self.assertFalse(is_complete, 'Waiting should have timed out')
+        self.assertLessEqual(clock[0], 60)
+        self.assertLess(nova.servers.get.call_count, 20, 'Poll interval should have grown')
@@ -0,0 +1,156 @@
+from __future__ import unicode_literals
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from keystoneclient import exceptions as keystone_exceptions
+from novaclient import exceptions as nova_exceptions
+
+from nodeconductor.iaas.backend import CloudBackendError
+from nodeconductor.iaas.backend.simulator import (
+    OpenStackSimulatorBackend, SimulatedSession, get_simulated_cloud, reset_simulated_clouds)
+from nodeconductor.iaas.models import FloatingIP
+from nodeconductor.iaas.tests import factories
+
+AUTH_URL = 'http://keystone.example.com:5000/v2.0'
+
+
+class OpenStackSimulatorBackendTest(TestCase):
+    def setUp(self):
+        reset_simulated_clouds()
+        self.backend = OpenStackSimulatorBackend({'floating_ips_per_tenant': 2, 'servers_per_tenant': 3})
+        self.membership = factories.CloudProjectMembershipFactory(
+            cloud__auth_url=AUTH_URL, username='', password='', tenant_id='')
+
+    def tearDown(self):
+        reset_simulated_clouds()
+
+    def test_push_membership_creates_tenant_user_and_network(self):
+        self.backend.push_membership(self.membership)
+
+        cloud = get_simulated_cloud(AUTH_URL)
+        self.assertIn(self.membership.tenant_id, cloud.tenants)
+        self.assertTrue(any(u['name'] == self.membership.username for u in cloud.users.values()))
+        self.assertTrue(any(n['tenant_id'] == self.membership.tenant_id for n in cloud.networks.values()))
+
+    def test_push_membership_is_idempotent(self):
+        self.backend.push_membership(self.membership)
+        tenant_id = self.membership.tenant_id
+
+        self.backend.push_membership(self.membership)
+
+        self.assertEqual(self.membership.tenant_id, tenant_id)
+        self.assertEqual(len(get_simulated_cloud(AUTH_URL).networks), 1)
+
+    def test_pull_floating_ips_creates_tenant_floating_ips(self):
+        self.backend.push_membership(self.membership)
+
+        self.backend.pull_floating_ips(self.membership)
+
+        self.assertEqual(FloatingIP.objects.filter(cloud_project_membership=self.membership).count(), 2)
+
+    def test_tenant_clients_see_only_tenant_servers(self):
+        self.backend.push_membership(self.membership)
+        other_membership = factories.CloudProjectMembershipFactory(
+            cloud=self.membership.cloud, username='', password='', tenant_id='')
+        self.backend.push_membership(other_membership)
+
+        with self.backend.tenant_clients(self.membership) as clients:
+            servers = clients.nova.servers.list()
+
+        self.assertEqual(len(servers), 3)
+        self.assertTrue(all(s.tenant_id == self.membership.tenant_id for s in servers))
+
+        with self.backend.admin_clients(AUTH_URL) as clients:
+            servers = clients.nova.servers.list(search_opts={'all_tenants': 1})
+
+        self.assertEqual(len(servers), 6)
+
+    def test_cloud_sweep_lists_servers_page_by_page(self):
+        self.backend.push_membership(self.membership)
+
+        with self.backend.cloud_sweep(self.membership.cloud) as sweep:
+            sweep.PAGE_SIZE = 2
+            servers = sweep.get_servers(self.membership.tenant_id)
+
+        self.assertEqual(len(servers), 3)
+
+    def test_tenant_session_requires_valid_credentials(self):
+        self.backend.push_membership(self.membership)
+        self.membership.password = 'wrong'
+
+        with self.assertRaises(keystone_exceptions.AuthorizationFailure):
+            self.backend.create_tenant_session(self.membership)
+
+    def test_failing_calls_raise_cloud_backend_error(self):
+        get_simulated_cloud(AUTH_URL).options['error_rate'] = 1
+
+        with self.assertRaises(CloudBackendError):
+            self.backend.get_resource_stats(AUTH_URL)
+
+
+class SimulatedServerLifecycleTest(TestCase):
+    def setUp(self):
+        reset_simulated_clouds()
+        self.cloud = get_simulated_cloud(AUTH_URL, {'transition_time': {'power': 60}})
+        tenant = self.cloud.create_tenant('tenant', '')
+        session = SimulatedSession(self.cloud, None, tenant['id'])
+        self.nova = OpenStackSimulatorBackend().create_nova_client(session)
+        self.cinder = OpenStackSimulatorBackend().create_cinder_client(session)
+
+    def tearDown(self):
+        reset_simulated_clouds()
+
+    def create_server(self):
+        volume = self.cinder.volumes.create(size=1, display_name='system', imageRef=sorted(self.cloud.images)[0])
+        return self.nova.servers.create(
+            name='vm', image=None, flavor='1', block_device_mapping_v2=[{'uuid': volume.id}])
+
+    def test_server_boots_from_volume(self):
+        server = self.create_server()
+
+        server = self.nova.servers.get(server.id)
+
+        self.assertEqual(server.status, 'ACTIVE')
+        self.assertEqual(len(self.nova.volumes.get_server_volumes(server.id)), 1)
+
+    def test_stop_lasts_transition_time(self):
+        server = self.create_server()
+
+        self.nova.servers.stop(server.id)
+        self.assertEqual(self.nova.servers.get(server.id).status, 'ACTIVE')
+
+        # Pretend transition is over
+        self.cloud._transitions = [(0, seq, callback) for _, seq, callback in self.cloud._transitions]
+        self.assertEqual(self.nova.servers.get(server.id).status, 'SHUTOFF')
+
+    def test_starting_active_server_fails(self):
+        server = self.create_server()
+
+        with self.assertRaises(nova_exceptions.Conflict):
+            self.nova.servers.start(server.id)
+
+    def test_deleted_server_is_listed_as_changed(self):
+        server = self.create_server()
+        self.nova.servers.delete(server.id)
+
+        servers = self.nova.servers.list(search_opts={'changes-since': '2000-01-01T00:00:00Z'})
+
+        self.assertEqual([(s.id, s.status) for s in servers], [(server.id, 'DELETED')])
+
+
+class CloudBackendSelectionTest(TestCase):
+    @override_settings(NODECONDUCTOR={
+        'OPENSTACK_CREDENTIALS': ({'auth_url': AUTH_URL, 'simulation': {'latency': 0}},),
+    })
+    def test_simulated_cloud_uses_simulator_backend(self):
+        cloud = factories.CloudFactory(auth_url=AUTH_URL)
+
+        self.assertIsInstance(cloud.get_backend(), OpenStackSimulatorBackend)
+
+    @override_settings(NODECONDUCTOR={
+        'OPENSTACK_CREDENTIALS': ({'auth_url': AUTH_URL},),
+    })
+    def test_regular_cloud_does_not_use_simulator_backend(self):
+        cloud = factories.CloudFactory(auth_url=AUTH_URL)
+
+        self.assertNotIsInstance(cloud.get_backend(), OpenStackSimulatorBackend)
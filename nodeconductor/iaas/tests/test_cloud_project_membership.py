@@ -1,11 +1,20 @@
 from __future__ import unicode_literals
 
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+import mock
 from mock import patch
 from rest_framework import status
 from rest_framework import test
 
-from nodeconductor.iaas import models
+from nodeconductor.core.models import SynchronizationStates
+from nodeconductor.core.tasks import Lease
+from nodeconductor.iaas import models, tasks
 from nodeconductor.iaas.tests import factories
 from nodeconductor.structure.models import CustomerRole, ProjectRole, ProjectGroupRole
 from nodeconductor.structure.tests import factories as structure_factories
@@ -156,3 +165,235 @@ class ProjectCloudApiPermissionTest(UrlResolverMixin, test.APITransactionTestCas
             'cloud': self._get_cloud_url(cloud),
             'project': self._get_project_url(project)
         }
+
+
+class CloudProjectMembershipsPullSchedulingTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.cloud = factories.CloudFactory(auth_url='http://cloud.example.com')
+        self.suspended_cloud = factories.CloudFactory(auth_url='http://suspended.example.com')
+
+        self.memberships = factories.CloudProjectMembershipFactory.create_batch(
+            2, cloud=self.cloud, state=SynchronizationStates.IN_SYNC)
+        self.erred_membership = factories.CloudProjectMembershipFactory(
+            cloud=self.cloud, state=SynchronizationStates.ERRED)
+        self.suspended_membership = factories.CloudProjectMembershipFactory(
+            cloud=self.suspended_cloud, state=SynchronizationStates.IN_SYNC)
+
+    def test_memberships_in_sync_are_scheduled_for_pull_per_cloud(self):
+        with patch('nodeconductor.iaas.tasks._is_cloud_suspended',
+                   side_effect=lambda auth_url: auth_url == self.suspended_cloud.auth_url), \
+                patch('nodeconductor.iaas.tasks.group') as mocked_group, \
+                patch('nodeconductor.iaas.tasks.pull_cloud_account_memberships.si') as mocked_task:
+            tasks.pull_cloud_memberships()
+
+        cloud_uuid, membership_pks = mocked_task.call_args[0]
+        self.assertEqual(mocked_task.call_count, 1)
+        self.assertEqual(cloud_uuid, self.cloud.uuid.hex)
+        self.assertEqual(sorted(membership_pks), sorted(m.pk for m in self.memberships))
+        mocked_group.return_value.apply_async.assert_called_once_with()
+
+        scheduled_pks = models.CloudProjectMembership.objects.filter(
+            state=SynchronizationStates.SYNCING_SCHEDULED).values_list('pk', flat=True)
+        self.assertEqual(sorted(scheduled_pks), sorted(m.pk for m in self.memberships))
+
+    def test_memberships_not_due_for_pull_are_skipped(self):
+        for membership in self.memberships:
+            membership.next_pull_at = timezone.now() + timedelta(minutes=10)
+            membership.save()
+
+        with patch('nodeconductor.iaas.tasks._is_cloud_suspended', return_value=False), \
+                patch('nodeconductor.iaas.tasks.group'), \
+                patch('nodeconductor.iaas.tasks.pull_cloud_account_memberships.si') as mocked_task:
+            tasks.pull_cloud_memberships()
+
+        mocked_task.assert_called_once_with(self.suspended_cloud.uuid.hex, [self.suspended_membership.pk])
+
+    def test_memberships_are_scheduled_in_chunks(self):
+        with patch('nodeconductor.iaas.tasks._is_cloud_suspended', return_value=False), \
+                patch('nodeconductor.iaas.tasks.SCHEDULING_CHUNK_SIZE', 1), \
+                patch('nodeconductor.iaas.tasks.group'), \
+                patch('nodeconductor.iaas.tasks.pull_cloud_account_memberships.si'), \
+                patch('nodeconductor.iaas.tasks.set_states', side_effect=tasks.set_states) as mocked_set_states:
+            tasks.pull_cloud_memberships()
+
+        self.assertEqual(mocked_set_states.call_count, 3)
+        self.assertFalse(models.CloudProjectMembership.objects.filter(
+            state=SynchronizationStates.IN_SYNC).exists())
+
+
+    def test_instances_of_memberships_in_sync_are_pulled_per_cloud(self):
+        with patch('nodeconductor.iaas.tasks._is_cloud_suspended',
+                   side_effect=lambda auth_url: auth_url == self.suspended_cloud.auth_url), \
+                patch('nodeconductor.iaas.tasks.group') as mocked_group, \
+                patch('nodeconductor.iaas.tasks.pull_cloud_account_memberships_instances.si') as mocked_task:
+            tasks.pull_cloud_memberships_instances()
+
+        cloud_uuid, membership_pks = mocked_task.call_args[0]
+        self.assertEqual(mocked_task.call_count, 1)
+        self.assertEqual(cloud_uuid, self.cloud.uuid.hex)
+        self.assertEqual(sorted(membership_pks), sorted(m.pk for m in self.memberships))
+        mocked_group.return_value.apply_async.assert_called_once_with()
+
+    def test_instances_of_memberships_are_pulled_in_chunks(self):
+        with patch('nodeconductor.iaas.tasks._is_cloud_suspended', return_value=False), \
+                patch('nodeconductor.iaas.tasks.SCHEDULING_CHUNK_SIZE', 1), \
+                patch('nodeconductor.iaas.tasks.group') as mocked_group, \
+                patch('nodeconductor.iaas.tasks.pull_cloud_account_memberships_instances.si') as mocked_task:
+            tasks.pull_cloud_memberships_instances()
+
+        self.assertEqual(mocked_task.call_count, 3)
+        self.assertEqual(mocked_group.call_count, 1)
+
+
+class CloudProjectMembershipsPullTest(test.APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cloud = factories.CloudFactory()
+        self.memberships = factories.CloudProjectMembershipFactory.create_batch(
+            3, cloud=self.cloud, state=SynchronizationStates.SYNCING_SCHEDULED)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_memberships_are_handed_over_to_in_flight_sweep_of_the_cloud(self):
+        lease = Lease('iaas:cloud_memberships:%s' % self.cloud.uuid.hex)
+        lease.acquire()
+
+        with patch('nodeconductor.iaas.tasks._pull_cloud_membership') as mocked_pull:
+            tasks.pull_cloud_account_memberships(self.cloud.uuid.hex, [self.memberships[0].pk])
+
+        self.assertFalse(mocked_pull.called)
+        self.assertEqual(lease.pop_joined(), [self.memberships[0].pk])
+
+    def test_memberships_joined_during_sweep_are_pulled_by_it(self):
+        membership_pks = [m.pk for m in self.memberships]
+        pulled_pks = []
+
+        def pull(membership_pk, backend=None):
+            if not pulled_pks:
+                # Another sweep of the same cloud is requested meanwhile
+                tasks.pull_cloud_account_memberships(self.cloud.uuid.hex, membership_pks[1:])
+            pulled_pks.append(membership_pk)
+
+        with patch('nodeconductor.iaas.tasks._pull_cloud_membership', side_effect=pull), \
+                patch('nodeconductor.iaas.models.Cloud.get_backend') as mocked_get_backend:
+            tasks.pull_cloud_account_memberships(self.cloud.uuid.hex, membership_pks[:1])
+
+        self.assertEqual(pulled_pks, membership_pks)
+        self.assertEqual(mocked_get_backend.call_count, 1)
+
+    @patch('nodeconductor.iaas.tasks.CLOUD_SWEEP_MIN_MEMBERSHIPS', 1)
+    def test_memberships_joined_during_sweep_are_pulled_with_fresh_listings(self):
+        membership_pks = [m.pk for m in self.memberships]
+        pulled_pks = []
+
+        def pull(membership_pk, backend=None):
+            if not pulled_pks:
+                tasks.pull_cloud_account_memberships(self.cloud.uuid.hex, membership_pks[1:])
+            pulled_pks.append(membership_pk)
+
+        with patch('nodeconductor.iaas.tasks._pull_cloud_membership', side_effect=pull), \
+                patch('nodeconductor.iaas.models.Cloud.get_backend') as mocked_get_backend:
+            tasks.pull_cloud_account_memberships(self.cloud.uuid.hex, membership_pks[:1])
+
+        self.assertEqual(pulled_pks, membership_pks)
+        self.assertEqual(mocked_get_backend.return_value.cloud_sweep.call_count, 2)
+
+    def test_next_pull_of_membership_is_scheduled_according_to_its_changes(self):
+        membership = self.memberships[0]
+
+        backend = mock.MagicMock()
+        backend.pull_security_groups.return_value = 0
+        backend.pull_instances.return_value = 2
+        backend.pull_floating_ips.return_value = 1
+
+        with patch('nodeconductor.iaas.models.Cloud.get_backend', return_value=backend):
+            tasks.pull_cloud_membership(membership.pk)
+
+        membership = models.CloudProjectMembership.objects.get(pk=membership.pk)
+        self.assertEqual(membership.state, SynchronizationStates.IN_SYNC)
+        self.assertEqual(membership.last_pull_changes, 3)
+        self.assertEqual(membership.pull_interval, 15 * 60)
+        self.assertGreater(membership.next_pull_at, timezone.now() + timedelta(minutes=13))
+
+
+    @patch('nodeconductor.iaas.tasks.CLOUD_SWEEP_MIN_MEMBERSHIPS', 3)
+    def test_instances_of_many_memberships_are_pulled_from_cloud_sweep(self):
+        models.CloudProjectMembership.objects.update(state=SynchronizationStates.IN_SYNC)
+        membership_pks = [m.pk for m in self.memberships]
+
+        with patch('nodeconductor.iaas.models.Cloud.get_backend') as mocked_get_backend:
+            backend = mocked_get_backend.return_value
+            backend.pull_instances.return_value = 0
+            tasks.pull_cloud_account_memberships_instances(self.cloud.uuid.hex, membership_pks)
+
+        self.assertEqual(backend.cloud_sweep.call_count, 1)
+        self.assertEqual(backend.pull_instances.call_count, 3)
+
+
+    def test_membership_changed_by_incremental_pull_is_not_backed_off(self):
+        membership = self.memberships[0]
+        membership.state = SynchronizationStates.IN_SYNC
+        membership.pull_interval = 30 * 60
+        membership.save()
+
+        backend = mock.MagicMock()
+        backend.pull_security_groups.return_value = 0
+        backend.pull_floating_ips.return_value = 0
+
+        with patch('nodeconductor.iaas.models.Cloud.get_backend', return_value=backend):
+            # Incremental pull applies the changes of instances
+            backend.pull_instances.return_value = 2
+            tasks.pull_cloud_membership_instances(membership.pk)
+
+            # so that the full pull finds nothing to change
+            models.CloudProjectMembership.objects.filter(pk=membership.pk).update(
+                state=SynchronizationStates.SYNCING_SCHEDULED)
+            backend.pull_instances.return_value = 0
+            tasks.pull_cloud_membership(membership.pk)
+
+        membership = models.CloudProjectMembership.objects.get(pk=membership.pk)
+        self.assertEqual(membership.last_pull_changes, 2)
+        self.assertEqual(membership.pull_interval, 15 * 60)
+        self.assertEqual(membership.pending_pull_changes, 0)
+
+    def test_next_incremental_pull_of_idle_membership_is_backed_off(self):
+        models.CloudProjectMembership.objects.update(state=SynchronizationStates.IN_SYNC)
+        membership = self.memberships[0]
+
+        backend = mock.MagicMock()
+        backend.pull_instances.return_value = 0
+
+        with patch('nodeconductor.iaas.models.Cloud.get_backend', return_value=backend):
+            tasks.pull_cloud_membership_instances(membership.pk)
+
+        membership = models.CloudProjectMembership.objects.get(pk=membership.pk)
+        self.assertEqual(membership.instances_pull_interval, 60 * 60)
+        self.assertGreater(membership.next_instances_pull_at, timezone.now() + timedelta(minutes=50))
+
+        with patch('nodeconductor.iaas.tasks._is_cloud_suspended', return_value=False), \
+                patch('nodeconductor.iaas.tasks.group'), \
+                patch('nodeconductor.iaas.tasks.pull_cloud_account_memberships_instances.si') as mocked_task:
+            tasks.pull_cloud_memberships_instances()
+
+        cloud_uuid, membership_pks = mocked_task.call_args[0]
+        self.assertEqual(sorted(membership_pks), sorted(m.pk for m in self.memberships[1:]))
+
+
+@override_settings(NODECONDUCTOR={'MEMBERSHIP_PULL_MIN_INTERVAL': 60, 'MEMBERSHIP_PULL_MAX_INTERVAL': 3600})
+class CloudProjectMembershipPullIntervalTest(SimpleTestCase):
+    def test_changed_membership_is_pulled_more_often(self):
+        self.assertEqual(tasks._get_membership_pull_interval(600, changes=5, duration=1), 300)
+
+    def test_unchanged_membership_is_pulled_less_often(self):
+        self.assertEqual(tasks._get_membership_pull_interval(600, changes=0, duration=1), 1200)
+
+    def test_interval_is_bounded(self):
+        self.assertEqual(tasks._get_membership_pull_interval(100, changes=5, duration=1), 60)
+        self.assertEqual(tasks._get_membership_pull_interval(3000, changes=0, duration=1), 3600)
+
+    def test_slow_membership_is_not_pulled_more_often_than_every_ten_pull_durations(self):
+        self.assertEqual(tasks._get_membership_pull_interval(600, changes=5, duration=50), 500)
+
+    def test_membership_never_pulled_starts_from_half_an_hour(self):
+        self.assertEqual(tasks._get_membership_pull_interval(None, changes=0, duration=1), 3600)
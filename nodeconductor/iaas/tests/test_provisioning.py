@@ -769,6 +769,174 @@ class InstanceProvisioningTest(UrlResolverMixin, test.APITransactionTestCase):
         }
 
 
+class InstanceBatchProvisioningTest(UrlResolverMixin, test.APITransactionTestCase):
+    def setUp(self):
+        self.user = structure_factories.UserFactory.create()
+        self.client.force_authenticate(user=self.user)
+
+        self.batch_url = factories.InstanceFactory.get_list_url() + 'batch/'
+
+        self.cloud = factories.CloudFactory()
+        self.template = factories.TemplateFactory()
+        self.flavor = factories.FlavorFactory(cloud=self.cloud)
+        self.project = structure_factories.ProjectFactory()
+        self.membership = factories.CloudProjectMembershipFactory(cloud=self.cloud, project=self.project)
+        self.ssh_public_key = factories.SshPublicKeyFactory(user=self.user)
+
+        self.project.add_user(self.user, ProjectRole.ADMINISTRATOR)
+
+        factories.ImageFactory(template=self.template, cloud=self.cloud)
+
+    def test_user_can_create_number_of_instances(self):
+        data = self.get_valid_data()
+        data['count'] = 3
+
+        with patch('nodeconductor.iaas.tasks.schedule_batch_provisioning.delay') as mocked_task:
+            response = self.client.post(self.batch_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual([i['hostname'] for i in response.data], ['node-1', 'node-2', 'node-3'])
+
+        instances = Instance.objects.filter(cloud_project_membership=self.membership)
+        self.assertEqual(instances.count(), 3)
+        self.assertTrue(all(i.agreed_sla == self.template.sla_level for i in instances))
+
+        mocked_task.assert_called_once_with(
+            [i['uuid'] for i in response.data], backend_flavor_id=self.flavor.backend_id)
+
+    def test_user_can_create_instances_with_given_hostnames(self):
+        data = self.get_valid_data()
+        data['hostnames'] = ['db', 'web']
+
+        with patch('nodeconductor.iaas.tasks.schedule_batch_provisioning.delay'):
+            response = self.client.post(self.batch_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(
+            set(Instance.objects.values_list('hostname', flat=True)), set(['db', 'web']))
+
+    def test_licenses_and_security_groups_are_added_to_every_instance(self):
+        template_license = factories.TemplateLicenseFactory()
+        self.template.template_licenses.add(template_license)
+        security_group = factories.SecurityGroupFactory(cloud_project_membership=self.membership)
+
+        data = self.get_valid_data()
+        data['count'] = 2
+        data['security_groups'] = [{'url': factories.SecurityGroupFactory.get_url(security_group)}]
+
+        with patch('nodeconductor.iaas.tasks.schedule_batch_provisioning.delay'):
+            response = self.client.post(self.batch_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(template_license.instance_licenses.count(), 2)
+        self.assertEqual(security_group.instance_groups.count(), 2)
+
+    def test_user_cannot_create_batch_without_count_or_hostnames(self):
+        response = self.client.post(self.batch_url, self.get_valid_data(), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertDictContainsSubset(
+            {'non_field_errors': ['Either count or hostnames is required.']}, response.data)
+
+    def test_user_cannot_create_batch_exceeding_quota(self):
+        factories.ResourceQuotaFactory(
+            cloud_project_membership=self.membership,
+            vcpu=100 * 1024, ram=100 * 1024, storage=1000 * 1024, max_instances=2)
+        factories.ResourceQuotaUsageFactory(
+            cloud_project_membership=self.membership, vcpu=0, ram=0, storage=0, max_instances=1)
+
+        data = self.get_valid_data()
+        data['count'] = 2
+
+        response = self.client.post(self.batch_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertDictContainsSubset(
+            {'non_field_errors': ['Batch exceeds max_instances quota of the cloud project membership.']},
+            response.data)
+        self.assertFalse(Instance.objects.exists())
+
+    # Helper methods
+    def get_valid_data(self):
+        return {
+            'hostname': 'node',
+            'project': self._get_project_url(self.project),
+            'template': self._get_template_url(self.template),
+            'flavor': self._get_flavor_url(self.flavor),
+            'ssh_public_key': self._get_ssh_public_key_url(self.ssh_public_key),
+        }
+
+
+class InstanceBatchOperationTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.user = structure_factories.UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+        self.operations_url = factories.InstanceFactory.get_list_url() + 'operations/'
+
+        self.membership = factories.CloudProjectMembershipFactory()
+        self.membership.project.add_user(self.user, ProjectRole.ADMINISTRATOR)
+        self.instances = factories.InstanceFactory.create_batch(
+            2, cloud_project_membership=self.membership, state=Instance.States.ONLINE)
+
+    def test_user_can_stop_instances_of_projects_he_is_administrator_of(self):
+        with patch('nodeconductor.iaas.tasks.stop_membership_instances.delay') as mocked_task:
+            response = self.client.post(self.operations_url, {
+                'operation': 'stop',
+                'instances': [instance.uuid.hex for instance in self.instances],
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(len(response.data['scheduled']), 2)
+        self.assertEqual(
+            Instance.objects.filter(state=Instance.States.STOPPING_SCHEDULED).count(), 2)
+
+        membership_pk, instance_uuids = mocked_task.call_args[0]
+        self.assertEqual(membership_pk, self.membership.pk)
+        self.assertEqual(set(instance_uuids), set(instance.uuid.hex for instance in self.instances))
+
+    def test_instances_in_inappropriate_state_are_skipped(self):
+        offline_instance = factories.InstanceFactory(
+            cloud_project_membership=self.membership, state=Instance.States.OFFLINE)
+
+        with patch('nodeconductor.iaas.tasks.stop_membership_instances.delay'):
+            response = self.client.post(self.operations_url + '?project=%s' % self.membership.project.uuid.hex,
+                                        {'operation': 'stop'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['skipped'], [offline_instance.uuid.hex])
+        self.assertEqual(len(response.data['scheduled']), 2)
+
+    def test_user_cannot_stop_instances_of_projects_he_is_manager_of(self):
+        instance = factories.InstanceFactory(state=Instance.States.ONLINE)
+        instance.cloud_project_membership.project.add_user(self.user, ProjectRole.MANAGER)
+
+        with patch('nodeconductor.iaas.tasks.stop_membership_instances.delay') as mocked_task:
+            response = self.client.post(self.operations_url, {
+                'operation': 'stop',
+                'instances': [instance.uuid.hex],
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['scheduled'], [])
+        self.assertEqual(Instance.objects.get(pk=instance.pk).state, Instance.States.ONLINE)
+        self.assertFalse(mocked_task.called)
+
+    def test_user_has_to_specify_instances_or_filters(self):
+        response = self.client.post(self.operations_url, {'operation': 'stop'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_parameters_other_than_filters_do_not_select_instances(self):
+        with patch('nodeconductor.iaas.tasks.delete_membership_instances.delay') as mocked_task:
+            response = self.client.post(self.operations_url + '?format=json&page=2',
+                                        {'operation': 'destroy'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(mocked_task.called)
+        self.assertEqual(Instance.objects.filter(state=Instance.States.ONLINE).count(), 2)
+
+
 class InstanceListRetrieveTest(test.APITransactionTestCase):
 
     def setUp(self):
@@ -1,6 +1,9 @@
+from django.test import TestCase
+from mock import patch, call, ANY
 from rest_framework import test, status
 
 from nodeconductor.core import models as core_models
+from nodeconductor.iaas import tasks
 from nodeconductor.iaas.tests import factories
 from nodeconductor.structure.tests import factories as structure_factories
 
@@ -50,3 +53,57 @@ class SshKeyCreateDeleteTest(test.APITransactionTestCase):
                         'New key should have been created in the database')
 
     # TODO: add tests for key deletion
+
+
+class SshKeyPropagationQueueTest(TestCase):
+
+    def setUp(self):
+        self.memberships = factories.CloudProjectMembershipFactory.create_batch(2)
+        self.keys = factories.SshPublicKeyFactory.create_batch(3)
+
+    @patch('nodeconductor.iaas.tasks.push_ssh_public_keys')
+    @patch('nodeconductor.iaas.tasks.push_queued_ssh_public_keys.apply_async')
+    def test_keys_enqueued_for_membership_are_pushed_at_once(self, mocked_apply_async, mocked_push):
+        membership1, membership2 = self.memberships
+        key1, key2, key3 = self.keys
+
+        tasks.enqueue_ssh_public_keys([key1.uuid.hex, key2.uuid.hex], [membership1.pk, membership2.pk])
+        tasks.enqueue_ssh_public_keys([key2.uuid.hex, key3.uuid.hex], [membership1.pk])
+
+        mocked_apply_async.assert_any_call(args=(membership1.pk,), countdown=10)
+        mocked_apply_async.assert_any_call(args=(membership2.pk,), countdown=10)
+
+        tasks.push_queued_ssh_public_keys(membership1.pk)
+        # Push scheduled by the second enqueue has nothing left to push
+        tasks.push_queued_ssh_public_keys(membership1.pk)
+
+        mocked_push.assert_called_once_with(ANY, [membership1.pk])
+        self.assertEqual(set(mocked_push.call_args[0][0]), {key1.uuid.hex, key2.uuid.hex, key3.uuid.hex})
+
+    @patch('nodeconductor.iaas.tasks.push_ssh_public_keys')
+    @patch('nodeconductor.iaas.tasks.push_queued_ssh_public_keys.apply_async')
+    def test_keys_enqueued_after_push_are_pushed_by_another_push(self, mocked_apply_async, mocked_push):
+        membership = self.memberships[0]
+        key1, key2 = self.keys[:2]
+
+        tasks.enqueue_ssh_public_keys([key1.uuid.hex], [membership.pk])
+        tasks.push_queued_ssh_public_keys(membership.pk)
+        tasks.enqueue_ssh_public_keys([key2.uuid.hex], [membership.pk])
+
+        self.assertEqual(mocked_apply_async.call_count, 2)
+
+        tasks.push_queued_ssh_public_keys(membership.pk)
+
+        self.assertEqual(mocked_push.call_args_list, [
+            call([key1.uuid.hex], [membership.pk]),
+            call([key2.uuid.hex], [membership.pk]),
+        ])
+
+    @patch('nodeconductor.iaas.tasks.push_queued_ssh_public_keys.apply_async')
+    def test_keys_already_queued_do_not_schedule_another_push(self, mocked_apply_async):
+        membership = self.memberships[0]
+
+        tasks.enqueue_ssh_public_keys([self.keys[0].uuid.hex], [membership.pk])
+        tasks.enqueue_ssh_public_keys([self.keys[0].uuid.hex], [membership.pk])
+
+        mocked_apply_async.assert_called_once_with(args=(membership.pk,), countdown=10)
@@ -0,0 +1,183 @@
+from __future__ import unicode_literals
+
+import time
+
+from django.test import TransactionTestCase
+from mock import patch, MagicMock
+
+from nodeconductor.core.tasks import Lease
+from nodeconductor.iaas import tasks
+from nodeconductor.iaas.backend import CloudBackendError, CloudUnavailableError
+from nodeconductor.iaas.models import Instance
+from nodeconductor.iaas.tests import factories
+
+
+class InstanceOperationTest(TransactionTestCase):
+    def setUp(self):
+        self.instance = factories.InstanceFactory(state=Instance.States.PROVISIONING)
+        self.instance_uuid = self.instance.uuid.hex
+
+        self.backend = MagicMock()
+        patcher = patch('nodeconductor.iaas.models.Cloud.get_backend', return_value=self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_state(self):
+        return Instance.objects.get(pk=self.instance.pk).state
+
+    @patch('nodeconductor.iaas.tasks.poll_provisioning.apply_async')
+    def test_operation_in_progress_is_polled_again(self, mocked_poll):
+        self.backend.check_instance_provisioning.return_value = False
+        deadline = time.time() + 60
+
+        tasks.poll_provisioning(self.instance_uuid, 'flavor-1', deadline, attempt=2)
+
+        self.assertEqual(self.get_state(), Instance.States.PROVISIONING)
+        mocked_poll.assert_called_once_with(
+            args=(self.instance_uuid, 'flavor-1'),
+            kwargs={'deadline': deadline, 'attempt': 3},
+            countdown=tasks._get_instance_operation_poll_countdown(2),
+        )
+
+    @patch('nodeconductor.iaas.tasks.poll_provisioning.apply_async')
+    def test_operation_in_progress_after_deadline_is_erred(self, mocked_poll):
+        self.backend.check_instance_provisioning.return_value = False
+
+        tasks.poll_provisioning(self.instance_uuid, 'flavor-1', time.time() - 1)
+
+        self.assertFalse(mocked_poll.called)
+        self.assertEqual(self.get_state(), Instance.States.ERRED)
+
+    @patch('nodeconductor.iaas.tasks.poll_flavor_update.apply_async')
+    def test_failed_operation_is_erred(self, mocked_poll):
+        Instance.objects.filter(pk=self.instance.pk).update(state=Instance.States.RESIZING)
+        flavor = factories.FlavorFactory(cloud=self.instance.cloud_project_membership.cloud)
+        self.backend.check_flavor_update.side_effect = CloudBackendError('Resizing has been reverted')
+
+        tasks.poll_flavor_update(self.instance_uuid, flavor.uuid.hex, time.time() + 60)
+
+        self.assertFalse(mocked_poll.called)
+        self.assertEqual(self.get_state(), Instance.States.ERRED)
+
+    @patch('nodeconductor.iaas.tasks.poll_provisioning.apply_async')
+    def test_operation_of_unavailable_cloud_is_polled_again(self, mocked_poll):
+        self.backend.check_instance_provisioning.side_effect = CloudUnavailableError('Cloud is busy')
+
+        tasks.poll_provisioning(self.instance_uuid, 'flavor-1', time.time() + 60)
+
+        self.assertTrue(mocked_poll.called)
+        self.assertEqual(self.get_state(), Instance.States.PROVISIONING)
+
+    @patch('nodeconductor.iaas.tasks.create_zabbix_host_and_service')
+    @patch('nodeconductor.iaas.tasks.poll_provisioning.apply_async')
+    def test_completed_provisioning_brings_instance_online(self, mocked_poll, mocked_zabbix):
+        self.backend.check_instance_provisioning.return_value = True
+
+        tasks.poll_provisioning(self.instance_uuid, 'flavor-1', time.time() + 60)
+
+        self.assertFalse(mocked_poll.called)
+        self.assertEqual(mocked_zabbix.call_count, 1)
+        self.assertEqual(self.get_state(), Instance.States.ONLINE)
+
+    @patch('nodeconductor.iaas.tasks.create_zabbix_host_and_service')
+    @patch('nodeconductor.iaas.tasks.poll_provisioning.apply_async')
+    def test_duplicate_poll_of_processed_instance_does_nothing(self, mocked_poll, mocked_zabbix):
+        Instance.objects.filter(pk=self.instance.pk).update(state=Instance.States.ONLINE)
+
+        tasks.poll_provisioning(self.instance_uuid, 'flavor-1', time.time() + 60)
+
+        self.assertFalse(self.backend.check_instance_provisioning.called)
+        self.assertFalse(mocked_poll.called)
+        self.assertFalse(mocked_zabbix.called)
+
+    @patch('nodeconductor.iaas.tasks.poll_provisioning.apply_async')
+    def test_duplicate_poll_overlapping_in_flight_one_is_skipped(self, mocked_poll):
+        lease = Lease('iaas:instance:%s' % self.instance_uuid)
+        self.assertTrue(lease.acquire())
+        try:
+            tasks.poll_provisioning(self.instance_uuid, 'flavor-1', time.time() + 60)
+        finally:
+            lease.release()
+
+        self.assertFalse(self.backend.check_instance_provisioning.called)
+        self.assertFalse(mocked_poll.called)
+
+
+class MembershipInstancesOperationTest(TransactionTestCase):
+    def setUp(self):
+        self.membership = factories.CloudProjectMembershipFactory()
+        self.instances = factories.InstanceFactory.create_batch(
+            2, cloud_project_membership=self.membership, state=Instance.States.STOPPING)
+        self.instance_uuids = [instance.uuid.hex for instance in self.instances]
+
+        self.backend = MagicMock()
+        patcher = patch('nodeconductor.iaas.models.Cloud.get_backend', return_value=self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_state(self, instance):
+        return Instance.objects.get(pk=instance.pk).state
+
+    @patch('nodeconductor.iaas.tasks.poll_membership_instances_stopping.apply_async')
+    def test_instances_are_polled_once_operation_is_requested(self, mocked_poll):
+        Instance.objects.update(state=Instance.States.STOPPING_SCHEDULED)
+        self.backend.request_instances_operation.return_value = self.instances[:1]
+
+        tasks.stop_membership_instances(self.membership.pk, self.instance_uuids)
+
+        self.assertEqual(mocked_poll.call_args[1]['args'], (self.membership.pk, self.instance_uuids[:1]))
+        self.assertEqual(self.get_state(self.instances[0]), Instance.States.STOPPING)
+        self.assertEqual(self.get_state(self.instances[1]), Instance.States.ERRED)
+
+    @patch('nodeconductor.iaas.tasks.poll_membership_instances_stopping.apply_async')
+    def test_instances_in_progress_are_polled_again(self, mocked_poll):
+        self.backend.check_instances_operation.return_value = (self.instances[:1], [])
+        deadline = time.time() + 60
+
+        tasks.poll_membership_instances_stopping(self.membership.pk, self.instance_uuids, deadline)
+
+        self.assertEqual(self.get_state(self.instances[0]), Instance.States.OFFLINE)
+        self.assertEqual(self.get_state(self.instances[1]), Instance.States.STOPPING)
+        mocked_poll.assert_called_once_with(
+            args=(self.membership.pk, self.instance_uuids[1:]),
+            kwargs={'deadline': deadline, 'attempt': 1},
+            countdown=tasks._get_instance_operation_poll_countdown(0),
+        )
+
+    @patch('nodeconductor.iaas.tasks.poll_membership_instances_stopping.apply_async')
+    def test_instances_in_progress_after_deadline_are_erred(self, mocked_poll):
+        self.backend.check_instances_operation.return_value = ([], [])
+
+        tasks.poll_membership_instances_stopping(self.membership.pk, self.instance_uuids, time.time() - 1)
+
+        self.assertFalse(mocked_poll.called)
+        self.assertEqual(Instance.objects.filter(state=Instance.States.ERRED).count(), 2)
+
+    @patch('nodeconductor.iaas.tasks.poll_membership_instances_stopping.apply_async')
+    def test_instances_of_unavailable_cloud_are_polled_again(self, mocked_poll):
+        self.backend.check_instances_operation.side_effect = CloudUnavailableError('Cloud is busy')
+
+        tasks.poll_membership_instances_stopping(self.membership.pk, self.instance_uuids, time.time() + 60)
+
+        self.assertEqual(mocked_poll.call_args[1]['args'], (self.membership.pk, self.instance_uuids))
+        self.assertEqual(Instance.objects.filter(state=Instance.States.STOPPING).count(), 2)
+
+    @patch('nodeconductor.iaas.tasks.poll_membership_instances_stopping.apply_async')
+    def test_duplicate_poll_of_processed_instances_does_nothing(self, mocked_poll):
+        Instance.objects.update(state=Instance.States.OFFLINE)
+
+        tasks.poll_membership_instances_stopping(self.membership.pk, self.instance_uuids, time.time() + 60)
+
+        self.assertFalse(self.backend.check_instances_operation.called)
+        self.assertFalse(mocked_poll.called)
+
+    @patch('nodeconductor.iaas.tasks.delete_zabbix_host_and_service')
+    @patch('nodeconductor.iaas.tasks.poll_membership_instances_deleting.apply_async')
+    def test_deleted_instances_are_removed_from_database(self, mocked_poll, mocked_zabbix):
+        Instance.objects.update(state=Instance.States.DELETING)
+        self.backend.check_instances_operation.return_value = (self.instances, [])
+
+        tasks.poll_membership_instances_deleting(self.membership.pk, self.instance_uuids, time.time() + 60)
+
+        self.assertFalse(Instance.objects.exists())
+        self.assertEqual(mocked_zabbix.call_count, 2)
@@ -222,6 +222,26 @@ class InstanceViewSet(mixins.CreateModelMixin,
         from nodeconductor.iaas.tasks import push_instance_security_groups
         push_instance_security_groups.delay(self.object.uuid.hex)
 
+    @action(is_for_list=True)
+    def batch(self, request):
+        """
+        Create a batch of identical instances and provision them together.
+        """
+        serializer = serializers.InstanceBatchCreateSerializer(
+            data=request.DATA, context=self.get_serializer_context())
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        flavor = serializer.object.flavor
+        self.pre_save(serializer.object)
+        instances = serializer.save(force_insert=True)
+
+        tasks.schedule_batch_provisioning.delay(
+            [instance.uuid.hex for instance in instances], backend_flavor_id=flavor.backend_id)
+
+        data = serializers.InstanceSerializer(instances, many=True, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
     def change_flavor(self, instance, flavor):
         instance_cloud = instance.cloud_project_membership.cloud
 
@@ -285,6 +305,70 @@ class InstanceViewSet(mixins.CreateModelMixin,
         return Response({'status': '%s was scheduled' % operation},
                         status=status.HTTP_202_ACCEPTED)
 
+    @action(is_for_list=True)
+    def operations(self, request):
+        """
+        Schedule an operation on many instances at once.
+
+        Instances are given either by a list of uuids or by the same filters as the instance list.
+        """
+        serializer = serializers.InstanceBatchOperationSerializer(data=request.DATA)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        operation = serializer.object['operation']
+        instance_uuids = serializer.object.get('instances')
+
+        # Parameters like format or page do not narrow down the instances, only non-empty filters do
+        filters = [name for name in self.filter_class.base_filters if request.QUERY_PARAMS.get(name)]
+        if instance_uuids is None and not filters:
+            # Do not let a mistake affect all the instances
+            return Response({'detail': 'Either instances or filters are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Importing here to avoid circular imports
+        from nodeconductor.core.tasks import set_states
+
+        supported_operations = {
+            # code: (instance_marker_state, scheduled_celery_task)
+            'start': ('schedule_starting', tasks.start_membership_instances),
+            'stop': ('schedule_stopping', tasks.stop_membership_instances),
+            'destroy': ('schedule_deletion', tasks.delete_membership_instances),
+        }
+        change_instance_state, processing_task = supported_operations[operation]
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if not request.user.is_staff:
+            queryset = queryset.filter(
+                cloud_project_membership__project__roles__permission_group__user=request.user,
+                cloud_project_membership__project__roles__role_type=ProjectRole.ADMINISTRATOR,
+            )
+        if instance_uuids is not None:
+            queryset = queryset.filter(uuid__in=instance_uuids)
+
+        membership_pks = dict(
+            (instance.uuid.hex, instance.cloud_project_membership_id)
+            for instance in queryset.only('uuid', 'cloud_project_membership')
+        )
+
+        scheduled_uuids = [
+            instance_uuid.hex
+            for instance_uuid in set_states(models.Instance, list(membership_pks), change_instance_state)
+        ]
+
+        # Instances of the same membership are processed together using a single tenant session
+        uuids_by_membership = defaultdict(list)
+        for instance_uuid in scheduled_uuids:
+            uuids_by_membership[membership_pks[instance_uuid]].append(instance_uuid)
+
+        for membership_pk, membership_instance_uuids in uuids_by_membership.items():
+            processing_task.delay(membership_pk, membership_instance_uuids)
+
+        return Response({'status': '%s was scheduled' % operation,
+                         'scheduled': scheduled_uuids,
+                         'skipped': sorted(set(membership_pks) - set(scheduled_uuids))},
+                        status=status.HTTP_202_ACCEPTED)
+
     @action()
     def stop(self, request, uuid=None):
         return self._schedule_transition(request, uuid, 'stop')
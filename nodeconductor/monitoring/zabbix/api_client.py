@@ -7,6 +7,7 @@ from django.conf import settings
 from django.utils import six
 from pyzabbix import ZabbixAPI, ZabbixAPIException
 
+from nodeconductor.core import cassettes, tracing
 from nodeconductor.monitoring.zabbix.errors import ZabbixError
 
 
@@ -179,6 +180,10 @@ class ZabbixApiClient(object):
             six.reraise(ZabbixError, e)
 
     def get_zabbix_api(self):
+        api = cassettes.use_cassette('zabbix', self.server, self._create_zabbix_api)
+        return tracing.trace_client('zabbix', api, cloud=self.server)
+
+    def _create_zabbix_api(self):
         unsafe_session = requests.Session()
         unsafe_session.verify = False
 
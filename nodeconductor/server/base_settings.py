@@ -6,6 +6,8 @@ Django base settings for nodeconductor project.
 from datetime import timedelta
 import os
 
+from kombu import Exchange, Queue
+
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..'))
 
 
@@ -117,6 +119,66 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Task queues, see "Task queues" section of background processing guide.
+# Lifecycle operations requested by users are isolated from periodic synchronization,
+# so that they are not delayed by pulls of all the clouds and memberships.
+CELERY_DEFAULT_QUEUE = 'celery'
+CELERY_QUEUES = (
+    Queue('celery', Exchange('celery'), routing_key='celery'),
+    Queue('interactive', Exchange('interactive'), routing_key='interactive'),
+    Queue('sync', Exchange('sync'), routing_key='sync'),
+    Queue('backup', Exchange('backup'), routing_key='backup'),
+    Queue('monitoring', Exchange('monitoring'), routing_key='monitoring'),
+)
+
+# Redis broker serves messages with lower priority first,
+# that matters for workers consuming several queues
+CELERY_ROUTES = {
+    'nodeconductor.iaas.tasks.schedule_provisioning': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.schedule_batch_provisioning': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.poll_provisioning': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.schedule_starting': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.schedule_stopping': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.schedule_deleting': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.poll_deleting': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.update_flavor': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.poll_flavor_update': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.extend_disk': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.poll_disk_extension': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.start_membership_instances': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.poll_membership_instances_starting': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.stop_membership_instances': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.poll_membership_instances_stopping': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.delete_membership_instances': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.poll_membership_instances_deleting': {'queue': 'interactive', 'priority': 0},
+    'nodeconductor.iaas.tasks.push_instance_security_groups': {'queue': 'interactive', 'priority': 0},
+
+    # Synchronization requested by users goes ahead of periodic pulls
+    'nodeconductor.iaas.tasks.sync_cloud_account': {'queue': 'sync', 'priority': 0},
+    'nodeconductor.iaas.tasks.sync_cloud_membership': {'queue': 'sync', 'priority': 0},
+    'nodeconductor.iaas.tasks.push_ssh_public_keys': {'queue': 'sync', 'priority': 0},
+    'nodeconductor.iaas.tasks.push_queued_ssh_public_keys': {'queue': 'sync', 'priority': 0},
+    'nodeconductor.iaas.tasks.pull_cloud_accounts': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.pull_cloud_account': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.pull_images': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.pull_cloud_memberships': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.pull_cloud_membership': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.pull_cloud_account_memberships': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.pull_cloud_memberships_instances': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.pull_cloud_membership_instances': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.pull_cloud_account_memberships_instances': {'queue': 'sync', 'priority': 6},
+    'nodeconductor.iaas.tasks.check_cloud_memberships_quotas': {'queue': 'sync', 'priority': 6},
+
+    'nodeconductor.backup.tasks.process_backup_task': {'queue': 'backup', 'priority': 3},
+    'nodeconductor.backup.tasks.restoration_task': {'queue': 'backup', 'priority': 3},
+    'nodeconductor.backup.tasks.deletion_task': {'queue': 'backup', 'priority': 3},
+
+    'nodeconductor.monitoring.tasks.update_instance_sla': {'queue': 'monitoring', 'priority': 6},
+    'nodeconductor.iaas.tasks.sync_instances_with_zabbix': {'queue': 'monitoring', 'priority': 6},
+    'nodeconductor.structure.tasks.create_zabbix_hostgroup': {'queue': 'monitoring', 'priority': 3},
+    'nodeconductor.structure.tasks.delete_zabbix_hostgroup': {'queue': 'monitoring', 'priority': 3},
+}
+
 # Regular tasks
 CELERYBEAT_SCHEDULE = {
     'update-instance-monthly-slas': {
@@ -135,9 +197,15 @@ CELERYBEAT_SCHEDULE = {
         'schedule': timedelta(minutes=60),
         'args': (),
     },
+    # Memberships are pulled as often as they change, the task only picks the ones that are due
     'pull-cloud-project-memberships': {
         'task': 'nodeconductor.iaas.tasks.pull_cloud_memberships',
-        'schedule': timedelta(minutes=30),
+        'schedule': timedelta(minutes=5),
+        'args': (),
+    },
+    'pull-cloud-project-memberships-instances': {
+        'task': 'nodeconductor.iaas.tasks.pull_cloud_memberships_instances',
+        'schedule': timedelta(minutes=5),
         'args': (),
     },
 
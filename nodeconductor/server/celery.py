@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import os
 
 from celery import Celery
+from celery.signals import celeryd_init
 from django.conf import settings
 
 # set the default Django settings module for the 'celery' program.
@@ -14,3 +15,46 @@ app = Celery('nodeconductor')
 # pickle the object when using Windows.
 app.config_from_object('django.conf:settings')
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
+
+
+def get_worker_prefetch_multiplier(queues):
+    """
+    Return prefetch multiplier of a worker consuming the given queues, all of them if none given.
+
+    Worker consuming several queues gets the smallest of their multipliers,
+    so that user actions are not stuck behind tasks prefetched from other queues.
+    """
+    nc_settings = getattr(settings, 'NODECONDUCTOR', {})
+    multipliers = {
+        'interactive': 1,
+        'sync': 1,
+        'backup': 1,
+        'monitoring': 4,
+    }
+    multipliers.update(nc_settings.get('WORKER_PREFETCH_MULTIPLIERS', {}))
+
+    queue_multipliers = [multiplier for queue, multiplier in multipliers.items() if not queues or queue in queues]
+    if not queue_multipliers:
+        return None
+    return min(queue_multipliers)
+
+
+@celeryd_init.connect
+def configure_worker(conf=None, options=None, **kwargs):
+    """
+    Set prefetch multiplier of the worker being started according to the queues it consumes.
+
+    Worker reads CELERYD_PREFETCH_MULTIPLIER from conf only after this signal,
+    unless the multiplier has been passed to the worker explicitly.
+    """
+    options = options or {}
+    if options.get('prefetch_multiplier') is not None:
+        return
+
+    queues = options.get('queues') or []
+    if not isinstance(queues, (list, tuple)):
+        queues = [queue.strip() for queue in queues.split(',')]
+
+    prefetch_multiplier = get_worker_prefetch_multiplier(queues)
+    if prefetch_multiplier is not None:
+        conf.CELERYD_PREFETCH_MULTIPLIER = prefetch_multiplier